@@ -0,0 +1,215 @@
+"""
+Helpers for parsing DTE XML documents in :mod:`asyncio` programs.
+
+Parsing, cleaning and validating a DTE XML document is CPU-bound work that
+may take tens of milliseconds (e.g. a big "EnvioDTE"), which would block
+the event loop. The functions of this module run that work in an executor
+(by default the event loop's one, a thread pool) instead.
+
+Validating in a thread pool is safe, but the validations against the same
+XML schema object are serialized (see :func:`cl_sii.libs.xml_utils.validate_xml_doc`),
+thus only the rest of the work is done in parallel. With a process pool,
+each process has its own XML schema objects.
+
+:func:`iter_parse_dte_bytes` processes many documents, with a limit of
+documents in process at the same time: the next input value is not
+requested until there is a free slot, so the producer of the input values
+is slowed down (backpressure) instead of accumulating pending work in
+memory. When the results are yielded in order, a slow document does not
+hold the other slots: the results that are ready (up to as many as the
+limit) are kept in a buffer until it is their turn.
+
+.. note:: Cancelling a task that awaits any of these functions cancels
+    the pending work that was not started yet, but a document that is being
+    processed in the executor is processed to completion (and its result is
+    discarded) because threads can not be interrupted.
+
+
+Usage:
+
+>>> from cl_sii.dte import aio
+
+>>> dte_struct = await aio.parse_dte_bytes(xml_doc_bytes)
+
+>>> async for index, dte_struct in aio.iter_parse_dte_bytes(xml_docs_bytes, max_concurrency=8):
+...     print(index, dte_struct.natural_key)
+
+>>> async for index, result in aio.iter_parse_dte_bytes(
+...         xml_docs_bytes, ordered=False, return_exceptions=True):
+...     if isinstance(result, Exception):
+...         print(index, 'error', result)
+
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+from typing import (
+    AsyncIterable, AsyncIterator, Dict, Iterable, Optional, Tuple, TypeVar, Union,
+)
+
+from . import data_models
+from . import parse
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+"""
+Default max number of documents in process at the same time.
+"""
+
+_T = TypeVar('_T')
+
+
+###############################################################################
+# main functions
+###############################################################################
+
+async def parse_dte_bytes(
+    value: bytes,
+    *,
+    clean: bool = True,
+    validate: bool = True,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> data_models.DteDataL2:
+    """
+    Parse, clean and validate the DTE XML document ``value``, and parse its data.
+
+    The work is done in ``executor`` (by default the event loop's one) and
+    so it does not block the event loop. If ``executor`` is a process pool,
+    CPU-bound work of many documents is done in parallel.
+
+    :param value: DTE XML document
+    :param clean: see :func:`parse.parse_dte_xml_bytes`
+    :param validate: see :func:`parse.parse_dte_xml_bytes`
+    :param executor: executor to run the work in
+    :raises TypeError:
+    :raises xml_utils.BaseXmlParsingError:
+    :raises xml_utils.XmlSchemaDocValidationError:
+    :raises ValueError:
+
+    """
+    loop = asyncio.get_running_loop()
+    func = functools.partial(parse.parse_dte_xml_bytes, value, clean=clean, validate=validate)
+    if not isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        # Run in a copy of the current context so that e.g. a
+        #   'instrumentation_utils.StageTracer' active in the task traces the work too.
+        func = functools.partial(contextvars.copy_context().run, func)
+
+    return await loop.run_in_executor(executor, func)
+
+
+async def iter_parse_dte_bytes(
+    values: Union[Iterable[bytes], AsyncIterable[bytes]],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ordered: bool = True,
+    return_exceptions: bool = False,
+    clean: bool = True,
+    validate: bool = True,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> AsyncIterator[Tuple[int, Union[data_models.DteDataL2, Exception]]]:
+    """
+    Process each DTE XML document in ``values`` with :func:`parse_dte_bytes`.
+
+    Yield the index of each input value and the result of processing it.
+    At most ``max_concurrency`` documents are in process at the same time.
+
+    If ``ordered``, a result that is ready is kept in a buffer until the
+    results of all the previous input values are yielded, which frees its
+    slot for the next input value. The buffer holds up to
+    ``max_concurrency`` results; when it is full, no more input values are
+    requested until the oldest pending document is done (head-of-line
+    blocking), thus at most ``2 * max_concurrency`` input values are
+    requested and not yielded yet. If the order does not matter, use
+    ``ordered=False`` and this never happens.
+
+    When the async generator is closed (e.g. the task is cancelled, or
+    ``aclose()`` is called), the pending work is cancelled.
+
+    .. warning:: Stopping an ``async for`` loop with ``break`` does not close
+        the async generator immediately; call ``aclose()`` to do so e.g.
+        in a ``finally`` block.
+
+    :param values: DTE XML documents (a sync or async iterable)
+    :param max_concurrency: max number of documents in process at the same time
+    :param ordered: whether to yield the results in the order of ``values``.
+        If false, they are yielded as soon as they are available.
+    :param return_exceptions: whether to yield the exception raised when
+        processing a document (instead of raising it and ending the iteration)
+    :param clean: see :func:`parse_dte_bytes`
+    :param validate: see :func:`parse_dte_bytes`
+    :param executor: see :func:`parse_dte_bytes`
+    :raises ValueError: if ``max_concurrency`` is less than 1
+
+    """
+    if max_concurrency < 1:
+        raise ValueError("Value of 'max_concurrency' must be at least 1.")
+
+    pending: Dict['asyncio.Future[data_models.DteDataL2]', int] = {}
+    # Futures that are done but not yielded yet, by index of their input value.
+    ready: Dict[int, 'asyncio.Future[data_models.DteDataL2]'] = {}
+    try:
+        values_iterator = _aiter(values).__aiter__()
+        values_exhausted = False
+        index = 0
+        next_index = 0
+
+        while not values_exhausted or pending or ready:
+            while (
+                not values_exhausted
+                and len(pending) < max_concurrency
+                and len(pending) + len(ready) < max_concurrency * 2
+            ):
+                try:
+                    value = await values_iterator.__anext__()
+                except StopAsyncIteration:
+                    values_exhausted = True
+                    break
+                future = asyncio.ensure_future(parse_dte_bytes(
+                    value, clean=clean, validate=validate, executor=executor))
+                pending[future] = index
+                index += 1
+
+            if pending:
+                done_set, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done_set:
+                    ready[pending.pop(future)] = future
+
+            if ordered:
+                done_indexes = []
+                while next_index in ready:
+                    done_indexes.append(next_index)
+                    next_index += 1
+            else:
+                done_indexes = sorted(ready)
+
+            for future_index in done_indexes:
+                future = ready.pop(future_index)
+                exc = future.exception()
+                if exc is None:
+                    yield future_index, future.result()
+                elif return_exceptions and isinstance(exc, Exception):
+                    yield future_index, exc
+                else:
+                    raise exc
+    finally:
+        for future in pending:
+            future.cancel()
+        if pending or ready:
+            # Wait for the cancellation to take effect (including the cancellation of the work
+            #   in the executor that was not started yet), which does not happen immediately.
+            # note: this also retrieves the exceptions of the futures that are not yielded.
+            await asyncio.gather(*pending, *ready.values(), return_exceptions=True)
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+async def _aiter(values: Union[Iterable[_T], AsyncIterable[_T]]) -> AsyncIterator[_T]:
+    if isinstance(values, AsyncIterable):
+        async for value in values:
+            yield value
+    else:
+        for value in values:
+            yield value
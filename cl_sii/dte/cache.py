@@ -0,0 +1,354 @@
+"""
+Persistent cache of the DTE data parsed from DTE XML documents.
+
+Parsing a DTE XML document (see :func:`parse.parse_dte_xml_bytes`) is much
+more expensive than reading its data from a local database. This cache is
+useful when the same XML documents are processed again and again (e.g.
+re-processing an archive whenever downstream logic changes).
+
+The cache is an SQLite database file. Its entries are keyed by a digest of
+the XML document, the parsing options and the version of this library, so
+a new version of the library does not use data parsed by a previous one.
+When the size of the database exceeds the max size, the oldest entries are
+removed. The size is checked when the cache is opened and closed, and every
+few new entries.
+
+.. note:: The eviction policy is "first in, first out", not "least recently
+    used": the age of an entry is that of the last time it was saved, and
+    reading it does not make it newer (because that would turn every cache
+    hit into a write to the database).
+
+The database file may be used by several processes at the same time, and
+a :class:`DteXmlDataCache` instance may be used by several threads.
+
+.. warning:: Do not use the same :class:`DteXmlDataCache` instance in a
+    forked process; create another one instead.
+
+
+Usage:
+
+>>> from cl_sii.dte.cache import DteXmlDataCache
+
+>>> with DteXmlDataCache('/var/cache/my-app/dte-xml-data.sqlite3') as cache:
+...     for xml_file_path in xml_file_paths:
+...         with open(xml_file_path, mode='rb') as f:
+...             dte_struct = cache.get_or_parse(f.read())
+...     print(cache.stats)
+DteXmlDataCacheStats(hits=9120, misses=880, evictions=0)
+
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple, Union
+
+import cl_sii
+from cl_sii.rut import Rut
+from . import constants
+from . import data_models
+from . import parse
+
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+"""
+Default max size (in bytes) of the cache database.
+"""
+
+_SQLITE_BUSY_TIMEOUT = 60.0
+"""Max time (in seconds) to wait for another process to release a lock of the database."""
+
+_EVICTION_TARGET_RATIO = 0.9
+"""When the cache database is full, remove entries until its size is this fraction of the max."""
+
+_EVICTION_CHECK_INTERVAL = 100
+"""Number of new entries between checks of the size of the cache database."""
+
+_SCHEMA_SQL = (
+    'CREATE TABLE IF NOT EXISTS dte_xml_data ('
+    'key BLOB PRIMARY KEY, '
+    'data TEXT NOT NULL, '
+    'signature_value BLOB, '
+    'signature_x509_cert_der BLOB'
+    ')'
+)
+
+
+@dataclasses.dataclass
+class DteXmlDataCacheStats:
+
+    """
+    Statistics of a :class:`DteXmlDataCache` instance (not of the database).
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class DteXmlDataCache:
+
+    """
+    Persistent cache of the DTE data parsed from DTE XML documents.
+
+    :param path: path of the SQLite database file (created if it does not exist)
+    :param max_size: max size (in bytes) of the database
+    :raises ValueError: if ``max_size`` is not positive
+
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        max_size: int = DEFAULT_MAX_SIZE,
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError("Value of 'max_size' must be positive.")
+
+        self.path = path
+        self.max_size = max_size
+        self.stats = DteXmlDataCacheStats()
+
+        self._lock = threading.Lock()
+        self._new_entries_count = 0
+        self._closed = False
+        # note: the connection is in autocommit mode ('isolation_level=None'); each statement is
+        #   a transaction, so a process does not hold a lock for longer than necessary.
+        self._connection = sqlite3.connect(
+            os.fspath(path),
+            timeout=_SQLITE_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # Write-ahead logging allows readers and a writer (from different processes) at the same
+        #   time, and it is faster than the default journal mode.
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(_SCHEMA_SQL)
+        # note: the size is checked here too, otherwise instances that save fewer entries than
+        #   '_EVICTION_CHECK_INTERVAL' (e.g. in short-lived processes) would never evict any.
+        self._evict()
+
+    def __enter__(self) -> 'DteXmlDataCache':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Remove the oldest entries if necessary, and close the connection to the database.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            if self._new_entries_count:
+                self._new_entries_count = 0
+                self._evict()
+            self._connection.close()
+            self._closed = True
+
+    def get(
+        self,
+        value: bytes,
+        clean: bool = True,
+        validate: bool = True,
+    ) -> Optional[data_models.DteDataL2]:
+        """
+        Return the cached DTE data of XML document ``value``, if any.
+
+        :param value: DTE XML document
+        :param clean: see :func:`parse.parse_dte_xml_bytes`
+        :param validate: see :func:`parse.parse_dte_xml_bytes`
+
+        """
+        key = _calc_key(value, clean=clean, validate=validate)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data, signature_value, signature_x509_cert_der FROM dte_xml_data '
+                'WHERE key = ?',
+                (key, ),
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+
+        return _deserialize_dte_data_l2(*row)
+
+    def set(
+        self,
+        value: bytes,
+        dte: data_models.DteDataL2,
+        clean: bool = True,
+        validate: bool = True,
+    ) -> None:
+        """
+        Save ``dte`` as the DTE data of XML document ``value``.
+
+        :param value: DTE XML document
+        :param dte: data parsed from ``value``
+        :param clean: see :func:`parse.parse_dte_xml_bytes`
+        :param validate: see :func:`parse.parse_dte_xml_bytes`
+        :raises TypeError:
+
+        """
+        if not isinstance(dte, data_models.DteDataL2):
+            raise TypeError("Inappropriate type of 'dte'.")
+
+        key = _calc_key(value, clean=clean, validate=validate)
+        row = _serialize_dte_data_l2(dte)
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO dte_xml_data '
+                '(key, data, signature_value, signature_x509_cert_der) VALUES (?, ?, ?, ?)',
+                (key, *row),
+            )
+            self._new_entries_count += 1
+            if self._new_entries_count >= _EVICTION_CHECK_INTERVAL:
+                self._new_entries_count = 0
+                self._evict()
+
+    def get_or_parse(
+        self,
+        value: bytes,
+        clean: bool = True,
+        validate: bool = True,
+    ) -> data_models.DteDataL2:
+        """
+        Return the cached DTE data of XML document ``value``, or parse and cache it.
+
+        Parsing errors are not cached.
+
+        :param value: DTE XML document
+        :param clean: see :func:`parse.parse_dte_xml_bytes`
+        :param validate: see :func:`parse.parse_dte_xml_bytes`
+        :raises: same as :func:`parse.parse_dte_xml_bytes`
+
+        """
+        dte = self.get(value, clean=clean, validate=validate)
+        if dte is None:
+            dte = parse.parse_dte_xml_bytes(value, clean=clean, validate=validate)
+            self.set(value, dte, clean=clean, validate=validate)
+        return dte
+
+    def clear(self) -> None:
+        """
+        Remove all the entries (of any version of this library).
+        """
+        with self._lock:
+            self._connection.execute('DELETE FROM dte_xml_data')
+            self._connection.execute('VACUUM')
+
+    def evict(self) -> None:
+        """
+        Remove the oldest entries if the size of the database exceeds the max size.
+
+        It is done automatically when the cache is opened and closed, and
+        every few new entries.
+
+        """
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        # note: the size of the database file does not decrease when entries are removed (unless
+        #   it is vacuumed, which is very expensive); the free pages are reused instead.
+        page_size, page_count, freelist_count = (
+            self._connection.execute(f'PRAGMA {pragma}').fetchone()[0]
+            for pragma in ('page_size', 'page_count', 'freelist_count')
+        )
+        used_size = (page_count - freelist_count) * page_size
+        if used_size <= self.max_size:
+            return
+
+        entries_count = self._connection.execute('SELECT COUNT(*) FROM dte_xml_data').fetchone()[0]
+        # Estimate how many entries must be removed, assuming they have similar sizes.
+        evict_count = max(1, int(
+            entries_count * (1 - self.max_size * _EVICTION_TARGET_RATIO / used_size)))
+        # note: the oldest entries are those with the lowest (implicit) 'rowid'. An entry that is
+        #   saved again gets a new 'rowid' because 'INSERT OR REPLACE' deletes the previous row.
+        cursor = self._connection.execute(
+            'DELETE FROM dte_xml_data WHERE rowid IN '
+            '(SELECT rowid FROM dte_xml_data ORDER BY rowid LIMIT ?)',
+            (evict_count, ),
+        )
+        self.stats.evictions += cursor.rowcount
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+def _calc_key(value: bytes, clean: bool, validate: bool) -> bytes:
+    if not isinstance(value, bytes):
+        raise TypeError("Inappropriate type of 'value'.")
+
+    # note: the version is included so that data parsed by another version is not used.
+    hasher = hashlib.sha256(f'cl-sii {cl_sii.__version__} {clean:d}{validate:d}\n'.encode())
+    hasher.update(value)
+    return hasher.digest()
+
+
+def _serialize_dte_data_l2(
+    dte: data_models.DteDataL2,
+) -> Tuple[str, Optional[bytes], Optional[bytes]]:
+    # note: the binary values are stored in BLOB columns, which is more compact than in the JSON.
+    data: List[Union[str, int, None]] = [
+        dte.emisor_rut.canonical,
+        dte.tipo_dte.value,
+        dte.folio,
+        dte.fecha_emision_date.isoformat(),
+        dte.receptor_rut.canonical,
+        dte.monto_total,
+        dte.emisor_razon_social,
+        dte.receptor_razon_social,
+        dte.fecha_vencimiento_date.isoformat() if dte.fecha_vencimiento_date else None,
+        dte.firma_documento_dt.isoformat() if dte.firma_documento_dt else None,
+        dte.emisor_giro,
+        dte.emisor_email,
+        dte.receptor_email,
+    ]
+    return (
+        json.dumps(data, ensure_ascii=False, separators=(',', ':')),
+        dte.signature_value,
+        dte.signature_x509_cert_der,
+    )
+
+
+def _deserialize_dte_data_l2(
+    data_json: str,
+    signature_value: Optional[bytes],
+    signature_x509_cert_der: Optional[bytes],
+) -> data_models.DteDataL2:
+    (
+        emisor_rut, tipo_dte, folio, fecha_emision, receptor_rut, monto_total,
+        emisor_razon_social, receptor_razon_social, fecha_vencimiento, firma_documento,
+        emisor_giro, emisor_email, receptor_email,
+    ) = json.loads(data_json)
+
+    return data_models.DteDataL2(
+        emisor_rut=Rut(emisor_rut),
+        tipo_dte=constants.TipoDteEnum(tipo_dte),
+        folio=folio,
+        fecha_emision_date=date.fromisoformat(fecha_emision),
+        receptor_rut=Rut(receptor_rut),
+        monto_total=monto_total,
+        emisor_razon_social=emisor_razon_social,
+        receptor_razon_social=receptor_razon_social,
+        fecha_vencimiento_date=(
+            date.fromisoformat(fecha_vencimiento) if fecha_vencimiento is not None else None),
+        firma_documento_dt=(
+            datetime.fromisoformat(firma_documento).astimezone(
+                data_models.DteDataL2.DATETIME_FIELDS_TZ)
+            if firma_documento is not None else None),
+        signature_value=bytes(signature_value) if signature_value is not None else None,
+        signature_x509_cert_der=(
+            bytes(signature_x509_cert_der) if signature_x509_cert_der is not None else None),
+        emisor_giro=emisor_giro,
+        emisor_email=emisor_email,
+        receptor_email=receptor_email,
+    )
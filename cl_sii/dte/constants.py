@@ -104,6 +104,26 @@ class TipoDteEnum(enum.IntEnum):
     """Nota electrónica de crédito."""
     # aka 'Nota de Crédito Electrónica'
 
+    LIQUIDACION_FACTURA_ELECTRONICA = 43
+    """Liquidación-factura electrónica."""
+    # Source: XML type 'LIQType' (enum) in official schema 'SiiTypes_v10.xsd'.
+    #   https://github.com/fyndata/lib-cl-sii-python/blob/f57a326/cl_sii/data/ref/factura_electronica/schemas-xml/SiiTypes_v10.xsd#L700-L707
+    # Its data is in XML element 'DTEDefType/Liquidacion' instead of 'DTEDefType/Documento'.
+
+    FACTURA_EXPORTACION_ELECTRONICA = 110
+    """Factura electrónica de exportación."""
+    # Source: XML type 'EXPType' (enum) in official schema 'SiiTypes_v10.xsd'.
+    #   https://github.com/fyndata/lib-cl-sii-python/blob/f57a326/cl_sii/data/ref/factura_electronica/schemas-xml/SiiTypes_v10.xsd#L708-L717
+    # Its data is in XML element 'DTEDefType/Exportaciones' instead of 'DTEDefType/Documento'.
+
+    NOTA_DEBITO_EXPORTACION_ELECTRONICA = 111
+    """Nota electrónica de débito de exportación."""
+    # Source: same as for 'FACTURA_EXPORTACION_ELECTRONICA'.
+
+    NOTA_CREDITO_EXPORTACION_ELECTRONICA = 112
+    """Nota electrónica de crédito de exportación."""
+    # Source: same as for 'FACTURA_EXPORTACION_ELECTRONICA'.
+
     @property
     def is_factura(self) -> bool:
         if self is TipoDteEnum.FACTURA_ELECTRONICA:
@@ -93,11 +93,13 @@ def validate_non_empty_bytes(value: bytes) -> None:
         raise ValueError("Bytes value length is 0.")
 
 
-def validate_correct_tz(value: datetime, tz: tz_utils.PytzTimezone) -> None:
+def validate_correct_tz(value: datetime, tz: tz_utils.Timezone) -> None:
     if not tz_utils.dt_is_aware(value):
         raise ValueError("Value must be a timezone-aware datetime.", value)
-    if value.tzinfo.zone != tz.zone:  # type: ignore
-        raise ValueError(f"Timezone of datetime value must be '{tz.zone!s}'.", value)
+    # note: the timezones are compared by name, so that datetimes of any backend are accepted.
+    tz_name = tz_utils.get_tz_name(tz)
+    if tz_utils.get_tz_name(value.tzinfo) != tz_name:
+        raise ValueError(f"Timezone of datetime value must be '{tz_name!s}'.", value)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -363,7 +365,8 @@ class DteDataL2(DteDataL1):
     DTE's digital signature's DER-encoded X.509 cert.
 
     .. seealso::
-        Functions :func:`cl_sii.libs.crypto_utils.load_der_x509_cert`
+        Functions :func:`cl_sii.libs.crypto_utils.load_der_x509_cert`,
+        :func:`cl_sii.libs.crypto_utils.load_der_x509_cert_cached`
         and :func:`cl_sii.libs.crypto_utils.x509_cert_der_to_pem`.
     """
 
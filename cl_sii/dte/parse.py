@@ -19,11 +19,14 @@ True
 """
 import io
 import logging
-import os
 from datetime import date, datetime
-from typing import Optional, Tuple
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple, Union
+
+import lxml.etree
 
 from cl_sii.libs import encoding_utils
+from cl_sii.libs import instrumentation_utils
 from cl_sii.libs import tz_utils
 from cl_sii.libs import xml_utils
 from cl_sii.libs.xml_utils import XmlElement, XmlElementTree
@@ -53,17 +56,52 @@ Mapping from XML namespace prefix to full name, for DTE processing.
 """
 
 
-_DTE_XML_SCHEMA_PATH = os.path.abspath(
-    os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        'data/ref/factura_electronica/schemas-xml/EnvioDTE_v10.xsd',
-    )
-)
-DTE_XML_SCHEMA_OBJ = xml_utils.read_xml_schema(_DTE_XML_SCHEMA_PATH)
+_DTE_XML_DTE_EM_TAG = '{%s}DTE' % DTE_XMLNS
+_DTE_XML_DOCUMENTO_EM_TAG = '{%s}Documento' % DTE_XMLNS
+_DTE_XML_LIQUIDACION_EM_TAG = '{%s}Liquidacion' % DTE_XMLNS
+_DTE_XML_EXPORTACIONES_EM_TAG = '{%s}Exportaciones' % DTE_XMLNS
+_DTE_XML_DOCUMENTO_EM_TAGS = frozenset([
+    _DTE_XML_DOCUMENTO_EM_TAG,
+    _DTE_XML_LIQUIDACION_EM_TAG,
+    _DTE_XML_EXPORTACIONES_EM_TAG,
+])
+"""
+Tags of the (mutually exclusive) XML elements that may contain the data of a DTE.
+
+Ref: elements of 'DTEDefType' in 'DTE_v10.xsd'.
+
+* cl_sii/data/ref/factura_electronica/schemas-xml/DTE_v10.xsd#L29 (f57a326)
+* cl_sii/data/ref/factura_electronica/schemas-xml/DTE_v10.xsd#L2145 (f57a326)
+* cl_sii/data/ref/factura_electronica/schemas-xml/DTE_v10.xsd#L3351 (f57a326)
+"""
+
+_XML_DSIG_SIGNATURE_EM_TAG = '{%s}Signature' % xml_utils.XML_DSIG_NS_MAP['ds']
+
+_DTE_XML_TPO_MONEDA_CLP = 'PESO CL'
+"""
+Value of 'TpoMoneda' ("Tipo de Moneda") for the chilean peso (CLP).
+
+Ref: 'TipMonType' in 'SiiTypes_v10.xsd'.
+"""
+
+DTE_XML_SCHEMA_OBJ = xml_utils.SII_XML_SCHEMA_REGISTRY.get('EnvioDTE_v10.xsd')
 """
 XML schema obj for DTE XML document validation.
 
-It is read from a file at import time to avoid unnecessary reads afterwards.
+It is compiled at import time (see :data:`xml_utils.SII_XML_SCHEMA_REGISTRY`)
+to avoid unnecessary compilations afterwards.
+
+.. note:: It is compiled from the "EnvioDTE" XML schema, which also
+    declares the element ``EnvioDTE``. For XML documents whose root element
+    is ``DTE`` see :data:`DTE_XML_DTE_SCHEMA_OBJ`.
+"""
+
+DTE_XML_DTE_SCHEMA_OBJ = xml_utils.SII_XML_SCHEMA_REGISTRY.get('DTE_v10.xsd')
+"""
+XML schema obj for validation of DTE XML documents whose root element is ``DTE``.
+
+It is compiled from the "DTE" XML schema only (not "EnvioDTE"), at import
+time (see :data:`xml_utils.SII_XML_SCHEMA_REGISTRY`).
 """
 
 
@@ -71,6 +109,7 @@ It is read from a file at import time to avoid unnecessary reads afterwards.
 # main functions
 ###############################################################################
 
+@instrumentation_utils.instrument_stage('dte.parse.clean_dte_xml')
 def clean_dte_xml(
     xml_doc: XmlElement,
     set_missing_xmlns: bool = False,
@@ -103,29 +142,129 @@ def clean_dte_xml(
     return xml_doc, modified
 
 
-def validate_dte_xml(xml_doc: XmlElement) -> None:
+@instrumentation_utils.instrument_stage('dte.parse.validate_dte_xml')
+def validate_dte_xml(xml_doc: Union[XmlElement, XmlElementTree]) -> None:
     """
     Validate ``xml_doc`` against DTE's XML schema.
 
+    The XML schema is selected according to the tag of the root element of
+    ``xml_doc``: :data:`DTE_XML_DTE_SCHEMA_OBJ` for a ``DTE`` element, and
+    :data:`DTE_XML_SCHEMA_OBJ` for any other (e.g. ``EnvioDTE``).
+
+    :param xml_doc: XML document, or its element tree
     :raises xml_utils.XmlSchemaDocValidationError:
 
     """
+    root_em = xml_doc.getroot() if isinstance(xml_doc, XmlElementTree) else xml_doc
+
+    if root_em.tag == _DTE_XML_DTE_EM_TAG:
+        xml_schema = DTE_XML_DTE_SCHEMA_OBJ
+    else:
+        xml_schema = DTE_XML_SCHEMA_OBJ
+
     # TODO: add better and more precise exception handling.
-    xml_utils.validate_xml_doc(DTE_XML_SCHEMA_OBJ, xml_doc)
+    xml_utils.validate_xml_doc(xml_schema, root_em)
+
+
+@instrumentation_utils.instrument_stage('dte.parse.parse_dte_xml_data_l0')
+def parse_dte_xml_data_l0(xml_doc: XmlElement) -> data_models.DteDataL0:
+    """
+    Parse data level 0 (the natural key) from a DTE XML doc.
+
+    Only the XML elements required for :class:`data_models.DteDataL0` are
+    located, parsed and validated, thus it is faster than
+    :func:`parse_dte_xml`.
+
+    .. seealso:: :func:`parse_dte_xml`
+
+    :raises ValueError:
+    :raises TypeError:
+
+    """
+    return data_models.DteDataL0(**_parse_dte_xml_data_values(xml_doc, data_level=0))
+
+
+@instrumentation_utils.instrument_stage('dte.parse.parse_dte_xml_data_l1')
+def parse_dte_xml_data_l1(xml_doc: XmlElement) -> data_models.DteDataL1:
+    """
+    Parse data level 1 (the natural key plus dates, RUTs and amounts) from a DTE XML doc.
+
+    Only the XML elements required for :class:`data_models.DteDataL1` are
+    located, parsed and validated, thus it is faster than
+    :func:`parse_dte_xml`. In particular, the signature and the certificate
+    are not base64-decoded.
+
+    .. seealso:: :func:`parse_dte_xml`
+
+    :raises ValueError:
+    :raises TypeError:
+
+    """
+    return data_models.DteDataL1(**_parse_dte_xml_data_values(xml_doc, data_level=1))
 
 
 # TODO: rename to 'parse_dte_xml_data'
+@instrumentation_utils.instrument_stage('dte.parse.parse_dte_xml')
 def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     """
     Parse data from a DTE XML doc.
 
+    The DTE data may be in any of the top level XML elements ``Documento``,
+    ``Liquidacion`` or ``Exportaciones``.
+
     .. warning::
         It is assumed that ``xml_doc`` is an
         ``{http://www.sii.cl/SiiDte}/DTE``  XML element.
 
     :raises ValueError:
     :raises TypeError:
-    :raises NotImplementedError:
+
+    """
+    return data_models.DteDataL2(**_parse_dte_xml_data_values(xml_doc, data_level=2))
+
+
+def parse_dte_xml_bytes(
+    value: bytes,
+    clean: bool = True,
+    validate: bool = True,
+) -> data_models.DteDataL2:
+    """
+    Parse data from a DTE XML document (bytes), after cleaning and validating it.
+
+    It is a shortcut for :func:`xml_utils.parse_untrusted_xml`,
+    :func:`clean_dte_xml`, :func:`validate_dte_xml` and :func:`parse_dte_xml`.
+
+    :param value: DTE XML document
+    :param clean: whether to clean the XML document (setting the missing
+        namespace and removing the "DocPersonalizado")
+    :param validate: whether to validate the XML document against the DTE
+        XML schema
+    :raises TypeError:
+    :raises xml_utils.BaseXmlParsingError:
+    :raises xml_utils.XmlSchemaDocValidationError:
+    :raises ValueError:
+
+    """
+    xml_doc = xml_utils.parse_untrusted_xml(value)
+    if clean:
+        xml_doc, _ = clean_dte_xml(xml_doc, set_missing_xmlns=True, remove_doc_personalizado=True)
+    if validate:
+        validate_dte_xml(xml_doc)
+    return parse_dte_xml(xml_doc)
+
+
+def _parse_dte_xml_data_values(xml_doc: XmlElement, data_level: int) -> Dict[str, Any]:
+    """
+    Parse the values of the fields of the DTE data model of level ``data_level``.
+
+    Only the XML elements that are necessary for the fields of that level
+    are located and parsed, in order to not waste time on the others.
+
+    :param data_level: 0, 1 or 2, for :class:`data_models.DteDataL0`,
+        :class:`data_models.DteDataL1` and :class:`data_models.DteDataL2`,
+        respectively
+    :raises ValueError:
+    :raises TypeError:
 
     """
     # TODO: change response type to a dataclass like 'DteXmlData'.
@@ -137,30 +276,31 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
         raise TypeError("'xml_doc' must be an 'XmlElement'.")
 
     xml_em = xml_doc
-
-    ###########################################################################
-    # XML elements finding
-    ###########################################################################
+    if isinstance(xml_em, XmlElementTree):
+        xml_em = xml_em.getroot()
 
     # Schema requires one, and only one, of these:
-    # a) 'Documento'
-    # b) 'Liquidacion'
-    # c) 'Exportaciones'
-    documento_em = xml_em.find(
-        'sii-dte:Documento',  # "Informacion Tributaria del DTE"
-        namespaces=DTE_XMLNS_MAP)
-    liquidacion_em = xml_em.find(
-        'sii-dte:Liquidacion',  # "Informacion Tributaria de Liquidaciones"
-        namespaces=DTE_XMLNS_MAP)
-    exportaciones_em = xml_em.find(
-        'sii-dte:Exportaciones',  # "Informacion Tributaria de exportaciones"
-        namespaces=DTE_XMLNS_MAP)
-    signature_em = xml_em.find(
-        'ds:Signature',  # "Firma Digital sobre Documento"
-        namespaces=xml_utils.XML_DSIG_NS_MAP)
-
-    if liquidacion_em is not None or exportaciones_em is not None:
-        raise NotImplementedError("XML element 'Documento' is the only one supported.")
+    # a) 'Documento': "Informacion Tributaria del DTE"
+    # b) 'Liquidacion': "Informacion Tributaria de Liquidaciones"
+    # c) 'Exportaciones': "Informacion Tributaria de exportaciones"
+    # Their subtrees share the structure of every element that is parsed here (except for the type
+    #   of 'Totales.MntTotal', see below) so all of them are handled by the same code.
+    # note: the children of the root element are traversed only once, instead of once per 'find'.
+    documento_em = None
+    documento_em_tag = None
+    signature_em = None
+    for child_em in xml_em.iterchildren(tag=lxml.etree.Element):
+        child_em_tag = child_em.tag
+        if child_em_tag in _DTE_XML_DOCUMENTO_EM_TAGS:
+            if documento_em is not None:
+                raise ValueError(
+                    "Only one top level XML element 'Documento', 'Liquidacion' or "
+                    "'Exportaciones' is allowed.")
+            documento_em = child_em
+            documento_em_tag = child_em_tag
+        elif child_em_tag == _XML_DSIG_SIGNATURE_EM_TAG:
+            # "Firma Digital sobre Documento"
+            signature_em = child_em
 
     if documento_em is None:
         raise ValueError("Top level XML element 'Document' is required.")
@@ -169,6 +309,10 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     #   e.g. 'MiPE76354771-13419', 'MiPE76399752-6048'
     # documento_em_id = documento_em.attrib['ID']
 
+    ###########################################################################
+    # data level 0
+    ###########################################################################
+
     # 'Documento'
     # Excluded elements (optional according to the XML schema but the SII may require some of these
     #   depending on 'tipo_dte' and other criteria):
@@ -185,13 +329,6 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     encabezado_em = documento_em.find(
         'sii-dte:Encabezado',  # "Identificacion y Totales del Documento"
         namespaces=DTE_XMLNS_MAP)
-    # note: excluded because currently it is not useful.
-    # ted_em = documento_em.find(
-    #     'sii-dte:TED',  # "Timbre Electronico de DTE"
-    #     namespaces=DTE_XMLNS_MAP)
-    tmst_firma_em = documento_em.find(
-        'sii-dte:TmstFirma',  # "Fecha y Hora en que se Firmo Digitalmente el Documento"
-        namespaces=DTE_XMLNS_MAP)
 
     # 'Documento.Encabezado'
     # Excluded elements (optional according to the XML schema but the SII may require some of these
@@ -210,12 +347,6 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     emisor_em = encabezado_em.find(
         'sii-dte:Emisor',  # "Datos del Emisor"
         namespaces=DTE_XMLNS_MAP)
-    receptor_em = encabezado_em.find(
-        'sii-dte:Receptor',  # "Datos del Receptor"
-        namespaces=DTE_XMLNS_MAP)
-    totales_em = encabezado_em.find(
-        'sii-dte:Totales',  # "Montos Totales del DTE"
-        namespaces=DTE_XMLNS_MAP)
 
     # 'Documento.Encabezado.IdDoc'
     # Excluded elements (optional according to the XML schema but the SII may require some of these
@@ -273,13 +404,6 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     folio_em = id_doc_em.find(
         'sii-dte:Folio',  # "Folio del Documento Electronico"
         namespaces=DTE_XMLNS_MAP)
-    fecha_emision_em = id_doc_em.find(
-        'sii-dte:FchEmis',  # "Fecha Emision Contable del DTE"
-        namespaces=DTE_XMLNS_MAP)
-    # (optional):
-    fecha_vencimiento_em = id_doc_em.find(
-        'sii-dte:FchVenc',  # "Fecha de Vencimiento del Pago"
-        namespaces=DTE_XMLNS_MAP)
 
     # 'Documento.Encabezado.Emisor'
     # Excluded elements (optional according to the XML schema but the SII may require some of these
@@ -308,15 +432,31 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     emisor_rut_em = emisor_em.find(
         'sii-dte:RUTEmisor',  # "RUT del Emisor del DTE"
         namespaces=DTE_XMLNS_MAP)
-    emisor_razon_social_em = emisor_em.find(
-        'sii-dte:RznSoc',  # "Nombre o Razon Social del Emisor"
+
+    values: Dict[str, Any] = dict(
+        emisor_rut=Rut(_text_strip_or_raise(emisor_rut_em)),
+        tipo_dte=constants.TipoDteEnum(int(_text_strip_or_raise(tipo_dte_em))),
+        folio=int(_text_strip_or_raise(folio_em)),
+    )
+    if data_level < 1:
+        return values
+
+    ###########################################################################
+    # data level 1
+    ###########################################################################
+
+    # 'Documento.Encabezado'
+    receptor_em = encabezado_em.find(
+        'sii-dte:Receptor',  # "Datos del Receptor"
         namespaces=DTE_XMLNS_MAP)
-    emisor_giro_em = emisor_em.find(
-        'sii-dte:GiroEmis',  # "Giro Comercial del Emisor Relevante para el DTE"
+    totales_em = encabezado_em.find(
+        'sii-dte:Totales',  # "Montos Totales del DTE"
         namespaces=DTE_XMLNS_MAP)
-    # (optional):
-    emisor_email_em = emisor_em.find(
-        'sii-dte:CorreoEmisor',  # "Correo Elect. de contacto en empresa del receptor" (wrong!)
+
+    # 'Documento.Encabezado.IdDoc'
+    # (required):
+    fecha_emision_em = id_doc_em.find(
+        'sii-dte:FchEmis',  # "Fecha Emision Contable del DTE"
         namespaces=DTE_XMLNS_MAP)
 
     # 'Documento.Encabezado.Receptor'
@@ -330,8 +470,6 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     #     "Giro Comercial del Receptor"
     #   - 'Contacto':
     #     "Telefono o E-mail de Contacto del Receptor"
-    #   - 'CorreoRecep':
-    #     "Correo Elect. de contacto en empresa del receptor"
     #   - 'DirRecep':
     #     "Direccion en la Cual se Envian los Productos o se Prestan los Servicios"
     #   - 'CmnaRecep':
@@ -348,13 +486,6 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     receptor_rut_em = receptor_em.find(
         'sii-dte:RUTRecep',  # "RUT del Receptor del DTE"
         namespaces=DTE_XMLNS_MAP)
-    receptor_razon_social_em = receptor_em.find(
-        'sii-dte:RznSocRecep',  # "Nombre o Razon Social del Receptor"
-        namespaces=DTE_XMLNS_MAP)
-    # (optional):
-    receptor_email_em = emisor_em.find(
-        'sii-dte:CorreoRecep',  # "Correo Elect. de contacto en empresa del receptor"
-        namespaces=DTE_XMLNS_MAP)
 
     # 'Documento.Encabezado.Totales'
     # Excluded elements (optional according to the XML schema but the SII may require some of these
@@ -397,6 +528,62 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
         'sii-dte:MntTotal',  # "Monto Total del DTE"
         namespaces=DTE_XMLNS_MAP)
 
+    if documento_em_tag == _DTE_XML_EXPORTACIONES_EM_TAG:
+        monto_total_value = _parse_exportaciones_monto_total(
+            encabezado_em, totales_em, monto_total_em)
+    else:
+        monto_total_value = int(_text_strip_or_raise(monto_total_em))
+
+    values.update(
+        fecha_emision_date=date.fromisoformat(_text_strip_or_raise(fecha_emision_em)),
+        receptor_rut=Rut(_text_strip_or_raise(receptor_rut_em)),
+        monto_total=monto_total_value,
+    )
+    if data_level < 2:
+        return values
+
+    ###########################################################################
+    # data level 2
+    ###########################################################################
+
+    # 'Documento'
+    # note: excluded because currently it is not useful.
+    # ted_em = documento_em.find(
+    #     'sii-dte:TED',  # "Timbre Electronico de DTE"
+    #     namespaces=DTE_XMLNS_MAP)
+    tmst_firma_em = documento_em.find(
+        'sii-dte:TmstFirma',  # "Fecha y Hora en que se Firmo Digitalmente el Documento"
+        namespaces=DTE_XMLNS_MAP)
+
+    # 'Documento.Encabezado.IdDoc'
+    # (optional):
+    fecha_vencimiento_em = id_doc_em.find(
+        'sii-dte:FchVenc',  # "Fecha de Vencimiento del Pago"
+        namespaces=DTE_XMLNS_MAP)
+
+    # 'Documento.Encabezado.Emisor'
+    # (required):
+    emisor_razon_social_em = emisor_em.find(
+        'sii-dte:RznSoc',  # "Nombre o Razon Social del Emisor"
+        namespaces=DTE_XMLNS_MAP)
+    emisor_giro_em = emisor_em.find(
+        'sii-dte:GiroEmis',  # "Giro Comercial del Emisor Relevante para el DTE"
+        namespaces=DTE_XMLNS_MAP)
+    # (optional):
+    emisor_email_em = emisor_em.find(
+        'sii-dte:CorreoEmisor',  # "Correo Elect. de contacto en empresa del receptor" (wrong!)
+        namespaces=DTE_XMLNS_MAP)
+
+    # 'Documento.Encabezado.Receptor'
+    # (required):
+    receptor_razon_social_em = receptor_em.find(
+        'sii-dte:RznSocRecep',  # "Nombre o Razon Social del Receptor"
+        namespaces=DTE_XMLNS_MAP)
+    # (optional):
+    receptor_email_em = receptor_em.find(
+        'sii-dte:CorreoRecep',  # "Correo Elect. de contacto en empresa del receptor"
+        namespaces=DTE_XMLNS_MAP)
+
     # 'Signature'
     # signature_signed_info_em = signature_em.find(
     #     'ds:SignedInfo',  # "Descripcion de la Informacion Firmada y del Metodo de Firma"
@@ -426,33 +613,22 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
         'ds:X509Certificate',  # "Certificado Publico"
         namespaces=xml_utils.XML_DSIG_NS_MAP)
 
-    ###########################################################################
-    # values parsing
-    ###########################################################################
-
-    tipo_dte_value = constants.TipoDteEnum(int(_text_strip_or_raise(tipo_dte_em)))
-    folio_value = int(_text_strip_or_raise(folio_em))
-    fecha_emision_value = date.fromisoformat(_text_strip_or_raise(fecha_emision_em))
     fecha_vencimiento_value = None
     if fecha_vencimiento_em is not None:
         fecha_vencimiento_value = date.fromisoformat(
             _text_strip_or_raise(fecha_vencimiento_em))
 
-    emisor_rut_value = Rut(_text_strip_or_raise(emisor_rut_em))
     emisor_razon_social_value = _text_strip_or_raise(emisor_razon_social_em)
     emisor_giro_value = _text_strip_or_raise(emisor_giro_em)
     emisor_email_value = None
     if emisor_email_em is not None:
         emisor_email_value = _text_strip_or_none(emisor_email_em)
 
-    receptor_rut_value = Rut(_text_strip_or_raise(receptor_rut_em))
     receptor_razon_social_value = _text_strip_or_raise(receptor_razon_social_em)
     receptor_email_value = None
     if receptor_email_em is not None:
         receptor_email_value = _text_strip_or_none(receptor_email_em)
 
-    monto_total_value = int(_text_strip_or_raise(monto_total_em))
-
     tmst_firma_value = tz_utils.convert_naive_dt_to_tz_aware(
         dt=datetime.fromisoformat(_text_strip_or_raise(tmst_firma_em)),
         tz=data_models.DteDataL2.DATETIME_FIELDS_TZ)
@@ -462,13 +638,7 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
     signature_key_info_x509_cert_der = encoding_utils.decode_base64_strict(
         _text_strip_or_raise(signature_key_info_x509_cert_em))
 
-    return data_models.DteDataL2(
-        emisor_rut=emisor_rut_value,
-        tipo_dte=tipo_dte_value,
-        folio=folio_value,
-        fecha_emision_date=fecha_emision_value,
-        receptor_rut=receptor_rut_value,
-        monto_total=monto_total_value,
+    values.update(
         emisor_razon_social=emisor_razon_social_value,
         receptor_razon_social=receptor_razon_social_value,
         fecha_vencimiento_date=fecha_vencimiento_value,
@@ -479,6 +649,71 @@ def parse_dte_xml(xml_doc: XmlElement) -> data_models.DteDataL2:
         emisor_email=emisor_email_value,
         receptor_email=receptor_email_value,
     )
+    return values
+
+
+def _parse_exportaciones_monto_total(
+    encabezado_em: XmlElement,
+    totales_em: XmlElement,
+    monto_total_em: XmlElement,
+) -> int:
+    """
+    Return the total amount, in CLP, of an 'Exportaciones' DTE.
+
+    In 'Exportaciones', 'Totales.MntTotal' is a decimal amount in the
+    currency 'Totales.TpoMoneda', which usually is a foreign one. In that
+    case the amount in CLP is taken from 'OtraMoneda.MntTotOtrMnda', if the
+    currency of 'OtraMoneda' is CLP.
+
+    .. note:: Documents without a total amount in CLP, or whose total amount
+        in CLP has a fractional part, are not supported.
+
+    :raises ValueError:
+
+    """
+    tpo_moneda_em = totales_em.find(
+        'sii-dte:TpoMoneda',  # "Tipo de Moneda en que se registra la transaccion"
+        namespaces=DTE_XMLNS_MAP)
+    if _text_strip_or_raise(tpo_moneda_em) == _DTE_XML_TPO_MONEDA_CLP:
+        return _decimal_str_to_int_strict(_text_strip_or_raise(monto_total_em))
+
+    # 'Documento.Encabezado.OtraMoneda'
+    otra_moneda_em = encabezado_em.find(
+        'sii-dte:OtraMoneda',  # "Otra Moneda"
+        namespaces=DTE_XMLNS_MAP)
+    if otra_moneda_em is not None:
+        otra_moneda_tpo_moneda_em = otra_moneda_em.find(
+            'sii-dte:TpoMoneda',  # "Tipo Otra moneda"
+            namespaces=DTE_XMLNS_MAP)
+        if _text_strip_or_raise(otra_moneda_tpo_moneda_em) == _DTE_XML_TPO_MONEDA_CLP:
+            monto_total_otra_moneda_em = otra_moneda_em.find(
+                'sii-dte:MntTotOtrMnda',  # "Monto Total Otra Moneda"
+                namespaces=DTE_XMLNS_MAP)
+            return _decimal_str_to_int_strict(_text_strip_or_raise(monto_total_otra_moneda_em))
+
+    raise ValueError(
+        "DTE 'Exportaciones' without a total amount in CLP ('PESO CL') is not supported.")
+
+
+def _decimal_str_to_int_strict(value: str) -> int:
+    """
+    Convert a decimal number string to an int, only if it has no fractional part.
+
+    >>> _decimal_str_to_int_strict('2996301.0000')
+    2996301
+
+    :raises ValueError:
+
+    """
+    try:
+        decimal_value = Decimal(value)
+    except InvalidOperation as exc:
+        raise ValueError("Value is not a valid decimal number.", value) from exc
+
+    if not decimal_value.is_finite() or decimal_value != decimal_value.to_integral_value():
+        raise ValueError("Decimal values with a fractional part are not supported.", value)
+
+    return int(decimal_value)
 
 
 def _text_strip_or_none(xml_em: XmlElement) -> Optional[str]:
@@ -0,0 +1,665 @@
+"""
+Helpers for rendering DTE data to representations such as XML documents.
+
+It is the counterpart of :mod:`cl_sii.dte.parse`: XML documents rendered here
+are valid according to the DTE XML schema and parsing them with
+:func:`cl_sii.dte.parse.parse_dte_xml` returns the original data.
+
+The XML documents are rendered from a template that is compiled once, at
+import time, instead of building an XML tree element by element, which is
+a lot slower.
+
+
+Usage:
+
+>>> from cl_sii.dte import render
+
+>>> xml_doc_bytes = render.render_dte_xml(dte_struct)
+
+>>> with open('/dir/my_file.xml', mode='wb') as f:
+...     render.write_dte_xml(dte_struct, f)
+
+>>> with open('/dir/my_envio_dte.xml', mode='wb') as f:
+...     render.write_envio_dte_xml(
+...         dte_structs, f, rut_envia=rut, rut_receptor=rut_sii,
+...         fecha_resolucion=date(2014, 8, 22), numero_resolucion=80, firma_envio_dt=dt)
+1000
+
+>>> render.write_dte_xml_many(dte_structs, '/dir/many_dte/')
+1000
+
+"""
+import base64
+import collections
+import functools
+import hashlib
+import os
+import pathlib
+from datetime import date, datetime
+from typing import IO, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+
+from cl_sii.libs import crypto_utils
+from cl_sii.libs import tz_utils
+from cl_sii.rut import Rut
+from . import constants
+from . import data_models
+from .parse import DTE_XMLNS
+
+
+DEFAULT_ENCODING = 'ISO-8859-1'
+"""
+Default encoding of rendered DTE XML documents.
+
+It is the one used by the SII and almost every "emisor" of DTE.
+"""
+
+_XML_DSIG_XMLNS = 'http://www.w3.org/2000/09/xmldsig#'
+
+# note: the data of DTEs of these kinds is not in XML element 'Documento'.
+_TIPO_DTE_NOT_DOCUMENTO = frozenset([
+    constants.TipoDteEnum.LIQUIDACION_FACTURA_ELECTRONICA,
+    constants.TipoDteEnum.FACTURA_EXPORTACION_ELECTRONICA,
+    constants.TipoDteEnum.NOTA_DEBITO_EXPORTACION_ELECTRONICA,
+    constants.TipoDteEnum.NOTA_CREDITO_EXPORTACION_ELECTRONICA,
+])
+
+# Placeholder values for XML elements that are required by the DTE XML schema but whose data is
+#   not part of 'DteDataL2'. They are valid according to the schema but meaningless.
+_PLACEHOLDER_EMISOR_ACTECO = (999999, )
+_PLACEHOLDER_DETALLE_ITEM_NAME = 'Item'
+_PLACEHOLDER_CAF_IDK = 100
+_PLACEHOLDER_BASE64_SIGNATURE = base64.standard_b64encode(bytes(64)).decode('ascii')
+_PLACEHOLDER_BASE64_DIGEST = base64.standard_b64encode(bytes(20)).decode('ascii')
+
+ENVIO_DTE_MAX_DTE_COUNT = 2000
+"""
+Max number of DTEs in an "EnvioDTE" XML document.
+
+Ref: 'EnvioDTE_v10.xsd' (``maxOccurs`` of XML element ``DTE``).
+"""
+
+_TED_TEXT_MAX_LENGTH = 40
+"""Max length of XML elements 'RSR', 'IT1' and 'RS' of the TED."""
+
+# warning: every template must be in the **canonical form** of XML (C14N), in one line and
+#   without whitespace between elements, because the digest of the 'Documento' is computed from
+#   the rendered text as is. See https://www.w3.org/TR/2001/REC-xml-c14n-20010315
+_DOCUMENTO_TEMPLATE = (
+    '<Documento{xmlns_attr} ID="{documento_id}">'
+    '<Encabezado>'
+    '<IdDoc>'
+    '<TipoDTE>{tipo_dte}</TipoDTE>'
+    '<Folio>{folio}</Folio>'
+    '<FchEmis>{fecha_emision}</FchEmis>'
+    '{fecha_vencimiento_em}'
+    '</IdDoc>'
+    '<Emisor>'
+    '<RUTEmisor>{emisor_rut}</RUTEmisor>'
+    '<RznSoc>{emisor_razon_social}</RznSoc>'
+    '<GiroEmis>{emisor_giro}</GiroEmis>'
+    '{emisor_email_em}'
+    '{emisor_acteco_ems}'
+    '</Emisor>'
+    '<Receptor>'
+    '<RUTRecep>{receptor_rut}</RUTRecep>'
+    '<RznSocRecep>{receptor_razon_social}</RznSocRecep>'
+    '{receptor_email_em}'
+    '</Receptor>'
+    '<Totales>'
+    '<MntTotal>{monto_total}</MntTotal>'
+    '</Totales>'
+    '</Encabezado>'
+    '{detalle_ems}'
+    '<TED version="1.0">'
+    '<DD>'
+    '<RE>{emisor_rut}</RE>'
+    '<TD>{tipo_dte}</TD>'
+    '<F>{folio}</F>'
+    '<FE>{fecha_emision}</FE>'
+    '<RR>{receptor_rut}</RR>'
+    '<RSR>{ted_receptor_razon_social}</RSR>'
+    '<MNT>{monto_total}</MNT>'
+    '<IT1>{ted_item_1_name}</IT1>'
+    '<CAF version="1.0">'
+    '<DA>'
+    '<RE>{emisor_rut}</RE>'
+    '<RS>{ted_emisor_razon_social}</RS>'
+    '<TD>{tipo_dte}</TD>'
+    '<RNG><D>{folio}</D><H>{folio}</H></RNG>'
+    '<FA>{fecha_emision}</FA>'
+    '<RSAPK><M>{placeholder_signature}</M><E>Aw==</E></RSAPK>'
+    '<IDK>{placeholder_caf_idk}</IDK>'
+    '</DA>'
+    '<FRMA algoritmo="SHA1withRSA">{placeholder_signature}</FRMA>'
+    '</CAF>'
+    '<TSTED>{firma_documento_dt}</TSTED>'
+    '</DD>'
+    '<FRMT algoritmo="SHA1withRSA">{placeholder_signature}</FRMT>'
+    '</TED>'
+    '<TmstFirma>{firma_documento_dt}</TmstFirma>'
+    '</Documento>'
+)
+
+_DETALLE_TEMPLATE = (
+    '<Detalle>'
+    '<NroLinDet>{line_number}</NroLinDet>'
+    '<NmbItem>{item_name}</NmbItem>'
+    '<MontoItem>{item_monto}</MontoItem>'
+    '</Detalle>'
+)
+
+_DTE_TEMPLATE = (
+    '<DTE xmlns="{dte_xmlns}" version="1.0">'
+    '{documento_em}'
+    '<Signature xmlns="{xml_dsig_xmlns}">'
+    '<SignedInfo>'
+    '<CanonicalizationMethod Algorithm="http://www.w3.org/TR/2001/REC-xml-c14n-20010315">'
+    '</CanonicalizationMethod>'
+    '<SignatureMethod Algorithm="http://www.w3.org/2000/09/xmldsig#rsa-sha1"></SignatureMethod>'
+    '<Reference URI="#{documento_id}">'
+    '<Transforms>'
+    '<Transform Algorithm="http://www.w3.org/TR/2001/REC-xml-c14n-20010315"></Transform>'
+    '</Transforms>'
+    '<DigestMethod Algorithm="http://www.w3.org/2000/09/xmldsig#sha1"></DigestMethod>'
+    '<DigestValue>{documento_digest_value}</DigestValue>'
+    '</Reference>'
+    '</SignedInfo>'
+    '<SignatureValue>{signature_value}</SignatureValue>'
+    '<KeyInfo>'
+    '<KeyValue>'
+    '<RSAKeyValue>'
+    '<Modulus>{rsa_key_modulus}</Modulus>'
+    '<Exponent>{rsa_key_exponent}</Exponent>'
+    '</RSAKeyValue>'
+    '</KeyValue>'
+    '<X509Data>'
+    '<X509Certificate>{signature_x509_cert}</X509Certificate>'
+    '</X509Data>'
+    '</KeyInfo>'
+    '</Signature>'
+    '</DTE>'
+)
+
+# note: unlike the 'DTE' templates, the digest of the 'SetDTE' is not computed (it would require
+#   the whole element, which is written incrementally), so these need not be in canonical form.
+_ENVIO_DTE_HEAD_TEMPLATE = (
+    '<EnvioDTE xmlns="{dte_xmlns}" version="1.0">'
+    '<SetDTE ID="SetDoc">'
+    '<Caratula version="1.0">'
+    '<RutEmisor>{emisor_rut}</RutEmisor>'
+    '<RutEnvia>{rut_envia}</RutEnvia>'
+    '<RutReceptor>{rut_receptor}</RutReceptor>'
+    '<FchResol>{fecha_resolucion}</FchResol>'
+    '<NroResol>{numero_resolucion}</NroResol>'
+    '<TmstFirmaEnv>{firma_envio_dt}</TmstFirmaEnv>'
+    '{sub_tot_dte_ems}'
+    '</Caratula>'
+)
+
+_ENVIO_DTE_SUB_TOT_DTE_TEMPLATE = (
+    '<SubTotDTE>'
+    '<TpoDTE>{tipo_dte}</TpoDTE>'
+    '<NroDTE>{count}</NroDTE>'
+    '</SubTotDTE>'
+)
+
+_ENVIO_DTE_TAIL_TEMPLATE = (
+    '</SetDTE>'
+    '<Signature xmlns="{xml_dsig_xmlns}">'
+    '<SignedInfo>'
+    '<CanonicalizationMethod Algorithm="http://www.w3.org/TR/2001/REC-xml-c14n-20010315">'
+    '</CanonicalizationMethod>'
+    '<SignatureMethod Algorithm="http://www.w3.org/2000/09/xmldsig#rsa-sha1"></SignatureMethod>'
+    '<Reference URI="#SetDoc">'
+    '<Transforms>'
+    '<Transform Algorithm="http://www.w3.org/TR/2001/REC-xml-c14n-20010315"></Transform>'
+    '</Transforms>'
+    '<DigestMethod Algorithm="http://www.w3.org/2000/09/xmldsig#sha1"></DigestMethod>'
+    '<DigestValue>{placeholder_digest}</DigestValue>'
+    '</Reference>'
+    '</SignedInfo>'
+    '<SignatureValue>{placeholder_signature}</SignatureValue>'
+    '<KeyInfo>'
+    '<KeyValue>'
+    '<RSAKeyValue>'
+    '<Modulus>{rsa_key_modulus}</Modulus>'
+    '<Exponent>{rsa_key_exponent}</Exponent>'
+    '</RSAKeyValue>'
+    '</KeyValue>'
+    '<X509Data>'
+    '<X509Certificate>{signature_x509_cert}</X509Certificate>'
+    '</X509Data>'
+    '</KeyInfo>'
+    '</Signature>'
+    '</EnvioDTE>'
+)
+
+_XML_DECLARATION_TEMPLATE = '<?xml version="1.0" encoding="{encoding}"?>\n'
+
+
+###############################################################################
+# main functions
+###############################################################################
+
+def render_dte_xml(
+    dte: data_models.DteDataL2,
+    *,
+    encoding: str = DEFAULT_ENCODING,
+    xml_declaration: bool = True,
+    documento_id: Optional[str] = None,
+    emisor_acteco: Sequence[int] = _PLACEHOLDER_EMISOR_ACTECO,
+    detalle_items: Optional[Sequence[Tuple[str, int]]] = None,
+) -> bytes:
+    """
+    Render a DTE XML document from ``dte``.
+
+    The rendered XML document is valid according to the DTE XML schema.
+    Some of the XML elements required by the schema correspond to data that
+    is not available in :class:`data_models.DteDataL2`; it may be passed
+    in the keyword arguments and, if not, placeholder values are used.
+
+    .. warning::
+        The digest of the XML element ``Documento`` is computed, but the
+        ``TED`` ("timbre") and the XML digital signature are **not**
+        generated: the signature value and the certificate are taken from
+        ``dte`` as they are. Thus the rendered document will not pass a
+        signature verification unless it is byte-for-byte equal to the one
+        originally signed.
+
+    .. note::
+        The value of ``dte.firma_documento_dt`` is rendered with a
+        resolution of seconds (the microseconds are discarded).
+
+    :param dte: DTE data
+    :param encoding: encoding of the XML document
+    :param xml_declaration: whether to include the XML declaration. Exclude
+        it to embed the document in another one e.g. an "EnvioDTE".
+    :param documento_id: value of attribute ``ID`` of XML element
+        ``Documento``. If ``None``, one is generated from the natural key.
+    :param emisor_acteco: codes of the economic activities of the "emisor"
+        (1 to 4 values)
+    :param detalle_items: name and amount of each item of the DTE (1 to 60
+        items). If ``None``, a single item with amount ``dte.monto_total``.
+    :raises TypeError:
+    :raises ValueError:
+    :raises NotImplementedError: if ``dte.tipo_dte`` is not rendered as an
+        XML element ``Documento``
+
+    """
+    xml_doc_str = _render_dte_xml_em_str(
+        dte,
+        documento_id=documento_id,
+        emisor_acteco=emisor_acteco,
+        detalle_items=detalle_items,
+    )
+    if xml_declaration:
+        xml_doc_str = _XML_DECLARATION_TEMPLATE.format(encoding=encoding) + xml_doc_str
+    return xml_doc_str.encode(encoding, errors='xmlcharrefreplace')
+
+
+def render_dte_xml_many(
+    dtes: Iterable[data_models.DteDataL2],
+    *,
+    encoding: str = DEFAULT_ENCODING,
+) -> Iterator[bytes]:
+    """
+    Render a DTE XML document for each of ``dtes``, lazily.
+
+    .. seealso:: :func:`render_dte_xml`
+
+    :raises TypeError:
+    :raises ValueError:
+    :raises NotImplementedError:
+
+    """
+    xml_declaration = _XML_DECLARATION_TEMPLATE.format(encoding=encoding)
+    for dte in dtes:
+        xml_doc_str = xml_declaration + _render_dte_xml_em_str(dte)
+        yield xml_doc_str.encode(encoding, errors='xmlcharrefreplace')
+
+
+def write_dte_xml(
+    dte: data_models.DteDataL2,
+    output: IO[bytes],
+    *,
+    encoding: str = DEFAULT_ENCODING,
+) -> None:
+    """
+    Render a DTE XML document from ``dte`` and write it to bytes stream ``output``.
+
+    .. seealso:: :func:`render_dte_xml`
+
+    :raises TypeError:
+    :raises ValueError:
+    :raises NotImplementedError:
+
+    """
+    output.write(render_dte_xml(dte, encoding=encoding))
+
+
+def write_envio_dte_xml(
+    dtes: Sequence[data_models.DteDataL2],
+    output: IO[bytes],
+    *,
+    rut_envia: Rut,
+    rut_receptor: Rut,
+    fecha_resolucion: date,
+    numero_resolucion: int,
+    firma_envio_dt: datetime,
+    signature_x509_cert_der: Optional[bytes] = None,
+    encoding: str = DEFAULT_ENCODING,
+) -> int:
+    """
+    Render an "EnvioDTE" XML document with ``dtes`` and write it to bytes stream ``output``.
+
+    The XML document is written incrementally: each DTE is rendered and
+    written right away, thus the memory used does not depend on the number
+    of DTEs. It is valid according to the "EnvioDTE" XML schema.
+
+    .. warning::
+        As with :func:`render_dte_xml`, no signature is generated. The XML
+        digital signature of the "EnvioDTE" has placeholder digest and
+        signature values.
+
+    .. seealso:: :func:`render_dte_xml`
+
+    :param dtes: DTEs, all of them of the same "emisor"
+    :param output: bytes stream
+    :param rut_envia: RUT of the person that sends the DTEs (and signs the "EnvioDTE")
+    :param rut_receptor: RUT of the receiver of the "EnvioDTE" (e.g. the SII)
+    :param fecha_resolucion: date of the SII resolution that authorizes the "emisor"
+    :param numero_resolucion: number of the SII resolution that authorizes the "emisor"
+    :param firma_envio_dt: datetime of the signature of the "EnvioDTE"
+    :param signature_x509_cert_der: DER-encoded certificate of the signature
+        of the "EnvioDTE". If ``None``, the one of the first DTE.
+    :param encoding: encoding of the XML document
+    :returns: number of DTEs written
+    :raises TypeError:
+    :raises ValueError: if there are no DTEs or too many, or they are not
+        all of the same "emisor"
+    :raises NotImplementedError:
+
+    """
+    if not 1 <= len(dtes) <= ENVIO_DTE_MAX_DTE_COUNT:
+        raise ValueError(
+            f"Number of DTEs must be between 1 and {ENVIO_DTE_MAX_DTE_COUNT}.", len(dtes))
+    if not isinstance(firma_envio_dt, datetime):
+        raise TypeError("Inappropriate type of 'firma_envio_dt'.")
+    if not tz_utils.dt_is_aware(firma_envio_dt):
+        raise ValueError("Value of 'firma_envio_dt' must be timezone-aware.", firma_envio_dt)
+
+    for dte in dtes:
+        if not isinstance(dte, data_models.DteDataL2):
+            raise TypeError("Inappropriate type of 'dte'.")
+    emisor_rut = dtes[0].emisor_rut
+    for dte in dtes:
+        if dte.emisor_rut != emisor_rut:
+            raise ValueError("All the DTEs must be of the same emisor.", dte.emisor_rut)
+    # note: the "Caratula" (which goes before the DTEs) includes the number of DTEs of each kind.
+    tipo_dte_counts = collections.Counter(dte.tipo_dte.value for dte in dtes)
+
+    if signature_x509_cert_der is None:
+        signature_x509_cert_der = dtes[0].signature_x509_cert_der
+    if signature_x509_cert_der is None:
+        raise ValueError("Value of 'signature_x509_cert_der' is required by the XML schema.")
+    rsa_key_modulus, rsa_key_exponent = _get_x509_cert_der_rsa_key_value(
+        signature_x509_cert_der)
+
+    # note: see the same conversion of 'firma_documento_dt' in '_render_dte_xml_em_str'.
+    firma_envio_dt_naive = firma_envio_dt \
+        .astimezone(data_models.DteDataL2.DATETIME_FIELDS_TZ) \
+        .replace(tzinfo=None)
+
+    output.write((
+        _XML_DECLARATION_TEMPLATE.format(encoding=encoding)
+        + _ENVIO_DTE_HEAD_TEMPLATE.format(
+            dte_xmlns=DTE_XMLNS,
+            emisor_rut=emisor_rut.canonical,
+            rut_envia=rut_envia.canonical,
+            rut_receptor=rut_receptor.canonical,
+            fecha_resolucion=fecha_resolucion.isoformat(),
+            numero_resolucion=f'{numero_resolucion:d}',
+            firma_envio_dt=firma_envio_dt_naive.isoformat(timespec='seconds'),
+            sub_tot_dte_ems=''.join(
+                _ENVIO_DTE_SUB_TOT_DTE_TEMPLATE.format(tipo_dte=tipo_dte, count=count)
+                for tipo_dte, count in sorted(tipo_dte_counts.items())
+            ),
+        )
+    ).encode(encoding))
+
+    for dte in dtes:
+        output.write(
+            _render_dte_xml_em_str(dte).encode(encoding, errors='xmlcharrefreplace'))
+
+    output.write(_ENVIO_DTE_TAIL_TEMPLATE.format(
+        xml_dsig_xmlns=_XML_DSIG_XMLNS,
+        placeholder_digest=_PLACEHOLDER_BASE64_DIGEST,
+        placeholder_signature=_PLACEHOLDER_BASE64_SIGNATURE,
+        rsa_key_modulus=rsa_key_modulus,
+        rsa_key_exponent=rsa_key_exponent,
+        signature_x509_cert=base64.standard_b64encode(signature_x509_cert_der).decode('ascii'),
+    ).encode(encoding))
+
+    return len(dtes)
+
+
+def write_dte_xml_many(
+    dtes: Iterable[data_models.DteDataL2],
+    output_dir_path: Union[str, os.PathLike],
+    *,
+    encoding: str = DEFAULT_ENCODING,
+) -> int:
+    """
+    Render a DTE XML document for each of ``dtes`` and write each one to a file.
+
+    The files are written to directory ``output_dir_path`` (which must
+    exist) and named after the natural key of the DTE e.g.
+    ``DTE--76354771-K--33--170.xml``. Existing files are not overwritten.
+
+    .. seealso:: :func:`render_dte_xml`, and :func:`write_envio_dte_xml`
+        to write many DTEs to a bytes stream
+
+    :returns: number of XML documents written
+    :raises TypeError:
+    :raises ValueError: if the natural key of a DTE is repeated in ``dtes``
+    :raises FileExistsError: if the file of a DTE already exists
+    :raises NotImplementedError:
+
+    """
+    output_dir_path = pathlib.Path(output_dir_path)
+    dtes = list(dtes)
+
+    # note: the checks are done before writing any file, so that nothing is written if they fail.
+    file_paths: Dict[str, pathlib.Path] = {}
+    for dte in dtes:
+        slug = dte.natural_key.slug
+        if slug in file_paths:
+            raise ValueError("Natural key of DTE is repeated.", slug)
+        file_paths[slug] = output_dir_path.joinpath(f'DTE--{slug}.xml')
+    for file_path in file_paths.values():
+        if file_path.exists():
+            raise FileExistsError("File of DTE already exists.", str(file_path))
+
+    for dte, file_path in zip(dtes, file_paths.values()):
+        xml_doc_bytes = render_dte_xml(dte, encoding=encoding)
+        # note: mode 'x' fails if the file was created after the checks.
+        with open(file_path, mode='xb') as f:
+            f.write(xml_doc_bytes)
+
+    return len(dtes)
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+def _render_dte_xml_em_str(
+    dte: data_models.DteDataL2,
+    documento_id: Optional[str] = None,
+    emisor_acteco: Sequence[int] = _PLACEHOLDER_EMISOR_ACTECO,
+    detalle_items: Optional[Sequence[Tuple[str, int]]] = None,
+) -> str:
+    """
+    Render the XML element ``DTE`` (as a str, without XML declaration) from ``dte``.
+
+    :raises TypeError:
+    :raises ValueError:
+    :raises NotImplementedError:
+
+    """
+    if not isinstance(dte, data_models.DteDataL2):
+        raise TypeError("Inappropriate type of 'dte'.")
+
+    if dte.tipo_dte in _TIPO_DTE_NOT_DOCUMENTO:
+        raise NotImplementedError(
+            "Rendering XML element 'Liquidacion' or 'Exportaciones' is not supported.",
+            dte.tipo_dte)
+
+    # Fields that are optional in the data model but required by the XML schema.
+    if dte.emisor_giro is None:
+        raise ValueError("Value of 'emisor_giro' is required by the DTE XML schema.")
+    if dte.firma_documento_dt is None:
+        raise ValueError("Value of 'firma_documento_dt' is required by the DTE XML schema.")
+    if dte.signature_value is None:
+        raise ValueError("Value of 'signature_value' is required by the DTE XML schema.")
+    if dte.signature_x509_cert_der is None:
+        raise ValueError("Value of 'signature_x509_cert_der' is required by the DTE XML schema.")
+
+    if not 1 <= len(emisor_acteco) <= 4:
+        raise ValueError("Number of values of 'emisor_acteco' must be between 1 and 4.")
+
+    if documento_id is None:
+        # note: the XML type of 'ID' is 'xs:ID', which can not start with a digit.
+        documento_id = f'DTE-{dte.slug}'
+
+    if detalle_items is None:
+        detalle_items = ((_PLACEHOLDER_DETALLE_ITEM_NAME, dte.monto_total), )
+    if not 1 <= len(detalle_items) <= 60:
+        raise ValueError("Number of values of 'detalle_items' must be between 1 and 60.")
+
+    detalle_ems = ''.join(
+        _DETALLE_TEMPLATE.format(
+            line_number=line_number,
+            item_name=_escape_text(item_name),
+            item_monto=item_monto,
+        )
+        for line_number, (item_name, item_monto) in enumerate(detalle_items, start=1)
+    )
+
+    fecha_vencimiento_em = ''
+    if dte.fecha_vencimiento_date is not None:
+        fecha_vencimiento_em = '<FchVenc>{}</FchVenc>'.format(
+            dte.fecha_vencimiento_date.isoformat())
+    emisor_email_em = ''
+    if dte.emisor_email is not None:
+        emisor_email_em = '<CorreoEmisor>{}</CorreoEmisor>'.format(
+            _escape_text(dte.emisor_email))
+    receptor_email_em = ''
+    if dte.receptor_email is not None:
+        receptor_email_em = '<CorreoRecep>{}</CorreoRecep>'.format(
+            _escape_text(dte.receptor_email))
+
+    # note: XML type 'FechaHoraType' does not include timezone info, and the value is parsed as a
+    #   datetime in timezone 'DteDataL2.DATETIME_FIELDS_TZ'.
+    firma_documento_dt_naive = dte.firma_documento_dt \
+        .astimezone(dte.DATETIME_FIELDS_TZ) \
+        .replace(tzinfo=None)
+    assert tz_utils.dt_is_naive(firma_documento_dt_naive)
+
+    documento_em_template_kwargs = dict(
+        documento_id=_escape_attr(documento_id),
+        tipo_dte=dte.tipo_dte.value,
+        folio=dte.folio,
+        fecha_emision=dte.fecha_emision_date.isoformat(),
+        fecha_vencimiento_em=fecha_vencimiento_em,
+        emisor_rut=dte.emisor_rut.canonical,
+        emisor_razon_social=_escape_text(dte.emisor_razon_social),
+        emisor_giro=_escape_text(dte.emisor_giro),
+        emisor_email_em=emisor_email_em,
+        emisor_acteco_ems=''.join(f'<Acteco>{value:d}</Acteco>' for value in emisor_acteco),
+        receptor_rut=dte.receptor_rut.canonical,
+        receptor_razon_social=_escape_text(dte.receptor_razon_social),
+        receptor_email_em=receptor_email_em,
+        monto_total=dte.monto_total,
+        detalle_ems=detalle_ems,
+        ted_receptor_razon_social=_escape_text(
+            dte.receptor_razon_social[:_TED_TEXT_MAX_LENGTH].rstrip()),
+        ted_emisor_razon_social=_escape_text(
+            dte.emisor_razon_social[:_TED_TEXT_MAX_LENGTH].rstrip()),
+        ted_item_1_name=_escape_text(detalle_items[0][0][:_TED_TEXT_MAX_LENGTH].rstrip()),
+        placeholder_signature=_PLACEHOLDER_BASE64_SIGNATURE,
+        placeholder_caf_idk=_PLACEHOLDER_CAF_IDK,
+        firma_documento_dt=firma_documento_dt_naive.isoformat(timespec='seconds'),
+    )
+    # The canonical form of the 'Documento' subtree includes the (inherited) namespace declaration.
+    documento_em_c14n = _DOCUMENTO_TEMPLATE.format(
+        xmlns_attr=f' xmlns="{DTE_XMLNS}"', **documento_em_template_kwargs)
+    documento_digest_value = base64.standard_b64encode(
+        hashlib.sha1(documento_em_c14n.encode('utf-8')).digest()).decode('ascii')
+    # note: line breaks are only possible in text values, and the escaped values are equivalent.
+    documento_em = _DOCUMENTO_TEMPLATE.format(
+        xmlns_attr='', **documento_em_template_kwargs).replace('\n', '&#10;')
+
+    rsa_key_modulus, rsa_key_exponent = _get_x509_cert_der_rsa_key_value(
+        dte.signature_x509_cert_der)
+
+    return _DTE_TEMPLATE.format(
+        dte_xmlns=DTE_XMLNS,
+        documento_em=documento_em,
+        xml_dsig_xmlns=_XML_DSIG_XMLNS,
+        documento_id=documento_em_template_kwargs['documento_id'],
+        documento_digest_value=documento_digest_value,
+        signature_value=base64.standard_b64encode(dte.signature_value).decode('ascii'),
+        rsa_key_modulus=rsa_key_modulus,
+        rsa_key_exponent=rsa_key_exponent,
+        signature_x509_cert=base64.standard_b64encode(
+            dte.signature_x509_cert_der).decode('ascii'),
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_x509_cert_der_rsa_key_value(der_value: bytes) -> Tuple[str, str]:
+    """
+    Return the base64-encoded modulus and exponent of the RSA public key of a cert.
+
+    It is cached because usually all the DTE of an "emisor" are signed with
+    the same certificate.
+
+    :raises ValueError:
+
+    """
+    x509_cert = crypto_utils.load_der_x509_cert(der_value)
+    public_key = x509_cert.public_key()
+    if not isinstance(public_key, RSAPublicKey):
+        raise ValueError("Only certificates with an RSA public key are supported.")
+
+    public_numbers = public_key.public_numbers()
+    modulus_bytes = public_numbers.n.to_bytes((public_numbers.n.bit_length() + 7) // 8, 'big')
+    exponent_bytes = public_numbers.e.to_bytes((public_numbers.e.bit_length() + 7) // 8, 'big')
+
+    return (
+        base64.standard_b64encode(modulus_bytes).decode('ascii'),
+        base64.standard_b64encode(exponent_bytes).decode('ascii'),
+    )
+
+
+def _escape_text(value: str) -> str:
+    # Escaping of text nodes of the canonical form of XML (which is also valid in plain XML).
+    return value \
+        .replace('&', '&amp;') \
+        .replace('<', '&lt;') \
+        .replace('>', '&gt;') \
+        .replace('\r', '&#xD;')
+
+
+def _escape_attr(value: str) -> str:
+    # Escaping of attribute values of the canonical form of XML.
+    return value \
+        .replace('&', '&amp;') \
+        .replace('<', '&lt;') \
+        .replace('"', '&quot;') \
+        .replace('\t', '&#x9;') \
+        .replace('\n', '&#xA;') \
+        .replace('\r', '&#xD;')
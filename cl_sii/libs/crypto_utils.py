@@ -38,15 +38,585 @@ PEM stands for "Privacy Enhanced Mail".
 
 """
 import base64
-from typing import Union
-
+import collections
+import dataclasses
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import cryptography.exceptions
+import cryptography.hazmat.primitives.asymmetric.ec
+import cryptography.hazmat.primitives.asymmetric.padding
+import cryptography.hazmat.primitives.asymmetric.rsa
+import cryptography.hazmat.primitives.hashes
 import cryptography.x509
 import signxml.util
 from cryptography.hazmat.backends.openssl import backend as _crypto_x509_backend
 from cryptography.x509 import Certificate as X509Cert
+from cryptography.x509 import CertificateRevocationList as X509Crl
 from OpenSSL.crypto import X509 as _X509CertOpenSsl  # noqa: F401
 
+from cl_sii.rut import Rut
 from . import encoding_utils
+from . import tz_utils
+
+
+_PEM_CERT_HEADER = b'-----BEGIN CERTIFICATE-----'
+_PEM_CERT_FOOTER = b'-----END CERTIFICATE-----'
+_PEM_CERT_LINE_LENGTH = 64
+
+_PEM_CERT_HEADER_REGEX = re.compile(re.escape(_PEM_CERT_HEADER))
+_PEM_CERT_FOOTER_REGEX = re.compile(re.escape(_PEM_CERT_FOOTER))
+_PEM_CERT_NON_BASE64_CHAR_REGEX = re.compile(rb'[^A-Za-z0-9+/=]')
+
+# - Decreto 181 (Julio-Agosto 2002) of Ministerio de Economía:
+#   > RUT del titular del certificado : 1.3.6.1.4.1.8321.1
+# - ref: https://www.leychile.cl/Consulta/m/norma_plana?org=&idNorma=201668
+_X509_CERT_TITULAR_RUT_OID = cryptography.x509.ObjectIdentifier('1.3.6.1.4.1.8321.1')
+
+_X509_CERT_CHAIN_MAX_LENGTH = 10
+_TRUST_STORE_CERT_FILE_EXTENSIONS = ('.cer', '.crt', '.der', '.pem')
+_TRUST_STORE_CRL_FILE_EXTENSIONS = ('.crl', )
+
+
+class X509CertChainValidationError(Exception):
+
+    """
+    The certificate chain of an X.509 certificate is not valid.
+    """
+
+
+X509_CERT_CACHE_DEFAULT_MAX_SIZE = 1024
+"""
+Default max number of certificates in an :class:`X509CertCache`.
+"""
+
+
+@dataclasses.dataclass
+class X509CertCacheStats:
+
+    """
+    Statistics of an :class:`X509CertCache`.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class X509CertCache:
+
+    """
+    Cache of X.509 certificates loaded from DER-encoded data.
+
+    Usually all the DTEs of an "emisor" are signed with the same
+    certificate, thus loading it once (instead of once per DTE) saves time.
+
+    The entries are keyed by the SHA-256 digest of the DER-encoded data.
+    When the cache is full, the least recently used entry is evicted.
+    It may be used by several threads.
+
+    :param max_size: max number of certificates
+    :raises ValueError: if ``max_size`` is not positive
+
+    """
+
+    def __init__(self, max_size: int = X509_CERT_CACHE_DEFAULT_MAX_SIZE) -> None:
+        if max_size <= 0:
+            raise ValueError("Value of 'max_size' must be positive.")
+
+        self.max_size = max_size
+        self.stats = X509CertCacheStats()
+
+        self._lock = threading.Lock()
+        self._certs: 'collections.OrderedDict[bytes, X509Cert]' = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._certs)
+
+    def load_der_x509_cert(self, der_value: bytes) -> X509Cert:
+        """
+        Same as :func:`load_der_x509_cert` but the certificate is cached.
+
+        Errors are not cached.
+
+        :raises TypeError:
+        :raises ValueError:
+
+        """
+        if not isinstance(der_value, bytes):
+            raise TypeError("Value must be bytes.")
+
+        key = hashlib.sha256(der_value).digest()
+        with self._lock:
+            x509_cert = self._certs.get(key)
+            if x509_cert is not None:
+                self._certs.move_to_end(key)
+                self.stats.hits += 1
+                return x509_cert
+            self.stats.misses += 1
+
+        # note: the certificate is loaded without holding the lock; if another thread loads the
+        #   same one at the same time, one of them is kept.
+        x509_cert = load_der_x509_cert(der_value)
+
+        with self._lock:
+            self._certs[key] = x509_cert
+            self._certs.move_to_end(key)
+            while len(self._certs) > self.max_size:
+                self._certs.popitem(last=False)
+                self.stats.evictions += 1
+
+        return x509_cert
+
+    def clear(self) -> None:
+        """
+        Remove all the entries (they are counted as evictions).
+        """
+        with self._lock:
+            self.stats.evictions += len(self._certs)
+            self._certs.clear()
+
+
+DEFAULT_X509_CERT_CACHE = X509CertCache()
+"""
+Cache used by :func:`load_der_x509_cert_cached`.
+"""
+
+
+@dataclasses.dataclass(frozen=True)
+class X509CertMetadata:
+
+    """
+    Metadata of an X.509 certificate.
+
+    .. seealso:: :func:`get_x509_cert_metadata`
+    """
+
+    fingerprint: bytes
+    """
+    SHA-256 digest of the DER-encoded certificate.
+    """
+
+    serial_number: int
+
+    issuer: str
+    """
+    Issuer, as an RFC 4514 string.
+    """
+
+    subject_rut: Optional[Rut]
+    """
+    RUT of the "titular" of the certificate (the subject), if present.
+    """
+
+    not_valid_before: datetime
+    """
+    Start of the validity period (timezone-aware, in UTC).
+    """
+
+    not_valid_after: datetime
+    """
+    End of the validity period (timezone-aware, in UTC).
+    """
+
+    def is_valid_at(self, dt: datetime) -> bool:
+        """
+        Return whether ``dt`` is within the validity period.
+
+        :param dt: timezone-aware datetime
+
+        """
+        return self.not_valid_before <= dt <= self.not_valid_after
+
+
+class X509CertIndex:
+
+    """
+    Index of the metadata of X.509 certificates, deduplicated by fingerprint.
+
+    It is meant for a corpus of signed documents (e.g. DTEs), where usually
+    many documents are signed with the same certificate. Each distinct
+    certificate is parsed only once, and each document is identified by a
+    key (e.g. the natural key of a DTE) that refers to its certificate.
+    Queries are answered from the metadata, without parsing the
+    certificates again.
+
+    It may be used by several threads.
+
+    Usage::
+
+        index = X509CertIndex()
+        for dte in dtes:
+            index.add(dte.signature_x509_cert_der, key=dte.natural_key)
+
+        # DTEs signed with a certificate that is expired now.
+        now = tz_utils.get_now_tz_aware()
+        index.find_keys(lambda cert: cert.not_valid_after < now)
+
+        # DTEs signed with a certificate whose subject is not the "emisor".
+        [key for key, cert in index.iter_items() if cert.subject_rut != key.emisor_rut]
+
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._certs: Dict[bytes, X509CertMetadata] = {}
+        # note: the fingerprints are the same objects as those of the metadata, thus each key
+        #   takes only the memory of a dict entry.
+        self._fingerprints_by_key: Dict[Hashable, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._certs)
+
+    @property
+    def certs(self) -> List[X509CertMetadata]:
+        """
+        Metadata of the indexed certificates.
+        """
+        with self._lock:
+            return list(self._certs.values())
+
+    def add(self, der_value: bytes, key: Optional[Hashable] = None) -> X509CertMetadata:
+        """
+        Add a certificate (if not already present) and refer ``key`` to it.
+
+        If ``key`` referred to another certificate, it is replaced.
+
+        :param der_value: DER-encoded certificate data
+        :param key: identifier of e.g. the document signed with the certificate
+        :raises TypeError:
+        :raises ValueError:
+
+        """
+        if not isinstance(der_value, bytes):
+            raise TypeError("Value must be bytes.")
+
+        fingerprint = hashlib.sha256(der_value).digest()
+        with self._lock:
+            cert = self._certs.get(fingerprint)
+
+        if cert is None:
+            # note: the certificate is parsed without holding the lock.
+            cert = get_x509_cert_metadata(load_der_x509_cert(der_value))
+
+        with self._lock:
+            cert = self._certs.setdefault(cert.fingerprint, cert)
+            if key is not None:
+                self._fingerprints_by_key[key] = cert.fingerprint
+
+        return cert
+
+    def get(self, fingerprint: bytes) -> Optional[X509CertMetadata]:
+        """
+        Return the metadata of the certificate with ``fingerprint``, if present.
+        """
+        return self._certs.get(fingerprint)
+
+    def get_for_key(self, key: Hashable) -> Optional[X509CertMetadata]:
+        """
+        Return the metadata of the certificate that ``key`` refers to, if any.
+        """
+        with self._lock:
+            fingerprint = self._fingerprints_by_key.get(key)
+            return self._certs[fingerprint] if fingerprint is not None else None
+
+    def find_certs(self, predicate: Callable[[X509CertMetadata], bool]) -> List[X509CertMetadata]:
+        """
+        Return the metadata of the certificates for which ``predicate`` is true.
+        """
+        return [cert for cert in self.certs if predicate(cert)]
+
+    def find_keys(self, predicate: Callable[[X509CertMetadata], bool]) -> List[Hashable]:
+        """
+        Return the keys that refer to a certificate for which ``predicate`` is true.
+
+        ``predicate`` is called once per certificate, not once per key.
+
+        """
+        fingerprints = {cert.fingerprint for cert in self.find_certs(predicate)}
+        if not fingerprints:
+            return []
+        return [key for key, fingerprint in self._get_key_items() if fingerprint in fingerprints]
+
+    def iter_items(self) -> Iterator[Tuple[Hashable, X509CertMetadata]]:
+        """
+        Iterate over the keys and the metadata of the certificate each one refers to.
+
+        It is useful for queries that depend on the key too.
+
+        """
+        certs = self._certs
+        for key, fingerprint in self._get_key_items():
+            yield key, certs[fingerprint]
+
+    def _get_key_items(self) -> List[Tuple[Hashable, bytes]]:
+        with self._lock:
+            return list(self._fingerprints_by_key.items())
+
+
+@dataclasses.dataclass(frozen=True)
+class _X509CertChainValidationResult:
+
+    """
+    Result of the validation of a certificate chain, that does not depend on time.
+    """
+
+    error: Optional[str] = None
+    # note: the validity period of the chain is the intersection of those of its certificates.
+    not_valid_before: Optional[datetime] = None
+    not_valid_after: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+    # note: max number of intermediate CA certificates that may follow the certificate in a chain
+    #   (according to the path length constraints of its chain), or 'None' if there is no limit.
+    #   If it is negative, the certificate must not issue any certificate.
+    path_length: Optional[int] = None
+
+    def check(self, at: datetime) -> None:
+        if self.error is not None:
+            raise X509CertChainValidationError(self.error)
+        assert self.not_valid_before is not None and self.not_valid_after is not None
+        if not self.not_valid_before <= at <= self.not_valid_after:
+            raise X509CertChainValidationError(
+                f"A certificate of the chain is not valid at {at.isoformat()}.")
+        if self.revoked_at is not None and self.revoked_at <= at:
+            raise X509CertChainValidationError(
+                f"A certificate of the chain was revoked at {self.revoked_at.isoformat()}.")
+
+
+class X509CertChainValidator:
+
+    """
+    Validator of the certificate chain of X.509 certificates, against a trust store.
+
+    The trust store consists of CA certificates and (optionally) CRLs. The
+    self-issued CA certificates are the trust anchors; the others are
+    intermediate CAs, whose own chain is validated too. A certificate is
+    valid at a point in time if, for each certificate of its chain up to a
+    trust anchor:
+
+    * it is signed by the next one (its issuer), which is a CA certificate
+      (see below) whose path length constraint is not exceeded,
+    * it is within its validity period, and
+    * it had not been revoked, according to the CRLs of its issuer.
+
+    A CA certificate has the "basic constraints" extension with ``ca`` set
+    and, if it has the "key usage" extension, ``key_cert_sign`` set.
+
+    The results are memoized per certificate (and the revocation data per
+    issuer), thus the work of validating an intermediate CA is done once
+    for all the certificates it issued, and validating a certificate again
+    (e.g. for another document signed with it) is a dict lookup. It may be
+    used by several threads.
+
+    .. warning:: CRLs are not required, and whether they are up to date
+        (see ``next_update``) is not checked. CRLs whose signature is not
+        valid are ignored.
+
+    Usage::
+
+        validator = X509CertChainValidator.from_dir('/etc/my-app/sii-trust-store')
+        for dte in dtes:
+            validator.validate(dte.signature_x509_cert_der, at=dte.firma_documento_dt)
+
+    :param ca_certs: CA certificates
+    :param crls: certificate revocation lists
+
+    """
+
+    def __init__(self, ca_certs: Iterable[X509Cert], crls: Iterable[X509Crl] = ()) -> None:
+        self._ca_certs_by_subject: Dict[cryptography.x509.Name, List[Tuple[X509Cert, bytes]]] = {}
+        for ca_cert in ca_certs:
+            self._ca_certs_by_subject.setdefault(ca_cert.subject, []).append(
+                (ca_cert, ca_cert.fingerprint(cryptography.hazmat.primitives.hashes.SHA256())))
+        self._crls_by_issuer: Dict[cryptography.x509.Name, List[X509Crl]] = {}
+        for crl in crls:
+            self._crls_by_issuer.setdefault(crl.issuer, []).append(crl)
+
+        self._lock = threading.Lock()
+        self._results: Dict[bytes, _X509CertChainValidationResult] = {}
+        self._revocations: Dict[bytes, Dict[int, datetime]] = {}
+
+    @classmethod
+    def from_dir(cls, path: Union[str, os.PathLike]) -> 'X509CertChainValidator':
+        """
+        Create a validator with the CA certificates and CRLs in directory ``path``.
+
+        Files with extension ``.cer``, ``.crt``, ``.der`` or ``.pem`` contain
+        a CA certificate (DER or PEM) or several ones (PEM bundle), and files
+        with extension ``.crl`` contain a CRL (DER or PEM). Other files are
+        ignored.
+
+        :raises ValueError: if the content of a file is not valid
+
+        """
+        ca_certs: List[X509Cert] = []
+        crls: List[X509Crl] = []
+        for file_name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, file_name)
+            file_extension = os.path.splitext(file_name)[1].lower()
+            if not os.path.isfile(file_path) or file_extension not in (
+                *_TRUST_STORE_CERT_FILE_EXTENSIONS, *_TRUST_STORE_CRL_FILE_EXTENSIONS,
+            ):
+                continue
+
+            with open(file_path, mode='rb') as f:
+                value = f.read()
+            try:
+                if file_extension in _TRUST_STORE_CRL_FILE_EXTENSIONS:
+                    crls.append(_load_x509_crl(value))
+                elif _PEM_CERT_HEADER in value:
+                    ca_certs.extend(
+                        load_pem_x509_cert(bytes(pem_value)) for pem_value in iter_pem_certs(value))
+                else:
+                    ca_certs.append(load_der_x509_cert(value))
+            except ValueError as exc:
+                raise ValueError(f"Invalid file in trust store: {file_path!r}.") from exc
+
+        return cls(ca_certs=ca_certs, crls=crls)
+
+    def validate(self, der_value: bytes, at: Optional[datetime] = None) -> None:
+        """
+        Validate the certificate chain of a certificate, at a point in time.
+
+        :param der_value: DER-encoded certificate data
+        :param at: timezone-aware datetime (by default, now) e.g. the time
+            of a signature made with the certificate
+        :raises TypeError:
+        :raises ValueError: if ``der_value`` is not a certificate, or ``at``
+            is not timezone-aware
+        :raises X509CertChainValidationError:
+
+        """
+        if not isinstance(der_value, bytes):
+            raise TypeError("Value must be bytes.")
+        if at is None:
+            at = tz_utils.get_now_tz_aware()
+        elif not tz_utils.dt_is_aware(at):
+            raise ValueError("Value of 'at' must be timezone-aware.")
+
+        fingerprint = hashlib.sha256(der_value).digest()
+        result = self._results.get(fingerprint)
+        if result is None:
+            result = self._get_result(load_der_x509_cert(der_value), fingerprint, chain_length=1)
+        result.check(at)
+
+    def clear_cache(self) -> None:
+        """
+        Remove the memoized results.
+        """
+        with self._lock:
+            self._results.clear()
+            self._revocations.clear()
+
+    def _get_result(
+        self,
+        x509_cert: X509Cert,
+        fingerprint: bytes,
+        chain_length: int,
+    ) -> _X509CertChainValidationResult:
+        result = self._results.get(fingerprint)
+        if result is None:
+            # note: the result is computed without holding the lock; if another thread computes
+            #   the same one at the same time, one of them is kept.
+            result = self._validate_chain(x509_cert, chain_length)
+            with self._lock:
+                result = self._results.setdefault(fingerprint, result)
+        return result
+
+    def _validate_chain(
+        self,
+        x509_cert: X509Cert,
+        chain_length: int,
+    ) -> _X509CertChainValidationResult:
+        not_valid_before = tz_utils.convert_naive_dt_to_tz_aware(
+            x509_cert.not_valid_before, tz_utils.TZ_UTC)
+        not_valid_after = tz_utils.convert_naive_dt_to_tz_aware(
+            x509_cert.not_valid_after, tz_utils.TZ_UTC)
+
+        ca_certs = self._ca_certs_by_subject.get(x509_cert.issuer, [])
+        if x509_cert.issuer == x509_cert.subject and any(
+            ca_cert == x509_cert for ca_cert, _ in ca_certs
+        ):
+            # Trust anchor.
+            return _X509CertChainValidationResult(
+                not_valid_before=not_valid_before,
+                not_valid_after=not_valid_after,
+                path_length=_get_x509_cert_path_length(x509_cert),
+            )
+
+        if chain_length >= _X509_CERT_CHAIN_MAX_LENGTH:
+            return _X509CertChainValidationResult(error="Certificate chain is too long.")
+        if not ca_certs:
+            return _X509CertChainValidationResult(
+                error=f"Issuer of certificate is not in the trust store: "
+                      f"{x509_cert.issuer.rfc4514_string()!r}.")
+
+        for issuer_x509_cert, issuer_fingerprint in ca_certs:
+            if (
+                _is_ca_x509_cert(issuer_x509_cert)
+                and _verify_x509_cert_signature(x509_cert, issuer_x509_cert)
+            ):
+                break
+        else:
+            return _X509CertChainValidationResult(
+                error="Signature of certificate is not valid for any CA certificate of its issuer.")
+
+        issuer_result = self._get_result(issuer_x509_cert, issuer_fingerprint, chain_length + 1)
+        if issuer_result.error is not None:
+            return issuer_result
+        assert issuer_result.not_valid_before is not None
+        assert issuer_result.not_valid_after is not None
+        if issuer_result.path_length is not None and issuer_result.path_length < 0:
+            return _X509CertChainValidationResult(
+                error="Path length constraint of a CA certificate of the chain is exceeded.")
+
+        # note: if the certificate issues another one, it is an intermediate CA of that chain.
+        path_length = _get_x509_cert_path_length(x509_cert)
+        if issuer_result.path_length is not None and (
+            path_length is None or path_length >= issuer_result.path_length
+        ):
+            path_length = issuer_result.path_length - 1
+
+        revoked_at = self._get_revocations(issuer_x509_cert, issuer_fingerprint).get(
+            x509_cert.serial_number)
+        if issuer_result.revoked_at is not None:
+            revoked_at = (
+                issuer_result.revoked_at if revoked_at is None
+                else min(revoked_at, issuer_result.revoked_at))
+
+        return _X509CertChainValidationResult(
+            not_valid_before=max(not_valid_before, issuer_result.not_valid_before),
+            not_valid_after=min(not_valid_after, issuer_result.not_valid_after),
+            revoked_at=revoked_at,
+            path_length=path_length,
+        )
+
+    def _get_revocations(
+        self,
+        issuer_x509_cert: X509Cert,
+        issuer_fingerprint: bytes,
+    ) -> Dict[int, datetime]:
+        # note: the revocation date of each certificate revoked by the issuer, by serial number.
+        revocations = self._revocations.get(issuer_fingerprint)
+        if revocations is None:
+            revocations = {}
+            issuer_public_key = issuer_x509_cert.public_key()
+            for crl in self._crls_by_issuer.get(issuer_x509_cert.subject, []):
+                if not crl.is_signature_valid(issuer_public_key):
+                    continue
+                for revoked_x509_cert in crl:
+                    revoked_at = tz_utils.convert_naive_dt_to_tz_aware(
+                        revoked_x509_cert.revocation_date, tz_utils.TZ_UTC)
+                    serial_number = revoked_x509_cert.serial_number
+                    revocations[serial_number] = min(
+                        revoked_at, revocations.get(serial_number, revoked_at))
+            with self._lock:
+                revocations = self._revocations.setdefault(issuer_fingerprint, revocations)
+        return revocations
 
 
 def load_der_x509_cert(der_value: bytes) -> X509Cert:
@@ -72,6 +642,23 @@ def load_der_x509_cert(der_value: bytes) -> X509Cert:
     return x509_cert
 
 
+def load_der_x509_cert_cached(der_value: bytes) -> X509Cert:
+    """
+    Same as :func:`load_der_x509_cert` but the certificate is cached.
+
+    The certificates are cached in :data:`DEFAULT_X509_CERT_CACHE`, where
+    the statistics of the cache are available too.
+
+    .. warning:: The certificate object is shared, thus it must not be
+        modified (it is not possible through its public API anyway).
+
+    :raises TypeError:
+    :raises ValueError:
+
+    """
+    return DEFAULT_X509_CERT_CACHE.load_der_x509_cert(der_value)
+
+
 def load_pem_x509_cert(pem_value: Union[str, bytes]) -> X509Cert:
     """
     Load an X.509 certificate from PEM-encoded certificate data.
@@ -104,7 +691,27 @@ def load_pem_x509_cert(pem_value: Union[str, bytes]) -> X509Cert:
     return x509_cert
 
 
-def x509_cert_der_to_pem(der_value: bytes) -> bytes:
+def get_x509_cert_metadata(x509_cert: X509Cert) -> X509CertMetadata:
+    """
+    Get the metadata of an X.509 certificate.
+
+    The RUT of the subject is read from the "subject alternative name"
+    extension, as specified by Decreto 181 (2002) of Ministerio de Economía.
+
+    """
+    return X509CertMetadata(
+        fingerprint=x509_cert.fingerprint(cryptography.hazmat.primitives.hashes.SHA256()),
+        serial_number=x509_cert.serial_number,
+        issuer=x509_cert.issuer.rfc4514_string(),
+        subject_rut=_get_x509_cert_subject_rut(x509_cert),
+        not_valid_before=tz_utils.convert_naive_dt_to_tz_aware(
+            x509_cert.not_valid_before, tz_utils.TZ_UTC),
+        not_valid_after=tz_utils.convert_naive_dt_to_tz_aware(
+            x509_cert.not_valid_after, tz_utils.TZ_UTC),
+    )
+
+
+def x509_cert_der_to_pem(der_value: Union[bytes, bytearray, memoryview]) -> bytes:
     """
     Convert an X.509 certificate DER-encoded data to PEM-encoded.
 
@@ -114,7 +721,7 @@ def x509_cert_der_to_pem(der_value: bytes) -> bytes:
     :raises TypeError:
 
     """
-    if not isinstance(der_value, bytes):
+    if not isinstance(der_value, (bytes, bytearray, memoryview)):
         raise TypeError("Value must be bytes.")
 
     pem_value = base64.standard_b64encode(der_value)
@@ -123,7 +730,7 @@ def x509_cert_der_to_pem(der_value: bytes) -> bytes:
     return mod_pem_value.strip()
 
 
-def x509_cert_pem_to_der(pem_value: bytes) -> bytes:
+def x509_cert_pem_to_der(pem_value: Union[bytes, bytearray, memoryview]) -> bytes:
     """
     Convert an X.509 certificate PEM-encoded data to DER-encoded.
 
@@ -134,7 +741,7 @@ def x509_cert_pem_to_der(pem_value: bytes) -> bytes:
     :raises ValueError:
 
     """
-    if not isinstance(pem_value, bytes):
+    if not isinstance(pem_value, (bytes, bytearray, memoryview)):
         raise TypeError("Value must be bytes.")
 
     mod_pem_value = remove_pem_cert_header_footer(pem_value)
@@ -143,23 +750,224 @@ def x509_cert_pem_to_der(pem_value: bytes) -> bytes:
     return der_value.strip()
 
 
-def add_pem_cert_header_footer(pem_cert: bytes) -> bytes:
+def x509_cert_der_to_pem_many(
+    der_values: Iterable[Union[bytes, bytearray, memoryview]],
+) -> List[bytes]:
     """
-    Add certificate PEM header and footer (if not already present).
+    Convert each X.509 certificate DER-encoded data to PEM-encoded.
+
+    .. seealso:: :func:`x509_cert_der_to_pem`
+
+    :raises TypeError:
+
+    """
+    return [x509_cert_der_to_pem(der_value) for der_value in der_values]
+
+
+def x509_cert_pem_to_der_many(
+    pem_values: Iterable[Union[bytes, bytearray, memoryview]],
+) -> List[bytes]:
+    """
+    Convert each X.509 certificate PEM-encoded data to DER-encoded.
+
+    To convert the certificates of a bundle (e.g. the contents of a
+    ``.pem`` file with several certificates), use :func:`iter_pem_certs`.
+
+    .. seealso:: :func:`x509_cert_pem_to_der`
+
+    :raises TypeError:
+    :raises ValueError:
+
     """
-    pem_value_str = pem_cert.decode('ascii')
-    # note: it would be great if 'add_pem_header' did not forcefully convert bytes to str.
-    mod_pem_value_str = signxml.util.add_pem_header(pem_value_str)
-    mod_pem_value: bytes = mod_pem_value_str.encode('ascii')
-    return mod_pem_value
+    return [x509_cert_pem_to_der(pem_value) for pem_value in pem_values]
 
 
-def remove_pem_cert_header_footer(pem_cert: bytes) -> bytes:
+def iter_pem_certs(value: Union[bytes, bytearray, memoryview]) -> Iterator[memoryview]:
+    """
+    Iterate over the PEM-encoded certificates in a bundle.
+
+    Each certificate (including its header and footer) is a view of
+    ``value``, i.e. it is not copied. Anything outside of the certificates
+    (e.g. comments) is ignored.
+
+    :raises TypeError:
+
+    """
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        raise TypeError("Value must be bytes.")
+
+    value_view = memoryview(value).cast('B')
+    pos = 0
+    while True:
+        location = _find_pem_cert(value_view, pos)
+        if location is None:
+            break
+        start, _, _, end = location
+        yield value_view[start:end]
+        pos = end
+
+
+def add_pem_cert_header_footer(pem_cert: Union[bytes, bytearray, memoryview]) -> bytes:
+    """
+    Add certificate PEM header and footer (if not already present).
+
+    The base64-encoded data is wrapped in lines of 64 characters.
+    """
+    if pem_cert[:len(_PEM_CERT_HEADER)] == _PEM_CERT_HEADER:
+        return bytes(pem_cert)
+
+    if _PEM_CERT_NON_BASE64_CHAR_REGEX.search(pem_cert) is not None:
+        # Data with whitespace (e.g. already wrapped) or non-ASCII characters.
+        pem_value_str = bytes(pem_cert).decode('ascii')
+        # note: it would be great if 'add_pem_header' did not forcefully convert bytes to str.
+        mod_pem_value_str = signxml.util.add_pem_header(pem_value_str)
+        mod_pem_value: bytes = mod_pem_value_str.encode('ascii')
+        return mod_pem_value
+
+    # note: the lines are slices of a view (i.e. they are not copied) and 'bytes.join' copies
+    #   each of them only once, into the result.
+    pem_cert_view = memoryview(pem_cert).cast('B')
+    lines = [
+        pem_cert_view[index:index + _PEM_CERT_LINE_LENGTH]
+        for index in range(0, len(pem_cert_view), _PEM_CERT_LINE_LENGTH)
+    ] or [b'']
+    return b'\n'.join([_PEM_CERT_HEADER, *lines, _PEM_CERT_FOOTER])
+
+
+def remove_pem_cert_header_footer(pem_cert: Union[bytes, bytearray, memoryview]) -> bytes:
     """
     Remove certificate PEM header and footer (if they are present).
     """
-    pem_value_str = pem_cert.decode('ascii')
-    # note: it would be great if 'strip_pem_header' did not expect input to be a str.
-    mod_pem_value_str = signxml.util.strip_pem_header(pem_value_str)
-    mod_pem_value: bytes = mod_pem_value_str.encode('ascii').strip()
-    return mod_pem_value
+    pem_cert_view = memoryview(pem_cert).cast('B')
+    location = _find_pem_cert(pem_cert_view)
+    if location is None:
+        mod_pem_value = bytes(pem_cert_view)
+    else:
+        _, body_start, body_end, _ = location
+        mod_pem_value = bytes(pem_cert_view[body_start:body_end])
+    return mod_pem_value.replace(b'\r', b'').strip()
+
+
+def _find_pem_cert(value: memoryview, pos: int = 0) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Find the first PEM-encoded certificate in ``value``, from index ``pos``.
+
+    Return the start and end indexes of the certificate and of its
+    base64-encoded data (i.e. what is between the line break after the
+    header and the footer), or ``None`` if there is no certificate.
+
+    It matches the same as regex ``signxml.util.pem_regexp`` but it is
+    much faster, because the lazy quantifier of the regex makes it try to
+    match the footer at each character.
+
+    """
+    # note: the literal regexes are used (instead of e.g. 'bytes.find') because they support
+    #   any bytes-like object.
+    header_match = _PEM_CERT_HEADER_REGEX.search(value, pos)
+    while header_match is not None:
+        index = header_match.end()
+        if value[index:index + 2] == b'\r\n':
+            body_start = index + 2
+        elif value[index:index + 1] == b'\n':
+            body_start = index + 1
+        else:
+            header_match = _PEM_CERT_HEADER_REGEX.search(value, header_match.start() + 1)
+            continue
+
+        # Between the header's line break and the footer there is at least 1 character (of
+        #   any kind, e.g. a line break).
+        footer_match = _PEM_CERT_FOOTER_REGEX.search(value, body_start + 1)
+        if footer_match is None:
+            # note: if there is no footer after this header, there is none after the next ones.
+            break
+        return header_match.start(), body_start, footer_match.start(), footer_match.end()
+
+    return None
+
+
+def _get_x509_cert_subject_rut(x509_cert: X509Cert) -> Optional[Rut]:
+    try:
+        subject_alt_name_ext = x509_cert.extensions.get_extension_for_class(
+            cryptography.x509.SubjectAlternativeName)
+    except cryptography.x509.ExtensionNotFound:
+        return None
+
+    for other_name in subject_alt_name_ext.value.get_values_for_type(cryptography.x509.OtherName):
+        if other_name.type_id != _X509_CERT_TITULAR_RUT_OID:
+            continue
+        # note: the value is DER-encoded; the RUT is an 'IA5String' (tag 0x16) e.g.
+        #   b'\x16\n13185095-6'.
+        value = other_name.value
+        if len(value) < 2 or value[0] != 0x16 or value[1] != len(value) - 2:
+            continue
+        try:
+            return Rut(value[2:].decode('ascii'))
+        except ValueError:
+            continue
+
+    return None
+
+
+def _get_x509_cert_path_length(x509_cert: X509Cert) -> Optional[int]:
+    try:
+        basic_constraints_ext = x509_cert.extensions.get_extension_for_class(
+            cryptography.x509.BasicConstraints)
+    except cryptography.x509.ExtensionNotFound:
+        return None
+    path_length: Optional[int] = basic_constraints_ext.value.path_length
+    return path_length
+
+
+def _is_ca_x509_cert(x509_cert: X509Cert) -> bool:
+    # note: a certificate without the "basic constraints" extension is not a CA (RFC 5280,
+    #   section 4.2.1.9), and if it has the "key usage" extension, it must allow signing
+    #   certificates (section 4.2.1.3).
+    try:
+        basic_constraints_ext = x509_cert.extensions.get_extension_for_class(
+            cryptography.x509.BasicConstraints)
+    except cryptography.x509.ExtensionNotFound:
+        return False
+    if not basic_constraints_ext.value.ca:
+        return False
+
+    try:
+        key_usage_ext = x509_cert.extensions.get_extension_for_class(cryptography.x509.KeyUsage)
+    except cryptography.x509.ExtensionNotFound:
+        return True
+    return bool(key_usage_ext.value.key_cert_sign)
+
+
+def _load_x509_crl(value: bytes) -> X509Crl:
+    if b'-----BEGIN' in value:
+        return cryptography.x509.load_pem_x509_crl(data=value, backend=_crypto_x509_backend)
+    return cryptography.x509.load_der_x509_crl(data=value, backend=_crypto_x509_backend)
+
+
+def _verify_x509_cert_signature(x509_cert: X509Cert, issuer_x509_cert: X509Cert) -> bool:
+    """
+    Return whether ``x509_cert`` is signed with the key of ``issuer_x509_cert``.
+
+    Only RSA (PKCS #1 v1.5) and ECDSA signatures are supported.
+
+    """
+    public_key = issuer_x509_cert.public_key()
+    try:
+        hash_algorithm = x509_cert.signature_hash_algorithm
+        if isinstance(public_key, cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey):
+            public_key.verify(
+                x509_cert.signature,
+                x509_cert.tbs_certificate_bytes,
+                cryptography.hazmat.primitives.asymmetric.padding.PKCS1v15(),
+                hash_algorithm)
+        elif isinstance(
+            public_key, cryptography.hazmat.primitives.asymmetric.ec.EllipticCurvePublicKey,
+        ):
+            public_key.verify(
+                x509_cert.signature,
+                x509_cert.tbs_certificate_bytes,
+                cryptography.hazmat.primitives.asymmetric.ec.ECDSA(hash_algorithm))
+        else:
+            return False
+    except (cryptography.exceptions.InvalidSignature, cryptography.exceptions.UnsupportedAlgorithm):
+        return False
+    return True
@@ -1,9 +1,15 @@
 import base64
 import binascii
-from typing import Union
+from typing import IO, Iterable, Iterator, List, Union
 
 
-def clean_base64(value: Union[str, bytes]) -> bytes:
+DECODE_BASE64_STRICT_STREAM_DEFAULT_CHUNK_SIZE = 64 * 1024
+"""
+Default size of the chunks read from a stream by :func:`decode_base64_strict_stream`.
+"""
+
+
+def clean_base64(value: Union[str, bytes, bytearray, memoryview]) -> bytes:
     """
     Force bytes and remove line breaks and spaces.
 
@@ -13,11 +19,140 @@ def clean_base64(value: Union[str, bytes]) -> bytes:
     :raises TypeError:
 
     """
+    if isinstance(value, str):
+        value = value.strip()
+    return _clean_base64_chunk(value)
+
+
+def decode_base64_strict(value: Union[str, bytes, bytearray, memoryview]) -> bytes:
+    """
+    Strict conversion for str/bytes, tolerating only line breaks and spaces.
+
+    :raises ValueError: non-base64 input or non-ASCII characters included
+
+    """
+    value_base64_bytes_cleaned = clean_base64(value)
+    return _b64decode_strict(value_base64_bytes_cleaned)
+
+
+def decode_base64_strict_many(
+    values: Iterable[Union[str, bytes, bytearray, memoryview]],
+) -> List[bytes]:
+    """
+    Same as :func:`decode_base64_strict` but for each value of ``values``.
+
+    :raises ValueError: non-base64 input or non-ASCII characters included
+    :raises TypeError:
+
+    """
+    return [decode_base64_strict(value) for value in values]
+
+
+def decode_base64_strict_stream(
+    value: Union[Iterable[Union[str, bytes, bytearray, memoryview]], IO],
+    output: IO[bytes],
+    chunk_size: int = DECODE_BASE64_STRICT_STREAM_DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Same as :func:`decode_base64_strict` but the value is processed in chunks.
+
+    As with a ``str`` value, whitespace at the start and the end of ``str``
+    chunks (of the whole value, not of each chunk) is ignored.
+
+    The decoded data is written to ``output`` as each chunk is processed,
+    thus the memory usage depends on the size of the chunks, not on the
+    size of the value (e.g. a big file embedded in an XML document).
+
+    .. warning:: If the value is not valid, the data decoded before the
+        error was found has been written to ``output`` already.
+
+    :param value: chunks of the value, or a (binary or text) stream to read them from
+    :param output: binary stream to write the decoded data to
+    :param chunk_size: size of the chunks read from ``value``, if it is a stream
+    :return: number of bytes written to ``output``
+    :raises ValueError: non-base64 input or non-ASCII characters included
+    :raises TypeError:
+
+    """
+    if chunk_size <= 0:
+        raise ValueError("Value of 'chunk_size' must be positive.")
+
+    if hasattr(value, 'read'):
+        chunks: Iterable[Union[str, bytes, bytearray, memoryview]] = _iter_stream_chunks(
+            value, chunk_size)  # type: ignore
+    else:
+        chunks = value
+    # note: 'clean_base64' strips 'str' values (e.g. of '\x0b' and '\x0c', which are not removed
+    #   from the rest of the value).
+    chunks = _iter_str_chunks_stripped(chunks)
+
+    # note: the base64-encoded data is decoded in groups of 4 characters, as the chunks are
+    #   processed. The last group (and the characters after it) is decoded together with the
+    #   padding at the end, so that the padding is validated exactly as by
+    #   'decode_base64_strict' (which depends on the version of Python). The padding characters
+    #   are counted instead of kept in memory.
+    pending = b''
+    padding_size = 0
+    decoded_size = 0
+    for chunk in chunks:
+        value_base64_bytes = _clean_base64_chunk(chunk)
+        if not value_base64_bytes:
+            continue
+
+        if padding_size:
+            padding = value_base64_bytes
+        else:
+            padding_index = value_base64_bytes.find(b'=')
+            if padding_index == -1:
+                pending += value_base64_bytes
+                padding = b''
+            else:
+                pending += value_base64_bytes[:padding_index]
+                padding = value_base64_bytes[padding_index:]
+
+        if padding:
+            if padding.count(b'=') != len(padding):
+                raise ValueError(
+                    "Input is not a valid base64 value.", "Excess data after padding")
+            padding_size += len(padding)
+
+        split_index = len(pending) - len(pending) % 4 - 4
+        if split_index > 0:
+            value_bytes = _b64decode_strict(pending[:split_index])
+            output.write(value_bytes)
+            decoded_size += len(value_bytes)
+            pending = pending[split_index:]
+
+    if padding_size >= 8:
+        # note: whether the padding is valid does not depend on its size beyond this.
+        padding_size = 8 + padding_size % 4
+    if pending or padding_size:
+        value_bytes = _b64decode_strict(pending + b'=' * padding_size)
+        output.write(value_bytes)
+        decoded_size += len(value_bytes)
+
+    return decoded_size
+
+
+def validate_base64(value: Union[str, bytes, bytearray, memoryview]) -> None:
+    """
+    Validate that ``value`` is base64-encoded data.
+
+    :raises ValueError:
+    :raises TypeError:
+
+    """
+    decode_base64_strict(value)
+
+
+def _clean_base64_chunk(value: Union[str, bytes, bytearray, memoryview]) -> bytes:
     if isinstance(value, bytes):
         value_base64_bytes = value
+    elif isinstance(value, (bytearray, memoryview)):
+        value_base64_bytes = bytes(value)
     elif isinstance(value, str):
         try:
-            value_base64_bytes = value.strip().encode(encoding='ascii', errors='strict')
+            value_base64_bytes = value.encode(encoding='ascii', errors='strict')
         except UnicodeEncodeError as exc:
             raise ValueError("Only ASCII characters are accepted.", str(exc)) from exc
     else:
@@ -26,6 +161,11 @@ def clean_base64(value: Union[str, bytes]) -> bytes:
     # remove line breaks and spaces
     # warning: we may only remove characters that are not part of the standard base-64 alphabet
     #   (or any of its popular alternatives).
+    # note: 'bytes.replace' returns the same object (i.e. it does not copy it) if the character is
+    #   not found, thus usually there is only one copy (e.g. to remove '\n'). A single-pass
+    #   deletion with 'bytes.translate(None, ...)' is slower: it was measured to be 2.5 times
+    #   slower for a certificate (~1.8 KB) and 4 times slower for 130 KB, because it checks each
+    #   byte while 'bytes.replace' searches with 'memchr'.
     value_base64_bytes_cleaned = value_base64_bytes \
         .replace(b'\n', b'') \
         .replace(b'\r', b'') \
@@ -35,27 +175,46 @@ def clean_base64(value: Union[str, bytes]) -> bytes:
     return value_base64_bytes_cleaned
 
 
-def decode_base64_strict(value: Union[str, bytes]) -> bytes:
-    """
-    Strict conversion for str/bytes, tolerating only line breaks and spaces.
-
-    :raises ValueError: non-base64 input or non-ASCII characters included
-
-    """
-    value_base64_bytes_cleaned = clean_base64(value)
+def _b64decode_strict(value: bytes) -> bytes:
     try:
-        value_bytes = base64.b64decode(value_base64_bytes_cleaned, validate=True)
+        value_bytes = base64.b64decode(value, validate=True)
     except binascii.Error as exc:
         raise ValueError("Input is not a valid base64 value.", str(exc)) from exc
     return value_bytes
 
 
-def validate_base64(value: Union[str, bytes]) -> None:
-    """
-    Validate that ``value`` is base64-encoded data.
+def _iter_str_chunks_stripped(
+    chunks: Iterable[Union[str, bytes, bytearray, memoryview]],
+) -> Iterator[Union[str, bytes, bytearray, memoryview]]:
+    # note: same as 'str.strip' on the whole value. The whitespace at the end of each 'str' chunk
+    #   is held back until there are more non-whitespace characters after it.
+    at_start = True
+    whitespace = ''
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            if at_start:
+                chunk = chunk.lstrip()
+            stripped_chunk = chunk.rstrip()
+            if not stripped_chunk:
+                whitespace += chunk
+                continue
+            if whitespace:
+                yield whitespace
+            yield stripped_chunk
+            whitespace = chunk[len(stripped_chunk):]
+        elif len(chunk):
+            if whitespace:
+                yield whitespace
+                whitespace = ''
+            yield chunk
+        else:
+            continue
+        at_start = False
 
-    :raises ValueError:
-    :raises TypeError:
 
-    """
-    decode_base64_strict(value)
+def _iter_stream_chunks(stream: IO, chunk_size: int) -> Iterator[Union[str, bytes]]:
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
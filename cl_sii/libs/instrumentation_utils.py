@@ -0,0 +1,226 @@
+"""
+Instrumentation utils
+=====================
+
+Timing of the stages of the processing pipelines of this library (e.g.
+parsing, cleaning, validation and data extraction of a DTE XML document).
+
+The functions that are stages of a pipeline are decorated with
+:func:`instrument_stage`. Each time one of them is called, if there is at
+least one active callback, a :class:`StageEvent` (stage name, duration,
+input size and outcome) is passed to each active callback. If there is no
+active callback, the overhead is a function call and a couple of checks.
+
+There are 2 ways of activating a callback:
+
+* :func:`add_stage_callback`: for every call, in every thread (e.g. to send
+  metrics to a monitoring system).
+* :class:`StageTracer`: only for the calls made within a ``with`` block, in
+  the same thread or async task (it is based on :mod:`contextvars`).
+
+
+Usage:
+
+>>> from cl_sii.libs import instrumentation_utils
+
+>>> with instrumentation_utils.StageTracer() as tracer:
+...     xml_doc = xml_utils.parse_untrusted_xml(xml_doc_bytes)
+...     dte_struct = dte.parse.parse_dte_xml(xml_doc)
+>>> [(event.stage, event.duration) for event in tracer.events]
+[('xml_utils.parse_untrusted_xml', 0.0000612), ('dte.parse.parse_dte_xml', 0.000203)]
+
+>>> def send_stage_metric(event):
+...     statsd.timing(f'cl_sii.{event.stage}.{event.outcome}', event.duration * 1000)
+>>> instrumentation_utils.add_stage_callback(send_stage_metric)
+
+"""
+import contextvars
+import dataclasses
+import functools
+import logging
+import time
+from typing import Any, Callable, List, Optional, Tuple, TypeVar, cast
+
+
+logger = logging.getLogger(__name__)
+
+
+StageCallback = Callable[['StageEvent'], None]
+"""Function that is called with the :class:`StageEvent` of each call to a stage."""
+
+_F = TypeVar('_F', bound=Callable[..., Any])
+
+_global_stage_callbacks: List[StageCallback] = []
+
+_context_stage_callbacks: 'contextvars.ContextVar[Tuple[StageCallback, ...]]' = \
+    contextvars.ContextVar('cl_sii_context_stage_callbacks', default=())
+
+
+@dataclasses.dataclass(frozen=True)
+class StageEvent:
+
+    """
+    Data of a call to a stage of a processing pipeline.
+    """
+
+    stage: str
+    """
+    Name of the stage e.g. ``'dte.parse.validate_dte_xml'``.
+    """
+
+    duration: float
+    """
+    Duration of the call, in seconds.
+    """
+
+    input_size: Optional[int]
+    """
+    Size of the input in bytes, if the input is bytes (``None`` otherwise).
+    """
+
+    exception: Optional[BaseException] = None
+    """
+    Exception raised by the call, if any.
+    """
+
+    @property
+    def outcome(self) -> str:
+        """
+        ``'ok'`` if the call returned, or ``'error'`` if it raised an exception.
+        """
+        return 'ok' if self.exception is None else 'error'
+
+
+class StageTracer:
+
+    """
+    Collect the :class:`StageEvent` of the calls made within a ``with`` block.
+
+    The events are collected only for the calls made in the same thread
+    (or async task) that entered the ``with`` block. Tracers can be nested.
+
+    :param callback: function to be called with each event, in addition
+        to appending it to :attr:`events`
+
+    """
+
+    def __init__(self, callback: Optional[StageCallback] = None) -> None:
+        self.events: List[StageEvent] = []
+        self._callback = callback
+        self._context_var_token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> 'StageTracer':
+        if self._context_var_token is not None:
+            raise RuntimeError("Tracer is already active.")
+        self._context_var_token = _context_stage_callbacks.set(
+            _context_stage_callbacks.get() + (self._handle_event, ))
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        assert self._context_var_token is not None
+        _context_stage_callbacks.reset(self._context_var_token)
+        self._context_var_token = None
+
+    def _handle_event(self, event: StageEvent) -> None:
+        self.events.append(event)
+        if self._callback is not None:
+            self._callback(event)
+
+
+###############################################################################
+# functions
+###############################################################################
+
+def add_stage_callback(callback: StageCallback) -> None:
+    """
+    Activate ``callback`` for every call to a stage, in every thread.
+
+    .. warning:: The callback is called synchronously, thus it must be fast.
+        Exceptions raised by it are logged and ignored.
+
+    """
+    if callback not in _global_stage_callbacks:
+        _global_stage_callbacks.append(callback)
+
+
+def remove_stage_callback(callback: StageCallback) -> None:
+    """
+    Deactivate ``callback``, that was activated with :func:`add_stage_callback`.
+
+    :raises ValueError: if ``callback`` is not active
+
+    """
+    _global_stage_callbacks.remove(callback)
+
+
+def instrument_stage(
+    stage: str,
+    input_size: Optional[Callable[..., Optional[int]]] = None,
+) -> Callable[[_F], _F]:
+    """
+    Decorator of a function that is a stage of a processing pipeline.
+
+    :param stage: name of the stage
+    :param input_size: function to be called with the same arguments as the
+        decorated one, that returns the size of the input. It is called only
+        if there is an active callback.
+
+    """
+    def decorator(func: _F) -> _F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _global_stage_callbacks and not _context_stage_callbacks.get():
+                return func(*args, **kwargs)
+
+            event_input_size = None
+            if input_size is not None:
+                try:
+                    event_input_size = input_size(*args, **kwargs)
+                except Exception:
+                    # Invalid arguments; the decorated function must handle them.
+                    pass
+
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as exc:
+                _emit_stage_event(StageEvent(
+                    stage=stage,
+                    duration=time.perf_counter() - start,
+                    input_size=event_input_size,
+                    exception=exc,
+                ))
+                raise
+            _emit_stage_event(StageEvent(
+                stage=stage,
+                duration=time.perf_counter() - start,
+                input_size=event_input_size,
+            ))
+            return result
+
+        return cast(_F, wrapper)
+
+    return decorator
+
+
+def bytes_input_size(value: Any, *args: Any, **kwargs: Any) -> Optional[int]:
+    """
+    Return the size of ``value`` if it is bytes-like (for :func:`instrument_stage`).
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    return None
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+def _emit_stage_event(event: StageEvent) -> None:
+    for callback in (*_global_stage_callbacks, *_context_stage_callbacks.get()):
+        try:
+            callback(event)
+        except Exception:
+            logger.exception("Error in callback of stage '%s'.", event.stage)
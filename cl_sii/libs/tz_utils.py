@@ -9,13 +9,60 @@ Naive and aware
 These concept are defined in Python standard library module datetime
 `docs <https://docs.python.org/3/library/datetime.html#module-datetime>`_.
 
+
+Batch localization
+------------------
+
+Converting a naive datetime with pytz's ``localize`` is relatively slow:
+it looks up the UTC transitions of the timezone and disambiguates
+between its possible offsets, for every datetime. :class:`TzLocalizer`
+precomputes, once per timezone, the intervals of *local* (naive) time
+in which the result of ``localize`` does not change, so converting a
+naive datetime is a binary search and a ``replace``.
+
+Building that table takes about 100 ms (e.g. for ``America/Santiago``),
+thus it is worth it only for many datetimes: it is used by
+:func:`convert_naive_dts_to_tz_aware` but not by
+:func:`convert_naive_dt_to_tz_aware`.
+
+
+Backends
+--------
+
+The timezone objects of this library (e.g. :data:`TZ_CL_SANTIAGO`, which is
+also the timezone of the datetimes of the DTE and RCV data) are ``pytz``
+ones by default. The standard library's :mod:`zoneinfo` (Python 3.9+, or
+package ``backports.zoneinfo``) may be used instead by setting the
+environment variable ``CL_SII_TZ_BACKEND`` to ``'zoneinfo'`` before this
+module is imported.
+
+The functions of this module accept timezones of either backend, and have
+the same semantics with both e.g. :func:`convert_naive_dt_to_tz_aware`
+resolves ambiguous and non-existent times as pytz's ``localize`` does.
+
+.. warning:: The datetimes of different backends are equal if they
+    represent the same instant, but their ``tzinfo`` objects are different
+    (and so are e.g. their ``repr``). Use :func:`get_tz_name` to compare
+    the timezones of datetimes.
+
 """
-from datetime import datetime
-from typing import Union
+import bisect
+import functools
+import os
+from datetime import datetime, timedelta, tzinfo
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
 
 import pytz
 import pytz.tzinfo
 
+try:
+    import zoneinfo
+except ImportError:  # pragma: no cover
+    try:
+        from backports import zoneinfo  # type: ignore
+    except ImportError:
+        zoneinfo = None  # type: ignore
+
 
 # note: pytz does some magic with its timezone classes so we need to "invent" a parent class.
 PytzTimezone = Union[
@@ -26,13 +73,172 @@ PytzTimezone = Union[
 ]
 
 
-TZ_UTC = pytz.UTC  # type: PytzTimezone
-TZ_CL_SANTIAGO = pytz.timezone('America/Santiago')  # type: PytzTimezone
+Timezone = Union[PytzTimezone, 'zoneinfo.ZoneInfo']
+"""Timezone of any of the supported backends."""
+
+TZ_BACKEND_PYTZ = 'pytz'
+TZ_BACKEND_ZONEINFO = 'zoneinfo'
+
+TZ_BACKEND = os.environ.get('CL_SII_TZ_BACKEND', TZ_BACKEND_PYTZ)
+"""
+Backend of the timezone objects of this library (``'pytz'`` or ``'zoneinfo'``).
+"""
+
+
+def get_tz(name: str, backend: Optional[str] = None) -> Timezone:
+    """
+    Return the timezone named ``name`` e.g. ``'America/Santiago'``.
+
+    :param name: IANA name of the timezone
+    :param backend: ``'pytz'`` or ``'zoneinfo'`` (default: :data:`TZ_BACKEND`)
+    :raises ValueError: if ``backend`` is not supported
+    :raises ImportError: if ``backend`` is ``'zoneinfo'`` and it is not available
+
+    """
+    if backend is None:
+        backend = TZ_BACKEND
+
+    if backend == TZ_BACKEND_PYTZ:
+        return pytz.timezone(name)
+    if backend == TZ_BACKEND_ZONEINFO:
+        if zoneinfo is None:
+            raise ImportError(
+                "Module 'zoneinfo' (or package 'backports.zoneinfo' for Python < 3.9) "
+                "is required to use the 'zoneinfo' backend.")
+        return zoneinfo.ZoneInfo(name)
+    raise ValueError("Unsupported timezone backend.", backend)
+
+
+TZ_UTC = get_tz('UTC')  # type: Timezone
+TZ_CL_SANTIAGO = get_tz('America/Santiago')  # type: Timezone
 
 # TODO: remove
 UTC = TZ_UTC
 TIMEZONE_CL_SANTIAGO = TZ_CL_SANTIAGO
 
+if TYPE_CHECKING:
+    import numpy  # noqa: F401
+
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+
+# note: the result of pytz's 'localize' for a naive datetime 'dt' depends on the position of
+#   'dt', 'dt ± 1 day' and 'dt ± 6 hours' (for non-existent times) with respect to the UTC
+#   transitions shifted by the UTC offsets before and after them.
+_TZ_LOCALIZER_BOUNDARY_DELTAS = tuple(
+    timedelta(days=days, hours=hours) for days in (-1, 0, 1) for hours in (-6, 0, 6))
+
+
+class TzLocalizer:
+
+    """
+    Fast conversion of naive datetimes to timezone-aware ones, for a pytz timezone.
+
+    The results are identical to those of :func:`convert_naive_dt_to_tz_aware`
+    (i.e. pytz's ``localize``), including the ambiguous and non-existent
+    times around DST transitions.
+
+    Creating an instance is expensive (see "Batch localization" above), thus
+    it is worth it only for converting many datetimes. Usually there is no
+    need to create one; use :func:`get_tz_localizer` instead.
+
+    Usage::
+
+        localizer = get_tz_localizer(TZ_CL_SANTIAGO)
+        dt_tz_aware = localizer.localize(datetime(2018, 10, 23, 1, 54, 13))
+        dts_tz_aware = localizer.localize_many(dts_naive)
+        timestamps = localizer.to_utc_timestamp_many(dts_naive)
+
+    :param tz: timezone e.g. ``pytz.timezone('America/Santiago')``
+    :raises TypeError: if ``tz`` is a :mod:`zoneinfo` timezone (which does
+        not need this class)
+
+    """
+
+    def __init__(self, tz: PytzTimezone) -> None:
+        if _is_zoneinfo_tz(tz):
+            raise TypeError("Timezone must be a pytz one.")
+
+        self.tz = tz
+        self._boundaries, self._tzinfos, self._utc_offsets = _calc_tz_localizer_table(tz)
+
+    def localize(self, dt: datetime) -> datetime:
+        """
+        Convert an offset-naive datetime object to a timezone-aware one.
+
+        :raises ValueError: if ``dt`` is already timezone-aware
+
+        """
+        if dt.tzinfo is not None:
+            raise ValueError('Not naive datetime (tzinfo is already set)')
+        return dt.replace(tzinfo=self._tzinfos[bisect.bisect_right(self._boundaries, dt) - 1])
+
+    def localize_many(self, values: Iterable[datetime]) -> List[datetime]:
+        """
+        Convert each offset-naive datetime object in ``values`` to a timezone-aware one.
+
+        :raises ValueError: if any of ``values`` is already timezone-aware
+
+        """
+        bisect_right = bisect.bisect_right
+        boundaries = self._boundaries
+        tzinfos = self._tzinfos
+
+        result = []
+        for dt in values:
+            if dt.tzinfo is not None:
+                raise ValueError('Not naive datetime (tzinfo is already set)')
+            result.append(dt.replace(tzinfo=tzinfos[bisect_right(boundaries, dt) - 1]))
+        return result
+
+    def to_utc_timestamp_many(self, values: Iterable[datetime]) -> List[float]:
+        """
+        Return the POSIX timestamp of each offset-naive datetime object in ``values``.
+
+        Each timestamp is equal to ``self.localize(dt).timestamp()``, but the
+        timezone-aware objects are not created.
+
+        :raises ValueError: if any of ``values`` is already timezone-aware
+
+        """
+        bisect_right = bisect.bisect_right
+        boundaries = self._boundaries
+        utc_offsets = self._utc_offsets
+
+        result = []
+        for dt in values:
+            if dt.tzinfo is not None:
+                raise ValueError('Not naive datetime (tzinfo is already set)')
+            utc_offset = utc_offsets[bisect_right(boundaries, dt) - 1]
+            result.append((dt - utc_offset - _EPOCH_NAIVE).total_seconds())
+        return result
+
+    def localize_datetime64_to_utc(self, values: 'numpy.ndarray') -> 'numpy.ndarray':
+        """
+        Convert the local (naive) times of NumPy array ``values`` to UTC.
+
+        ``values`` must have a ``datetime64`` dtype, and its values are
+        interpreted as naive datetimes in timezone :attr:`tz`. The result is
+        an array of ``datetime64`` values in UTC (with a unit at least as
+        precise as microseconds), computed in a single vectorized pass. To
+        get the POSIX timestamps do e.g. ``result.astype('datetime64[s]').astype('int64')``.
+
+        .. note:: It requires NumPy, which is not a dependency of this library.
+
+        :raises TypeError: if ``values`` does not have a ``datetime64`` dtype
+
+        """
+        import numpy
+
+        values = numpy.asarray(values)
+        if values.dtype.kind != 'M':
+            raise TypeError("Value must be an array of 'datetime64'.")
+
+        boundaries = numpy.array(self._boundaries, dtype='datetime64[us]')
+        utc_offsets = numpy.array(self._utc_offsets, dtype='timedelta64[us]')
+        indexes = numpy.searchsorted(boundaries, values, side='right') - 1
+        # note: values before year 1 (which 'datetime' does not support) are in the first interval.
+        return values - utc_offsets[numpy.maximum(indexes, 0)]
+
 
 def get_now_tz_aware() -> datetime:
     """
@@ -50,7 +256,7 @@ def get_now_tz_aware() -> datetime:
     return datetime.utcnow().replace(tzinfo=TZ_UTC)
 
 
-def convert_naive_dt_to_tz_aware(dt: datetime, tz: PytzTimezone) -> datetime:
+def convert_naive_dt_to_tz_aware(dt: datetime, tz: Timezone) -> datetime:
     """
     Convert an offset-naive datetime object to a timezone-aware one.
 
@@ -73,15 +279,69 @@ def convert_naive_dt_to_tz_aware(dt: datetime, tz: PytzTimezone) -> datetime:
     >>> dt_tz_aware_2.isoformat()
     '2018-10-23T01:54:13-03:00'
 
+    Ambiguous and non-existent times are resolved as pytz's ``localize``
+    does by default (``is_dst=False``), with either backend.
+
     :param dt: offset-naive datetime
     :param tz: timezone e.g. ``pytz.timezone('America/Santiago')``
     :raises ValueError: if ``dt`` is already timezone-aware
 
     """
-    dt_tz_aware = tz.localize(dt)  # type: datetime
+    if _is_zoneinfo_tz(tz):
+        return _localize_zoneinfo(dt, tz)
+    # note: 'TzLocalizer' is not used because building its table (once per timezone) takes much
+    #   longer than localizing a single datetime; see 'convert_naive_dts_to_tz_aware'.
+    dt_tz_aware: datetime = tz.localize(dt)
     return dt_tz_aware
 
 
+def convert_naive_dts_to_tz_aware(values: Iterable[datetime], tz: Timezone) -> List[datetime]:
+    """
+    Convert each offset-naive datetime object in ``values`` to a timezone-aware one.
+
+    It is equivalent to calling :func:`convert_naive_dt_to_tz_aware` for each
+    value, but faster. For a pytz timezone, it uses the shared
+    :class:`TzLocalizer` of ``tz``, whose table is built the first time
+    (see :func:`get_tz_localizer`).
+
+    :param values: offset-naive datetimes
+    :param tz: timezone e.g. ``pytz.timezone('America/Santiago')``
+    :raises ValueError: if any of ``values`` is already timezone-aware
+
+    """
+    if _is_zoneinfo_tz(tz):
+        return [_localize_zoneinfo(dt, tz) for dt in values]
+    return get_tz_localizer(tz).localize_many(values)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tz_localizer(tz: PytzTimezone) -> TzLocalizer:
+    """
+    Return the (shared) :class:`TzLocalizer` of timezone ``tz``.
+
+    It is created the first time it is requested for ``tz``.
+
+    """
+    return TzLocalizer(tz)
+
+
+def get_tz_name(tz: Optional[tzinfo]) -> Optional[str]:
+    """
+    Return the IANA name of timezone ``tz`` (of any backend), if it has one.
+
+    >>> get_tz_name(pytz.timezone('America/Santiago'))
+    'America/Santiago'
+    >>> get_tz_name(zoneinfo.ZoneInfo('America/Santiago'))
+    'America/Santiago'
+    >>> get_tz_name(datetime.timezone.utc) is None
+    True
+
+    """
+    if _is_zoneinfo_tz(tz):
+        return tz.key  # type: ignore
+    return getattr(tz, 'zone', None)
+
+
 def dt_is_aware(value: datetime) -> bool:
     """
     Return whether datetime ``value`` is "aware".
@@ -118,3 +378,86 @@ def dt_is_naive(value: datetime) -> bool:
         raise TypeError
     # source: 'django.utils.timezone.is_naive' @ Django 2.1.7
     return value.utcoffset() is None
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+def _is_zoneinfo_tz(tz: Optional[tzinfo]) -> bool:
+    return zoneinfo is not None and isinstance(tz, zoneinfo.ZoneInfo)
+
+
+def _localize_zoneinfo(dt: datetime, tz: 'zoneinfo.ZoneInfo') -> datetime:
+    """
+    Same as pytz's ``localize`` (with ``is_dst=False``) but for a :mod:`zoneinfo` timezone.
+    """
+    if dt.tzinfo is not None:
+        raise ValueError('Not naive datetime (tzinfo is already set)')
+
+    dt_fold_0 = dt.replace(tzinfo=tz)
+    dt_fold_1 = dt.replace(tzinfo=tz, fold=1)
+    utc_offset_0 = dt_fold_0.utcoffset()
+    utc_offset_1 = dt_fold_1.utcoffset()
+    if utc_offset_0 == utc_offset_1:
+        return dt_fold_0
+
+    # note: if 'fold' changes the UTC offset, 'dt' is either non-existent (the clock jumped
+    #   forward) or ambiguous (the clock jumped backward). In both cases 'fold=0' means the UTC
+    #   offset before the transition.
+    if utc_offset_0 < utc_offset_1:  # type: ignore
+        # Non-existent: pytz uses the UTC offset before the transition.
+        return dt_fold_0
+    # Ambiguous: pytz prefers standard time over DST and, if that does not disambiguate, the
+    #   UTC offset after the transition.
+    is_dst_0 = bool(dt_fold_0.dst())
+    is_dst_1 = bool(dt_fold_1.dst())
+    if is_dst_0 != is_dst_1 and not is_dst_0:
+        return dt_fold_0
+    return dt_fold_1
+
+
+def _calc_tz_localizer_table(
+    tz: PytzTimezone,
+) -> Tuple[List[datetime], List[PytzTimezone], List[timedelta]]:
+    """
+    Return the local time intervals in which the result of ``tz.localize`` does not change.
+
+    The intervals are given by their start (the first one starts at
+    :attr:`datetime.min`), the tzinfo that ``tz.localize`` sets for the
+    naive datetimes in them, and its UTC offset.
+
+    """
+    utc_transition_times = getattr(tz, '_utc_transition_times', None)
+    if not utc_transition_times:
+        # e.g. UTC or a 'StaticTzInfo': the result of 'localize' is always 'dt.replace(tzinfo=tz)'.
+        sample = tz.localize(datetime(2000, 1, 1))
+        return [datetime.min], [sample.tzinfo], [sample.utcoffset()]
+
+    transition_utc_offsets = [tz._tzinfos[info]._utcoffset for info in tz._transition_info]
+    candidate_boundaries = set()
+    for i, utc_transition_time in enumerate(utc_transition_times):
+        if i == 0:
+            # note: the first "transition" is 'datetime.min' (the start of the first interval).
+            continue
+        for utc_offset in (
+            timedelta(0), transition_utc_offsets[i - 1], transition_utc_offsets[i],
+        ):
+            for delta in _TZ_LOCALIZER_BOUNDARY_DELTAS:
+                candidate_boundaries.add(utc_transition_time + utc_offset + delta)
+
+    boundaries: List[datetime] = []
+    tzinfos: List[PytzTimezone] = []
+    utc_offsets: List[timedelta] = []
+    # note: 'localize' is not evaluated at 'datetime.min' because it would overflow.
+    for boundary, sample_dt in [(datetime.min, datetime.min + timedelta(days=2))] + [
+        (boundary, boundary) for boundary in sorted(candidate_boundaries)
+    ]:
+        sample = tz.localize(sample_dt)
+        if tzinfos and sample.tzinfo is tzinfos[-1]:
+            continue
+        boundaries.append(boundary)
+        tzinfos.append(sample.tzinfo)
+        utc_offsets.append(sample.utcoffset())
+
+    return boundaries, tzinfos, utc_offsets
@@ -19,9 +19,17 @@ It is used by various Web technologies such as SOAP, SAML, and others.
 
 
 """
+import contextlib
+import dataclasses
+import hashlib
 import logging
+import mmap
 import os
-from typing import IO
+import threading
+import time
+from typing import (
+    Any, Dict, IO, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union,
+)
 
 import defusedxml
 import defusedxml.lxml
@@ -33,9 +41,44 @@ from lxml.etree import ElementBase as XmlElement  # noqa: F401
 from lxml.etree import _ElementTree as XmlElementTree  # noqa: F401
 from lxml.etree import XMLSchema as XmlSchema  # noqa: F401
 
+from . import instrumentation_utils
+
 
 logger = logging.getLogger(__name__)
 
+_xml_parser_tls = threading.local()
+"""Thread-local storage of the hardened XML parser of each thread (see :func:`_get_xml_parser`)."""
+
+_XML_SCHEMA_VALIDATION_LOCKS = tuple(threading.Lock() for _ in range(64))
+"""
+Locks that serialize the validations against the same XML schema object
+(see :func:`_get_xml_schema_validation_lock`).
+"""
+
+
+PARSE_UNTRUSTED_XML_STREAM_DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+"""
+Default max size (in bytes) of the XML-encoded content of a stream.
+"""
+
+PARSE_UNTRUSTED_XML_STREAM_DEFAULT_CHUNK_SIZE = 64 * 1024
+"""
+Default size (in bytes) of each read from a stream of XML-encoded content.
+"""
+
+SII_XML_SCHEMAS_DIR_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        'data/ref/factura_electronica/schemas-xml',
+    )
+)
+"""
+Path of the directory of the XML schemas of the SII that are bundled with this library.
+"""
+
+_XML_BUFFER_CHUNK_SIZE = 1024 * 1024
+"""Size (in bytes) of each chunk of a buffer (e.g. a memory-mapped file) fed to an XML parser."""
+
 
 XML_DSIG_NS_MAP = dict(
     ds='http://www.w3.org/2000/09/xmldsig#',
@@ -54,6 +97,22 @@ Source:
 https://github.com/XML-Security/signxml/blob/16503242/signxml/__init__.py#L23-L31
 """
 
+XML_DSIG_DIGEST_METHOD_ALGORITHMS = {
+    'http://www.w3.org/2000/09/xmldsig#sha1': 'sha1',
+    'http://www.w3.org/2001/04/xmldsig-more#sha224': 'sha224',
+    'http://www.w3.org/2001/04/xmlenc#sha256': 'sha256',
+    'http://www.w3.org/2001/04/xmldsig-more#sha384': 'sha384',
+    'http://www.w3.org/2001/04/xmlenc#sha512': 'sha512',
+}
+"""
+Mapping from XML Signature ``DigestMethod`` algorithm identifier to :mod:`hashlib` algorithm name.
+"""
+
+C14nDigestMemo = Dict[Tuple[XmlElement, str, bool, bool], Tuple[bytes, bytes]]
+"""
+Memo of :func:`c14n_digest`: a dict, to be used with a single XML document.
+"""
+
 
 ###############################################################################
 # exceptions
@@ -91,6 +150,13 @@ class XmlFeatureForbidden(BaseXmlParsingError):
     """
 
 
+class XmlSizeLimitExceeded(BaseXmlParsingError):
+
+    """
+    The XML-encoded content to be parsed is bigger than the max allowed size.
+    """
+
+
 class UnknownXmlParsingError(BaseXmlParsingError):
 
     """
@@ -108,6 +174,46 @@ class XmlSchemaDocValidationError(Exception):
     """
     XML document did not be validate against an XML schema.
 
+    The message is that of the first validation error. The details of each
+    error are in :attr:`errors`.
+
+    """
+
+    def __init__(self, *args: object, errors: Sequence['XmlSchemaDocValidationErrorEntry'] = ()):
+        super().__init__(*args)
+        self.errors = tuple(errors)
+
+
+@dataclasses.dataclass(frozen=True)
+class XmlSchemaDocValidationErrorEntry:
+
+    """
+    Details of an error of the validation of an XML document against an XML schema.
+    """
+
+    message: str
+    """
+    Error message e.g. ``"Element '{http://www.sii.cl/SiiDte}Foo': This element is not expected."``.
+    """
+
+    line: int
+    """
+    Line of the XML document (``0`` if unknown).
+    """
+
+    path: Optional[str]
+    """
+    XPath of the element in the XML document e.g. ``'/*/*[1]/*[1]/*[1]/*[3]'``.
+    """
+
+    element: Optional[str]
+    """
+    Tag of the element e.g. ``'{http://www.sii.cl/SiiDte}Foo'``.
+    """
+
+    domain: str
+    """
+    Part of libxml2 that reported the error e.g. ``'SCHEMASV'`` (schema validation).
     """
 
 
@@ -115,10 +221,16 @@ class XmlSchemaDocValidationError(Exception):
 # functions
 ###############################################################################
 
-def parse_untrusted_xml(value: bytes) -> XmlElement:
+@instrumentation_utils.instrument_stage(
+    'xml_utils.parse_untrusted_xml', input_size=instrumentation_utils.bytes_input_size)
+def parse_untrusted_xml(value: Union[bytes, bytearray, memoryview]) -> XmlElement:
     """
     Parse XML-encoded content in value.
 
+    If ``value`` is a ``bytearray`` or ``memoryview``, it is fed to the
+    parser in chunks instead of being copied to a ``bytes`` object, although
+    the messages of some syntax errors may be different.
+
     .. note::
         It is ok to use it for parsing untrusted or unauthenticated data.
         See https://docs.python.org/3/library/xml.html#xml-vulnerabilities
@@ -137,29 +249,622 @@ def parse_untrusted_xml(value: bytes) -> XmlElement:
 
     """
     # TODO: limit input max size (it might not be straightforward if value is a generator, which
-    #   would be desirable).
+    #   would be desirable). For file-like objects use 'parse_untrusted_xml_stream'.
 
+    if isinstance(value, (bytearray, memoryview)):
+        # note: lxml does not parse objects that support the buffer protocol, except 'bytes'.
+        return _parse_untrusted_xml_chunks(
+            _iter_buffer_chunks(memoryview(value).cast('B'), _XML_BUFFER_CHUNK_SIZE))
     if not isinstance(value, bytes):
         raise TypeError("Value to be parsed as XML must be bytes.")
 
     # note: with this call, 'defusedxml' will
-    # - create a custom parser (instance of 'lxml.etree.XMLParser'), which is what will
+    # - use the given custom parser (instance of 'lxml.etree.XMLParser'), which is what will
     #   fundamentally add safety to the parsing (e.g. using 'defusedxml.lxml.RestrictedElement'
     #   as a custom version of 'lxml.etree.ElementBase'),
     # - call the original 'lxml.etree.fromstring' (binary code),
     # - run 'defusedxml.lxml.check_docinfo'.
 
-    # warning: do NOT change the exception handling order.
-    try:
-
+    with _map_xml_parsing_errors(value):
         xml_root_em = defusedxml.lxml.fromstring(
             text=value,
-            parser=None,           # default: None (a custom one will be created)
-            base_url=None,         # default: None
-            forbid_dtd=False,      # default: False (allow Document Type Definition)
-            forbid_entities=True,  # default: True (forbid Entity definitions/declarations)
+            parser=_get_xml_parser(),  # default: None ('defusedxml' default parser)
+            base_url=None,             # default: None
+            forbid_dtd=False,          # default: False (allow Document Type Definition)
+            forbid_entities=True,      # default: True (forbid Entity definitions/declarations)
         )  # type: XmlElement
 
+    return xml_root_em
+
+
+@instrumentation_utils.instrument_stage('xml_utils.parse_untrusted_xml_stream')
+def parse_untrusted_xml_stream(
+    fileobj: IO[bytes],
+    max_bytes: int = PARSE_UNTRUSTED_XML_STREAM_DEFAULT_MAX_BYTES,
+    chunk_size: int = PARSE_UNTRUSTED_XML_STREAM_DEFAULT_CHUNK_SIZE,
+) -> XmlElement:
+    """
+    Parse XML-encoded content read from bytes stream ``fileobj``.
+
+    The content is read and parsed incrementally, in chunks of size
+    ``chunk_size``, thus it is not necessary to have all of it in memory
+    (as bytes) at the same time. Reading stops as soon as the size of the
+    content exceeds ``max_bytes``.
+
+    Other than that, it is equivalent to :func:`parse_untrusted_xml` (with the
+    same protections and exceptions), although the messages of some syntax
+    errors may be different.
+
+    :param fileobj: bytes stream e.g. a file opened in binary mode
+    :param max_bytes: max size of the content
+    :param chunk_size: size of each read from ``fileobj``
+    :raises TypeError: if ``fileobj`` does not return bytes
+    :raises ValueError: if ``max_bytes`` or ``chunk_size`` are not positive
+    :raises XmlSizeLimitExceeded: if the content is bigger than ``max_bytes``
+    :raises XmlSyntaxError: if it is not syntactically valid XML
+    :raises XmlFeatureForbidden: if the parsed XML document contains/uses a
+        feature that is forbidden
+    :raises UnknownXmlParsingError: unkwnown XML parsing error or for which
+        there is no handling implementation
+
+    """
+    if max_bytes <= 0:
+        raise ValueError("Value of 'max_bytes' must be positive.")
+    if chunk_size <= 0:
+        raise ValueError("Value of 'chunk_size' must be positive.")
+
+    return _parse_untrusted_xml_chunks(
+        _iter_stream_chunks(fileobj, chunk_size), max_bytes=max_bytes)
+
+
+@instrumentation_utils.instrument_stage('xml_utils.parse_untrusted_xml_file')
+def parse_untrusted_xml_file(
+    path: Union[str, os.PathLike],
+    max_bytes: Optional[int] = None,
+) -> XmlElement:
+    """
+    Parse XML-encoded content of the file at ``path``.
+
+    The file is memory-mapped and fed to the parser in chunks, thus the
+    memory used (other than that of the parsed XML document) does not depend
+    on the size of the file, unlike ``parse_untrusted_xml(f.read())``.
+
+    Other than that, it is equivalent to :func:`parse_untrusted_xml` (with the
+    same protections and exceptions), although the messages of some syntax
+    errors may be different.
+
+    :param path: path of the file
+    :param max_bytes: max size of the file (``None`` means no limit)
+    :raises OSError: if the file can not be read
+    :raises XmlSizeLimitExceeded: if the file is bigger than ``max_bytes``
+    :raises XmlSyntaxError: if it is not syntactically valid XML
+    :raises XmlFeatureForbidden: if the parsed XML document contains/uses a
+        feature that is forbidden
+    :raises UnknownXmlParsingError: unkwnown XML parsing error or for which
+        there is no handling implementation
+
+    """
+    with open(path, mode='rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if max_bytes is not None and file_size > max_bytes:
+            raise XmlSizeLimitExceeded(
+                "XML content exceeds the max allowed size ({} bytes).".format(max_bytes))
+        if file_size == 0:
+            # note: an empty file can not be memory-mapped.
+            return _parse_untrusted_xml_chunks(())
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as file_mmap:
+            return _parse_untrusted_xml_chunks(
+                _iter_buffer_chunks(file_mmap, _XML_BUFFER_CHUNK_SIZE))
+
+
+def read_xml_schema(filename: str) -> XmlSchema:
+    """
+    Instantiate an XML schema object from a file.
+
+    :raises ValueError: if there is no file at ``filename``
+
+    """
+    if os.path.exists(filename) and os.path.isfile(filename):
+        return XmlSchema(file=filename)
+    raise ValueError("XML schema file not found.", filename)
+
+
+def validate_xml_doc(
+    xml_schema: XmlSchema,
+    xml_doc: XmlElement,
+    max_errors: Optional[int] = None,
+) -> None:
+    """
+    Validate ``xml_doc`` against XML schema ``xml_schema``.
+
+    .. note:: The whole document is validated even if ``max_errors`` is set
+        (libxml2 does not support stopping early), but the details of only
+        the first ``max_errors`` errors are collected.
+
+    .. note:: It is thread-safe: validations against the same ``xml_schema``
+        object are serialized, because its error log is shared by all of
+        them. Threads that must validate in parallel should use their own
+        schema objects (see :class:`XmlSchemaRegistry`).
+
+    :param xml_schema: XML schema
+    :param xml_doc: XML document
+    :param max_errors: max number of errors whose details are included in
+        the exception (``None`` means no limit). It only truncates the
+        details; it does not stop the validation early.
+    :raises XmlSchemaDocValidationError: if ``xml_doc`` did not be validate
+        against ``xml_schema``
+
+    """
+    # There are several ways to validate 'xml_doc' according to an 'xml_schema'.
+    #   Different calls and what happens if validation passes or fails:
+    #   - xml_schema.assert_(xml_doc): nothign / raises 'AssertionError'
+    #   - xml_schema.assertValid(xml_doc): nothing / raises 'DocumentInvalid'
+    #   - xml_schema.validate(xml_doc): returns True / returns False
+    # note: it is not necessary to clear 'xml_schema.error_log' afterwards: it holds the errors
+    #   of the last validation only (each validation starts with an empty one).
+    # note: 'xml_schema.error_log' is shared by all the validations against 'xml_schema', and
+    #   libxml2 releases the GIL while validating, so that the errors of concurrent validations
+    #   would be mixed up. Hence the lock is held until the errors have been collected.
+
+    with _get_xml_schema_validation_lock(xml_schema):
+        try:
+            xml_schema.assertValid(xml_doc)
+        except lxml.etree.DocumentInvalid as exc:
+            # note: 'exc.error_log' and 'xml_schema.error_log' are the same object
+            #   (type 'lxml.etree._ListErrorLog').
+
+            # Simplest and safest way to get the error message.
+            # Error example:
+            #   "Element 'DTE': No matching global declaration available for the validation root., line 2"  # noqa: E501
+            validation_error_msg = str(exc)
+            validation_errors = _get_xml_schema_validation_errors(
+                exc.error_log, xml_doc, max_errors=max_errors)
+
+            raise XmlSchemaDocValidationError(
+                validation_error_msg, errors=validation_errors) from exc
+
+
+def write_xml_doc(xml_doc: XmlElement, output: IO[bytes]) -> None:
+    """
+    Write ``xml_doc`` to bytes stream ``output``.
+
+    In this context, "write" means "serialize", so there are a number of
+    observations on that regard:
+
+    * Encoding will be preserved.
+    * XML declaration (``<?xml ... ?>``) will be included.
+    * Quoting of each XML declaration attribute's value may change
+      i.e. from ``"`` to ``'`` or viceversa.
+    * In self-closing tags, the whitespace between the last attribute
+      and the closing (``/>``) may be removed e.g.
+      ``<DigestMethod Algorithm="http://www.w3.org/2000/09/xmldsig#sha1" />`` to
+      ``<DigestMethod Algorithm="http://www.w3.org/2000/09/xmldsig#sha1"/>``
+    * No pretty-print.
+
+    For a temporary bytes stream in memory you may create a
+    :class:`io.BytesIO` object.
+
+    """
+    # note: use `IO[X]` for arguments and `TextIO`/`BinaryIO` for return types (says GVR).
+    #   https://github.com/python/typing/issues/518#issuecomment-350903120
+
+    xml_etree: XmlElementTree = xml_doc.getroottree()
+
+    # See:
+    #   https://lxml.de/api/lxml.etree._ElementTree-class.html#write
+    xml_etree.write(
+        file=output,
+        encoding=xml_etree.docinfo.encoding,
+        # alternatives: 'xml', 'html', 'text' or 'c14n'
+        method='xml',
+        # note: include XML declaration (`<?xml ... ?>`).
+        xml_declaration=True,
+        pretty_print=False,
+        # note: we are not sure what this does.
+        # default: True.
+        with_tail=True,
+    )
+
+
+def c14n_digest(
+    xml_em: XmlElement,
+    algorithm: str = 'sha1',
+    exclusive: bool = False,
+    with_comments: bool = False,
+    memo: Optional[C14nDigestMemo] = None,
+) -> Tuple[bytes, bytes]:
+    """
+    Return the canonical form (C14N 1.0) of ``xml_em`` and its digest.
+
+    It is useful to compute or verify the ``DigestValue`` of a
+    ``Reference`` of an XML Signature (e.g. the one of the ``Documento`` of a
+    DTE, whose canonicalization is inclusive and the digest algorithm SHA-1).
+
+    If ``memo`` is given, the result is saved in it, and if the result for
+    ``xml_em`` (and the same options) is already in it, it is returned
+    without computing it again.
+
+    .. warning:: A memo must be discarded if the XML document is modified.
+
+    :param xml_em: XML element; it may be the root or any other of an XML document
+    :param algorithm: name of a :mod:`hashlib` algorithm e.g. ``'sha256'``,
+        or an XML Signature ``DigestMethod`` algorithm identifier
+        (see :data:`XML_DSIG_DIGEST_METHOD_ALGORITHMS`)
+    :param exclusive: whether to use the exclusive canonicalization
+    :param with_comments: whether to keep the comments
+    :param memo: dict created by the caller (see :data:`C14nDigestMemo`)
+    :returns: canonical form (UTF-8 encoded), and its digest
+    :raises ValueError: if ``algorithm`` is not supported
+
+    """
+    # note: the element is part of the key (instead of 'id(xml_em)') so that it is kept alive by
+    #   the memo; lxml returns the same Python object for the same XML node while it is alive.
+    memo_key = (xml_em, algorithm, exclusive, with_comments)
+    if memo is not None:
+        try:
+            return memo[memo_key]
+        except KeyError:
+            pass
+
+    hasher = hashlib.new(XML_DSIG_DIGEST_METHOD_ALGORITHMS.get(algorithm, algorithm))
+
+    if exclusive:
+        xml_em_c14n = lxml.etree.tostring(
+            xml_em, method='c14n', exclusive=True, with_comments=with_comments)
+    else:
+        # warning: libxml2's inclusive canonicalization of an element that is not the root is
+        #   wrong if the element inherits the default namespace (it adds 'xmlns=""' to its
+        #   children) or it may fail (raises 'C14NError'). As a workaround, the element is
+        #   serialized (with the namespace declarations of its ancestors) and parsed again, and
+        #   the resulting document is canonicalized.
+        xml_em_copy = lxml.etree.fromstring(
+            lxml.etree.tostring(xml_em, with_tail=False),
+            parser=_get_xml_parser(),
+        )
+        xml_em_c14n = lxml.etree.tostring(
+            xml_em_copy, method='c14n', exclusive=False, with_comments=with_comments)
+
+    hasher.update(xml_em_c14n)
+    result = (xml_em_c14n, hasher.digest())
+
+    if memo is not None:
+        memo[memo_key] = result
+    return result
+
+
+def c14n_digest_many(
+    xml_ems: Iterable[XmlElement],
+    algorithm: str = 'sha1',
+    exclusive: bool = False,
+    with_comments: bool = False,
+    memo: Optional[C14nDigestMemo] = None,
+) -> List[Tuple[bytes, bytes]]:
+    """
+    Return the canonical form and digest of each element in ``xml_ems``.
+
+    Same as calling :func:`c14n_digest` for each element, with the same
+    ``memo`` (a new one if it is not given), thus the result for an element
+    that is repeated is computed only once.
+
+    """
+    if memo is None:
+        memo = {}
+    return [
+        c14n_digest(
+            xml_em,
+            algorithm=algorithm,
+            exclusive=exclusive,
+            with_comments=with_comments,
+            memo=memo,
+        )
+        for xml_em in xml_ems
+    ]
+
+
+class XmlDocIncrementalWriter:
+
+    """
+    Incremental writer of an XML document to bytes stream ``output``.
+
+    Unlike :func:`write_xml_doc`, it is not necessary to have the whole XML
+    document in memory: elements are opened and closed with
+    :meth:`element`, and each subtree written with :meth:`write` is
+    serialized immediately (and may be discarded afterwards). Thus the memory
+    used does not depend on the size of the document.
+
+    It is based on :func:`lxml.etree.xmlfile`. The same observations of
+    :func:`write_xml_doc` apply (e.g. no pretty-print). A subtree whose
+    namespace is the same as the one of the element it is written in
+    (re)declares it, which is valid XML.
+
+    .. warning:: If an exception is raised within the ``with`` block, the
+        content written to ``output`` is not a well-formed XML document.
+
+    Usage::
+
+        with XmlDocIncrementalWriter(f, encoding='ISO-8859-1') as writer:
+            with writer.element('{http://www.sii.cl/SiiDte}EnvioDTE', {'version': '1.0'}):
+                with writer.element('{http://www.sii.cl/SiiDte}SetDTE', {'ID': 'SetDoc'}):
+                    writer.write(caratula_em)
+                    for dte_xml_doc in dte_xml_docs:
+                        writer.write(dte_xml_doc)
+
+    :param output: bytes stream
+    :param encoding: encoding of the XML document
+    :param xml_declaration: whether to include the XML declaration
+        (``<?xml ... ?>``)
+
+    """
+
+    def __init__(
+        self,
+        output: IO[bytes],
+        encoding: str = 'UTF-8',
+        xml_declaration: bool = True,
+    ) -> None:
+        self._output = output
+        self._encoding = encoding
+        self._xml_declaration = xml_declaration
+        self._xml_file: Optional[contextlib.AbstractContextManager] = None
+        self._writer: Any = None
+        self._open_elements_count = 0
+
+    def __enter__(self) -> 'XmlDocIncrementalWriter':
+        if self._writer is not None:
+            raise RuntimeError("Writer is already in use.")
+
+        self._xml_file = lxml.etree.xmlfile(self._output, encoding=self._encoding)
+        self._writer = self._xml_file.__enter__()
+        if self._xml_declaration:
+            self._writer.write_declaration()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        assert self._xml_file is not None
+        try:
+            self._xml_file.__exit__(*exc_info)
+        finally:
+            self._xml_file = None
+            self._writer = None
+
+    @contextlib.contextmanager
+    def element(
+        self,
+        tag: str,
+        attrib: Optional[Mapping[str, str]] = None,
+        nsmap: Optional[Mapping[Optional[str], str]] = None,
+    ) -> Iterator[None]:
+        """
+        Return a context manager that opens element ``tag`` and closes it on exit.
+
+        If the element is the root one, ``tag`` is namespaced
+        (e.g. ``'{http://www.sii.cl/SiiDte}EnvioDTE'``) and ``nsmap`` is not
+        set, the namespace is declared as the default one.
+
+        :param tag: tag of the element
+        :param attrib: attributes of the element
+        :param nsmap: mapping of namespace prefixes to be declared in the element
+
+        """
+        writer = self._get_writer()
+        if nsmap is None and self._open_elements_count == 0 and tag.startswith('{'):
+            nsmap = {None: lxml.etree.QName(tag).namespace}
+
+        with writer.element(tag, attrib=attrib or {}, nsmap=nsmap):
+            self._open_elements_count += 1
+            try:
+                yield
+            finally:
+                self._open_elements_count -= 1
+
+    def write(self, xml_em: XmlElement) -> None:
+        """
+        Write (serialize) subtree ``xml_em``, without its tail.
+        """
+        self._get_writer().write(xml_em, with_tail=False)
+
+    def flush(self) -> None:
+        """
+        Write the buffered content to ``output``.
+        """
+        self._get_writer().flush()
+
+    def _get_writer(self) -> Any:
+        if self._writer is None:
+            raise RuntimeError("Writer must be used within a 'with' block.")
+        return self._writer
+
+
+@dataclasses.dataclass
+class XmlSchemaCompileStats:
+
+    """
+    Statistics of the compilations of an XML schema by an :class:`XmlSchemaRegistry`.
+    """
+
+    count: int = 0
+    """
+    Number of compilations (more than 1 only if the schemas are per thread).
+    """
+
+    duration: float = 0.0
+    """
+    Total duration of the compilations, in seconds.
+    """
+
+
+class XmlSchemaRegistry:
+
+    """
+    Registry of XML schemas, each of them compiled on first use.
+
+    Compiling an XML schema takes a few milliseconds (tens for the biggest
+    ones e.g. ``AEC_v10.xsd``), thus it should not be done for each XML
+    document to be validated.
+
+    The name of each schema is the name of its file e.g. ``'DTE_v10.xsd'``.
+    The schema for an XML element is detected from its tag (namespace and
+    name), which must be the name of an element declared at the top level
+    of the schema file (not of the files it includes or imports).
+
+    .. note:: Validating against a schema object is thread-safe, but the
+        validations against the same object are serialized (see
+        :func:`validate_xml_doc`). For threads to validate in parallel, use
+        ``per_thread=True``, at the cost of one compilation per thread.
+
+    :param schema_paths: paths of the XML schema files
+    :param per_thread: whether each thread compiles and uses its own schema
+        objects, instead of sharing them with the other threads of the process
+
+    """
+
+    def __init__(
+        self,
+        schema_paths: Iterable[Union[str, os.PathLike]],
+        per_thread: bool = False,
+    ) -> None:
+        self._schema_paths: Dict[str, str] = {
+            os.path.basename(path): os.fspath(path) for path in schema_paths
+        }
+        self._per_thread = per_thread
+
+        self._lock = threading.Lock()
+        self._schemas: Dict[str, XmlSchema] = {}
+        self._schemas_tls = threading.local()
+        self._compile_stats: Dict[str, XmlSchemaCompileStats] = {}
+        self._schema_names_by_tag: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_dir(
+        cls,
+        dir_path: Union[str, os.PathLike],
+        per_thread: bool = False,
+    ) -> 'XmlSchemaRegistry':
+        """
+        Create a registry of the XML schema files (``*.xsd``) in a directory.
+        """
+        return cls(
+            schema_paths=[
+                os.path.join(dir_path, filename)
+                for filename in sorted(os.listdir(dir_path))
+                if filename.endswith('.xsd')
+            ],
+            per_thread=per_thread,
+        )
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Names of the registered XML schemas.
+        """
+        return list(self._schema_paths)
+
+    @property
+    def compile_stats(self) -> Dict[str, XmlSchemaCompileStats]:
+        """
+        Statistics of the compilations of each XML schema compiled so far.
+        """
+        with self._lock:
+            return {
+                name: dataclasses.replace(stats) for name, stats in self._compile_stats.items()
+            }
+
+    def get(self, name: str) -> XmlSchema:
+        """
+        Return the XML schema named ``name``, compiling it if necessary.
+
+        :raises KeyError: if there is no XML schema named ``name``
+
+        """
+        if self._per_thread:
+            try:
+                schemas = self._schemas_tls.schemas
+            except AttributeError:
+                schemas = self._schemas_tls.schemas = {}
+            if name not in schemas:
+                schemas[name], duration = self._compile(name)
+                with self._lock:
+                    self._add_compile_stats(name, duration)
+            return schemas[name]
+
+        try:
+            return self._schemas[name]
+        except KeyError:
+            pass
+        # note: the lock is held while compiling so that a schema is not compiled by several
+        #   threads at the same time.
+        with self._lock:
+            if name not in self._schemas:
+                self._schemas[name], duration = self._compile(name)
+                self._add_compile_stats(name, duration)
+            return self._schemas[name]
+
+    def get_name_for_tag(self, tag: str) -> Optional[str]:
+        """
+        Return the name of the XML schema that declares the element ``tag``, if any.
+
+        :param tag: tag of an XML element e.g. ``'{http://www.sii.cl/SiiDte}DTE'``
+
+        """
+        if self._schema_names_by_tag is None:
+            schema_names_by_tag: Dict[str, str] = {}
+            for name, path in self._schema_paths.items():
+                for em_tag in _read_xml_schema_element_tags(path):
+                    schema_names_by_tag.setdefault(em_tag, name)
+            self._schema_names_by_tag = schema_names_by_tag
+
+        return self._schema_names_by_tag.get(tag)
+
+    def get_for_xml_doc(self, xml_doc: XmlElement) -> XmlSchema:
+        """
+        Return the XML schema for ``xml_doc``, detected from its tag.
+
+        :raises ValueError: if there is no XML schema for ``xml_doc``
+
+        """
+        name = self.get_name_for_tag(xml_doc.tag)
+        if name is None:
+            raise ValueError("There is no XML schema for the XML element.", xml_doc.tag)
+        return self.get(name)
+
+    def _compile(self, name: str) -> Tuple[XmlSchema, float]:
+        path = self._schema_paths[name]
+        start = time.perf_counter()
+        schema = read_xml_schema(path)
+        return schema, time.perf_counter() - start
+
+    def _add_compile_stats(self, name: str, duration: float) -> None:
+        stats = self._compile_stats.setdefault(name, XmlSchemaCompileStats())
+        stats.count += 1
+        stats.duration += duration
+
+
+SII_XML_SCHEMA_REGISTRY = XmlSchemaRegistry.from_dir(SII_XML_SCHEMAS_DIR_PATH)
+"""
+Registry of the XML schemas of the SII that are bundled with this library.
+
+Its schema objects are shared by all the threads, thus the validations
+against each of them are serialized (see :func:`validate_xml_doc`).
+"""
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+@contextlib.contextmanager
+def _map_xml_parsing_errors(content_head: bytes) -> Iterator[None]:
+    """
+    Map the exceptions raised while parsing XML to those of this module.
+
+    :param content_head: the beginning of the XML-encoded content (for logging)
+
+    """
+    # warning: do NOT change the exception handling order.
+    try:
+        yield
+
     except (defusedxml.DTDForbidden,
             defusedxml.EntitiesForbidden,
             defusedxml.ExternalReferenceForbidden) as exc:
@@ -202,7 +907,7 @@ def parse_untrusted_xml(value: bytes) -> XmlElement:
         # For sanity crop the XML-encoded content to max 1 KiB (arbitrary value).
         log_msg = "Unexpected XML 'ExpatError' at line {} offset {}: {}. Content: %s".format(
             exc.lineno, exc.offset, xml.parsers.expat.errors.messages[exc.code])
-        logger.exception(log_msg, str(value[:1024]))
+        logger.exception(log_msg, str(bytes(content_head[:1024])))
 
         exc_msg = "Unexpected error while parsing value as XML. Line {}, offset {}.".format(
             exc.lineno, exc.offset)
@@ -215,7 +920,7 @@ def parse_untrusted_xml(value: bytes) -> XmlElement:
 
         # For sanity crop the XML-encoded content to max 1 KiB (arbitrary value).
         log_msg = "Unexpected 'LxmlError' that is not an 'XMLSyntaxError'. Content: %s"
-        logger.exception(log_msg, str(value[:1024]))
+        logger.exception(log_msg, str(bytes(content_head[:1024])))
 
         exc_msg = "Unexpected error while parsing value as XML."
         raise UnknownXmlParsingError(exc_msg) from exc
@@ -227,99 +932,163 @@ def parse_untrusted_xml(value: bytes) -> XmlElement:
 
         # For sanity crop the XML-encoded content to max 1 KiB (arbitrary value).
         log_msg = "Unexpected error while parsing value as XML. Content: %s"
-        logger.exception(log_msg, str(value[:1024]))
+        logger.exception(log_msg, str(bytes(content_head[:1024])))
 
         exc_msg = "Unexpected error while parsing value as XML."
         raise UnknownXmlParsingError(exc_msg) from exc
 
-    return xml_root_em
-
 
-def read_xml_schema(filename: str) -> XmlSchema:
+def _parse_untrusted_xml_chunks(
+    chunks: Iterable[bytes],
+    max_bytes: Optional[int] = None,
+) -> XmlElement:
     """
-    Instantiate an XML schema object from a file.
+    Parse XML-encoded content from ``chunks``, with a new hardened XML parser.
 
-    :raises ValueError: if there is no file at ``filename``
+    :raises XmlSizeLimitExceeded: if the content is bigger than ``max_bytes``
+    :raises: same as :func:`parse_untrusted_xml`
 
     """
-    if os.path.exists(filename) and os.path.isfile(filename):
-        return XmlSchema(file=filename)
-    raise ValueError("XML schema file not found.", filename)
+    # note: a new parser is used (instead of the one of this thread) because if the parsing is
+    #   interrupted (e.g. an exception), the parser would be left in an inconsistent state.
+    parser = _create_xml_parser()
+    # note: it is a 'bytearray' because it is updated in-place after being passed to
+    #   '_map_xml_parsing_errors'.
+    content_head = bytearray()
+    content_size = 0
+
+    with _map_xml_parsing_errors(content_head):
+        for chunk in chunks:
+            content_size += len(chunk)
+            if max_bytes is not None and content_size > max_bytes:
+                raise XmlSizeLimitExceeded(
+                    "XML content exceeds the max allowed size ({} bytes).".format(max_bytes))
+            if len(content_head) < 1024:
+                # For logging of unexpected errors.
+                content_head += chunk[:1024 - len(content_head)]
+
+            parser.feed(chunk)
+
+        # note: 'parser.close()' raises 'XMLSyntaxError' if the content is empty.
+        xml_root_em = parser.close()  # type: XmlElement
+        defusedxml.lxml.check_docinfo(
+            xml_root_em.getroottree(),
+            forbid_dtd=False,      # same as 'parse_untrusted_xml'
+            forbid_entities=True,  # same as 'parse_untrusted_xml'
+        )
 
+    return xml_root_em
 
-def validate_xml_doc(xml_schema: XmlSchema, xml_doc: XmlElement) -> None:
-    """
-    Validate ``xml_doc`` against XML schema ``xml_schema``.
 
-    :raises XmlSchemaDocValidationError: if ``xml_doc`` did not be validate
-        against ``xml_schema``
+def _iter_stream_chunks(fileobj: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not isinstance(chunk, bytes):
+            raise TypeError("Stream to be parsed as XML must return bytes.")
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_buffer_chunks(value: Union[memoryview, mmap.mmap], chunk_size: int) -> Iterator[bytes]:
+    # note: only a chunk at a time is copied to a 'bytes' object.
+    for start in range(0, len(value), chunk_size):
+        yield bytes(value[start:start + chunk_size])
+
 
+def _get_xml_schema_validation_lock(xml_schema: XmlSchema) -> threading.Lock:
     """
-    # There are several ways to validate 'xml_doc' according to an 'xml_schema'.
-    #   Different calls and what happens if validation passes or fails:
-    #   - xml_schema.assert_(xml_doc): nothign / raises 'AssertionError'
-    #   - xml_schema.assertValid(xml_doc): nothing / raises 'DocumentInvalid'
-    #   - xml_schema.validate(xml_doc): returns True / returns False
+    Return the lock that serializes the validations against ``xml_schema``.
 
-    try:
-        xml_schema.assertValid(xml_doc)
-    except lxml.etree.DocumentInvalid as exc:
-        # note: 'exc.error_log' and 'xml_schema.error_log' are the same object
-        #   (type 'lxml.etree._ListErrorLog').
+    """
+    # note: XML schema objects can be neither weak-referenced nor given new attributes, so a lock
+    #   per object would have to keep the object alive. Instead, the object is mapped to one of
+    #   a fixed set of locks: two schema objects may share a lock, which only serializes more
+    #   than necessary, and an 'id' reused after an object is gone is harmless.
+    # note: the low bits of an 'id' (a memory address) are always zero due to alignment.
+    index = (id(xml_schema) >> 4) % len(_XML_SCHEMA_VALIDATION_LOCKS)
+    return _XML_SCHEMA_VALIDATION_LOCKS[index]
+
+
+def _get_xml_schema_validation_errors(
+    error_log: Any,
+    xml_doc: XmlElement,
+    max_errors: Optional[int] = None,
+) -> List[XmlSchemaDocValidationErrorEntry]:
+    # note: 'error_log' is a 'lxml.etree._ListErrorLog', which is not available as a type.
+    xml_etree: XmlElementTree = xml_doc.getroottree()
+    errors = []
 
-        # TODO: advanced error details parsing, without leaking too much information.
-        # xml_error_log = exc.error_log  # type: lxml.etree._ListErrorLog
-        # last_xml_error = exc.error_log.last_error  # type: lxml.etree._LogEntry
-        # last_xml_error_xml_doc_line = last_xml_error.line
+    for error_log_entry in error_log:
+        if max_errors is not None and len(errors) >= max_errors:
+            break
 
-        # TODO: does 'xml_schema.error_log' persist? is it necessary to clear it afterwards?
-        #   `xml_schema._clear_error_log()`
+        element = None
+        if error_log_entry.path:
+            try:
+                path_ems = xml_etree.xpath(error_log_entry.path)
+            except lxml.etree.XPathError:
+                path_ems = []
+            if path_ems and isinstance(path_ems[0], lxml.etree._Element):
+                element = path_ems[0].tag
 
-        # Simplest and safest way to get the error message.
-        # Error example:
-        #   "Element 'DTE': No matching global declaration available for the validation root., line 2"  # noqa: E501
-        validation_error_msg = str(exc)
+        errors.append(XmlSchemaDocValidationErrorEntry(
+            message=error_log_entry.message,
+            line=error_log_entry.line,
+            path=error_log_entry.path or None,
+            element=element,
+            domain=error_log_entry.domain_name,
+        ))
 
-        raise XmlSchemaDocValidationError(validation_error_msg) from exc
+    return errors
 
 
-def write_xml_doc(xml_doc: XmlElement, output: IO[bytes]) -> None:
+def _read_xml_schema_element_tags(path: str) -> List[str]:
+    # note: the XML schema file is trusted, and it is not compiled (just parsed).
+    xs_ns = 'http://www.w3.org/2001/XMLSchema'
+    xml_schema_root_em = lxml.etree.parse(path, parser=_get_xml_parser()).getroot()
+    target_namespace = xml_schema_root_em.get('targetNamespace')
+
+    return [
+        '{%s}%s' % (target_namespace, em.get('name')) if target_namespace else em.get('name')
+        for em in xml_schema_root_em.iterfind('{%s}element' % xs_ns)
+    ]
+
+
+def _get_xml_parser() -> lxml.etree.XMLParser:
     """
-    Write ``xml_doc`` to bytes stream ``output``.
+    Return the hardened XML parser of the current thread.
 
-    In this context, "write" means "serialize", so there are a number of
-    observations on that regard:
+    Creating a parser is relatively expensive (compared to parsing a small
+    XML document) so each thread reuses its own. Parsers are not shared
+    between threads because they are not thread-safe.
 
-    * Encoding will be preserved.
-    * XML declaration (``<?xml ... ?>``) will be included.
-    * Quoting of each XML declaration attribute's value may change
-      i.e. from ``"`` to ``'`` or viceversa.
-    * In self-closing tags, the whitespace between the last attribute
-      and the closing (``/>``) may be removed e.g.
-      ``<DigestMethod Algorithm="http://www.w3.org/2000/09/xmldsig#sha1" />`` to
-      ``<DigestMethod Algorithm="http://www.w3.org/2000/09/xmldsig#sha1"/>``
-    * No pretty-print.
+    """
+    try:
+        return _xml_parser_tls.parser
+    except AttributeError:
+        pass
+
+    parser = _create_xml_parser()
+    _xml_parser_tls.parser = parser
+    return parser
 
-    For a temporary bytes stream in memory you may create a
-    :class:`io.BytesIO` object.
 
+def _create_xml_parser() -> lxml.etree.XMLParser:
     """
-    # note: use `IO[X]` for arguments and `TextIO`/`BinaryIO` for return types (says GVR).
-    #   https://github.com/python/typing/issues/518#issuecomment-350903120
+    Create a hardened XML parser.
 
-    xml_etree: XmlElementTree = xml_doc.getroottree()
+    The parser has the same security-related settings as the default parser
+    of :mod:`defusedxml.lxml` (see ``defusedxml.lxml.GlobalParserTLS``), but
+    it is not that one, which can be replaced by any code
+    (``defusedxml.lxml.setDefaultParser``).
 
-    # See:
-    #   https://lxml.de/api/lxml.etree._ElementTree-class.html#write
-    xml_etree.write(
-        file=output,
-        encoding=xml_etree.docinfo.encoding,
-        # alternatives: 'xml', 'html', 'text' or 'c14n'
-        method='xml',
-        # note: include XML declaration (`<?xml ... ?>`).
-        xml_declaration=True,
-        pretty_print=False,
-        # note: we are not sure what this does.
-        # default: True.
-        with_tail=True,
+    """
+    parser = lxml.etree.XMLParser(
+        resolve_entities=False,
+        no_network=True,  # lxml's default
+        huge_tree=False,  # lxml's default
     )
+    parser.set_element_class_lookup(
+        lxml.etree.ElementDefaultClassLookup(element=defusedxml.lxml.RestrictedElement))
+    return parser
@@ -98,7 +98,7 @@ class RcvCsvRowSchema(marshmallow.Schema):
         required=True,
         load_from='Fecha Docto',
     )
-    fecha_recepcion_datetime = marshmallow.fields.DateTime(
+    fecha_recepcion_datetime = mm_utils.CustomMarshmallowDateTimeField(
         format='%d/%m/%Y %H:%M:%S',  # e.g. '23/10/2018 01:54:13'
         required=True,
         load_from='Fecha Recepcion',
@@ -0,0 +1,660 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the main processing pipelines of this library.
+
+Each benchmark case runs a pipeline of stages (e.g. for a DTE XML document:
+parse, clean, validate and extract its data) over a collection of inputs,
+and reports for each stage the number of items processed per second, the
+p50 and p99 latencies (per sample, e.g. a document) and the peak RSS of
+the process. Each case runs in a new process, thus the peak RSS of a case
+is not affected by the others. The pipeline runs a few times before
+sampling ("warm-up"), so that one-off costs (e.g. building a schema or a
+cache) are not measured.
+
+If no corpus directory is given, a synthetic corpus of DTE XML documents is
+generated in a temporary directory (see ``scripts/gen_dte_xml_corpus.py``).
+
+The results are saved as JSON so that they can be compared between
+releases of this library, or between environments.
+
+
+Example::
+
+    ./scripts/benchmark.py run --output='benchmark-results-0.6.2.json'
+
+    ./scripts/benchmark.py run --corpus-dir='/tmp/dte-xml-corpus/' --cases dte-small rut \
+        --output='benchmark-results.json'
+
+    ./scripts/benchmark.py compare 'benchmark-results-0.6.2.json' 'benchmark-results.json'
+
+
+"""
+import argparse
+import base64
+import dataclasses
+import io
+import json
+import multiprocessing
+import os
+import pathlib
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import cl_sii  # noqa: F401
+except ImportError:
+    # If package 'cl-sii' is not installed, try appending the project repo directory to the
+    #   Python path, assuming that this script is in the project repo. If not, it will fail
+    #   nonetheless.
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import cl_sii  # noqa: F401
+
+import lxml.etree
+
+import cl_sii.dte.parse
+import cl_sii.rcv
+from cl_sii.libs import encoding_utils, tz_utils, xml_utils
+from cl_sii.rut import Rut
+
+import gen_dte_xml_corpus
+
+
+TEST_DATA_DTE_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent.joinpath(
+    'tests', 'test_data', 'sii-dte')
+
+Stage = Tuple[str, Callable[[Any], Any]]
+"""Name of a stage of a pipeline, and function that processes the output of the previous one."""
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkInputs:
+    samples: List[Any]
+    """Inputs of the first stage of the pipeline."""
+    items_per_sample: int = 1
+    """Number of items (e.g. documents, rows) in each sample, for the throughput."""
+    sample_size_bytes: Optional[float] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class StageResult:
+    case: str
+    stage: str
+    samples: int
+    items_per_sample: float
+    sample_size_bytes: Optional[float]
+    items_per_s: float
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    peak_rss_kib: int
+
+
+###############################################################################
+# main functions
+###############################################################################
+
+def run_benchmark_case(
+    case: str,
+    corpus_dir_path: pathlib.Path,
+    repeat: int,
+    max_samples: int,
+    warmup: int = 3,
+) -> List[StageResult]:
+    """
+    Run benchmark case ``case`` and return the results of each stage.
+
+    Before sampling, the pipeline runs ``warmup`` times (over the first
+    samples), so that one-off costs (e.g. compiling an XML schema) are not
+    measured.
+
+    .. warning:: The peak RSS is that of the whole process, thus this function
+        should run in a dedicated process.
+
+    """
+    inputs_loader, stages = BENCHMARK_CASES[case]
+    inputs = inputs_loader(corpus_dir_path, max_samples)
+
+    for warmup_index in range(warmup):
+        value = inputs.samples[warmup_index % len(inputs.samples)]
+        for _, stage_func in stages:
+            value = stage_func(value)
+
+    stages_durations: Dict[str, List[float]] = {stage_name: [] for stage_name, _ in stages}
+    for _ in range(repeat):
+        for sample in inputs.samples:
+            value = sample
+            for stage_name, stage_func in stages:
+                start = time.perf_counter()
+                value = stage_func(value)
+                stages_durations[stage_name].append(time.perf_counter() - start)
+
+    # note: the unit of 'ru_maxrss' is kibibytes in Linux but bytes in macOS.
+    peak_rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_rss_kib //= 1024
+
+    return [
+        _calc_stage_result(
+            case=case,
+            stage=stage_name,
+            durations=stages_durations[stage_name],
+            inputs=inputs,
+            peak_rss_kib=peak_rss_kib,
+        )
+        for stage_name, _ in stages
+    ]
+
+
+def run_benchmark(
+    cases: Sequence[str],
+    corpus_dir_path: pathlib.Path,
+    repeat: int,
+    max_samples: int,
+    warmup: int = 3,
+) -> Dict[str, Any]:
+    """
+    Run each of the benchmark ``cases`` in a new process.
+
+    :return: data of the environment and results, serializable as JSON
+
+    """
+    results: List[StageResult] = []
+    mp_context = multiprocessing.get_context('spawn')
+    for case in cases:
+        with mp_context.Pool(processes=1) as pool:
+            case_results = pool.apply(
+                run_benchmark_case, (case, corpus_dir_path, repeat, max_samples, warmup))
+        for result in case_results:
+            print(_format_stage_result(result))
+        results.extend(case_results)
+
+    return dict(
+        meta=dict(
+            cl_sii_version=cl_sii.__version__,
+            python_version=platform.python_version(),
+            python_implementation=platform.python_implementation(),
+            lxml_version=lxml.etree.__version__,
+            libxml2_version='.'.join(str(x) for x in lxml.etree.LIBXML_VERSION),
+            platform=platform.platform(),
+            cpu_count=os.cpu_count(),
+            created=datetime.now(tz=timezone.utc).isoformat(timespec='seconds'),
+            repeat=repeat,
+            max_samples=max_samples,
+            warmup=warmup,
+        ),
+        results=[dataclasses.asdict(result) for result in results],
+    )
+
+
+def compare_benchmark_results(
+    old_results: Dict[str, Any],
+    new_results: Dict[str, Any],
+) -> List[str]:
+    """
+    Compare the p50 latency and throughput of the stages in both results.
+
+    :return: lines of a text table
+
+    """
+    old_by_key = {(r['case'], r['stage']): r for r in old_results['results']}
+    lines = [
+        f"{'case':<16} {'stage':<24} {'p50 old (ms)':>13} {'p50 new (ms)':>13} "
+        f"{'items/s old':>12} {'items/s new':>12} {'speedup':>8}"
+    ]
+    for new in new_results['results']:
+        old = old_by_key.get((new['case'], new['stage']))
+        if old is None:
+            continue
+        lines.append(
+            f"{new['case']:<16} {new['stage']:<24} {old['p50_ms']:>13.4f} {new['p50_ms']:>13.4f} "
+            f"{old['items_per_s']:>12.1f} {new['items_per_s']:>12.1f} "
+            f"{new['items_per_s'] / old['items_per_s']:>7.2f}x"
+        )
+    return lines
+
+
+###############################################################################
+# benchmark cases
+###############################################################################
+
+def _load_dte_fixtures(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # Real DTE XML documents (e.g. with missing namespace or "DocPersonalizado"), not cleaned.
+    file_paths = sorted(
+        p for p in TEST_DATA_DTE_DIR_PATH.glob('DTE--*.xml')
+        if '--cleaned' not in p.name)
+    return _load_files(file_paths[:max_samples])
+
+
+def _load_dte_small(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # The smaller half of the DTE XML documents.
+    file_paths = _sorted_by_size(corpus_dir_path.glob('dte/*/*.xml'))
+    return _load_files(file_paths[:len(file_paths) // 2][:max_samples])
+
+
+def _load_dte_medium(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # The biggest 5% of the DTE XML documents (many "detalle" items).
+    file_paths = _sorted_by_size(corpus_dir_path.glob('dte/*/*.xml'))
+    return _load_files(file_paths[-max(1, len(file_paths) // 20):][:max_samples])
+
+
+def _load_envio_dte_huge(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # The biggest "EnvioDTE" XML documents (up to 2000 DTEs each).
+    file_paths = _sorted_by_size(corpus_dir_path.glob('envio-dte/*.xml'))
+    file_paths = file_paths[-max(1, min(max_samples, len(file_paths) // 10)):]
+    inputs = _load_files(file_paths)
+    dte_count = sum(
+        len(xml_utils.parse_untrusted_xml(sample).findall(
+            'sii-dte:SetDTE/sii-dte:DTE', namespaces=cl_sii.dte.parse.DTE_XMLNS_MAP))
+        for sample in inputs.samples)
+    return dataclasses.replace(inputs, items_per_sample=dte_count // len(inputs.samples))
+
+
+def _load_xml_small(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # Small XML documents, for which the fixed cost per document dominates.
+    samples = [
+        (f'<?xml version="1.0" encoding="ISO-8859-1"?>\n<root id="{index}">'
+         + ''.join(f'<item n="{n}">value {n}</item>' for n in range(index % 10 + 1))
+         + '</root>').encode('ISO-8859-1')
+        for index in range(max_samples)
+    ]
+    return BenchmarkInputs(
+        samples=samples,
+        sample_size_bytes=statistics.mean(len(sample) for sample in samples),
+    )
+
+
+def _load_dte_small_cleaned(
+    corpus_dir_path: pathlib.Path,
+    max_samples: int,
+) -> BenchmarkInputs:
+    # Same as 'dte-small', but parsed and cleaned (i.e. ready to be validated).
+    inputs = _load_dte_small(corpus_dir_path, max_samples)
+    return dataclasses.replace(
+        inputs,
+        samples=[
+            _clean_dte_xml(xml_utils.parse_untrusted_xml(sample)) for sample in inputs.samples
+        ],
+    )
+
+
+def _load_xml_schema_compile(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # note: each sample is a compilation; there is no input.
+    return BenchmarkInputs(samples=[None] * max(1, max_samples // 100))
+
+
+def _load_rut(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # Each sample is a batch of RUT values in different formats.
+    rng = random.Random(0)
+    batch_size = 1000
+    samples = []
+    for _ in range(max_samples):
+        batch = []
+        for _ in range(batch_size):
+            digits = rng.randint(1000000, 99999999)
+            value = f'{digits:,}'.replace(',', '.') if rng.random() < 0.5 else str(digits)
+            batch.append(f'{value}-{Rut.calc_dv(str(digits))}')
+        samples.append(batch)
+    return BenchmarkInputs(samples=samples, items_per_sample=batch_size)
+
+
+def _load_base64(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # Each sample is a batch of base64-encoded values like those of the signature of a DTE (i.e.
+    #   signature values and certificates), wrapped in lines of 76 characters.
+    rng = random.Random(0)
+    batch_size = 100
+    samples = []
+    for _ in range(max_samples):
+        batch = []
+        for i in range(batch_size):
+            value_size = 128 if i % 2 == 0 else 1300
+            value = bytes(rng.getrandbits(8) for _ in range(value_size))
+            batch.append(base64.encodebytes(value).decode('ascii'))
+        samples.append(batch)
+    return BenchmarkInputs(samples=samples, items_per_sample=batch_size)
+
+
+def _load_rcv(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # Each sample is a RCV CSV file.
+    rng = random.Random(0)
+    rows_count = 1000
+    header = (
+        'Nro;Tipo Doc;Tipo Compra;RUT Proveedor;Razon Social;Folio;Fecha Docto;'
+        'Fecha Recepcion;Fecha Acuse;Monto Exento;Monto Neto;Monto IVA Recuperable;'
+        'Monto Iva No Recuperable;Codigo IVA No Rec.;Monto Total;Monto Neto Activo Fijo;'
+        'IVA Activo Fijo;IVA uso Comun;Impto. Sin Derecho a Credito;IVA No Retenido;'
+        'Tabacos Puros;Tabacos Cigarrillos;Tabacos Elaborados;NCE o NDE sobre Fact. de Compra;'
+        'Codigo Otro Impuesto;Valor Otro Impuesto;Tasa Otro Impuesto'
+    )
+    samples = []
+    for _ in range(max(1, max_samples // 10)):
+        rows = [header]
+        for row_number in range(1, rows_count + 1):
+            digits = rng.randint(1000000, 99999999)
+            monto_neto = rng.randint(1000, 10000000)
+            monto_iva = round(monto_neto * 0.19)
+            rows.append(
+                f'{row_number};33;Del Giro;{digits}-{Rut.calc_dv(str(digits))};'
+                f'EMPRESA {digits} LIMITADA;{rng.randint(1, 999999)};'
+                f'{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2019;'
+                f'{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2019 '
+                f'{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d};'
+                f';0;{monto_neto};{monto_iva};0;;{monto_neto + monto_iva};;;;;;;;;;;;'
+            )
+        samples.append('\r\n'.join(rows) + '\r\n')
+    return BenchmarkInputs(
+        samples=samples,
+        items_per_sample=rows_count,
+        sample_size_bytes=statistics.mean(len(sample) for sample in samples),
+    )
+
+
+def _load_tz(corpus_dir_path: pathlib.Path, max_samples: int) -> BenchmarkInputs:
+    # Each sample is a batch of naive datetimes like those of the RCV and DTE data (i.e. in the
+    #   timezone of Santiago), some of them around DST transitions.
+    rng = random.Random(0)
+    batch_size = 1000
+    min_dt = datetime(2018, 1, 1)
+    samples = []
+    for _ in range(max_samples):
+        samples.append([
+            min_dt + timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600))
+            for _ in range(batch_size)
+        ])
+    return BenchmarkInputs(samples=samples, items_per_sample=batch_size)
+
+
+def _clean_dte_xml(xml_doc: xml_utils.XmlElement) -> xml_utils.XmlElement:
+    xml_doc, _ = cl_sii.dte.parse.clean_dte_xml(
+        xml_doc, set_missing_xmlns=True, remove_doc_personalizado=True)
+    return xml_doc
+
+
+def _validate_dte_xml(xml_doc: xml_utils.XmlElement) -> xml_utils.XmlElement:
+    cl_sii.dte.parse.validate_dte_xml(xml_doc)
+    return xml_doc
+
+
+def _validate_xml_doc_envio_dte_schema(xml_doc: xml_utils.XmlElement) -> xml_utils.XmlElement:
+    xml_utils.validate_xml_doc(cl_sii.dte.parse.DTE_XML_SCHEMA_OBJ, xml_doc)
+    return xml_doc
+
+
+def _validate_xml_doc_dte_schema(xml_doc: xml_utils.XmlElement) -> xml_utils.XmlElement:
+    xml_utils.validate_xml_doc(cl_sii.dte.parse.DTE_XML_DTE_SCHEMA_OBJ, xml_doc)
+    return xml_doc
+
+
+def _parse_dte_xml_data(
+    parse_func: Callable[[xml_utils.XmlElement], Any],
+) -> Callable[[xml_utils.XmlElement], xml_utils.XmlElement]:
+    # note: the XML doc is returned (instead of the data) so that each level is parsed from it.
+    def stage_func(xml_doc: xml_utils.XmlElement) -> xml_utils.XmlElement:
+        parse_func(xml_doc)
+        return xml_doc
+
+    return stage_func
+
+
+def _parse_envio_dte_xml_dtes(xml_doc: xml_utils.XmlElement) -> list:
+    return [
+        cl_sii.dte.parse.parse_dte_xml(dte_xml_em)
+        for dte_xml_em in xml_doc.iterfind(
+            'sii-dte:SetDTE/sii-dte:DTE', namespaces=cl_sii.dte.parse.DTE_XMLNS_MAP)
+    ]
+
+
+def _clean_base64_values(values: List[str]) -> List[str]:
+    for value in values:
+        encoding_utils.clean_base64(value)
+    # note: the values are returned for the next stage.
+    return values
+
+
+def _decode_base64_strict_values(values: List[str]) -> List[str]:
+    for value in values:
+        encoding_utils.decode_base64_strict(value)
+    return values
+
+
+def _pytz_localize_dts(values: List[datetime]) -> List[datetime]:
+    tz = tz_utils.get_tz('America/Santiago', backend=tz_utils.TZ_BACKEND_PYTZ)
+    for value in values:
+        tz.localize(value)
+    return values
+
+
+def _convert_naive_dts_to_tz_aware(backend: str) -> Callable[[List[datetime]], List[datetime]]:
+    def stage_func(values: List[datetime]) -> List[datetime]:
+        tz = tz_utils.get_tz('America/Santiago', backend=backend)
+        for value in values:
+            tz_utils.convert_naive_dt_to_tz_aware(value, tz)
+        return values
+
+    return stage_func
+
+
+def _convert_naive_dts_to_tz_aware_many(
+    backend: str,
+) -> Callable[[List[datetime]], List[datetime]]:
+    def stage_func(values: List[datetime]) -> List[datetime]:
+        tz_utils.convert_naive_dts_to_tz_aware(
+            values, tz_utils.get_tz('America/Santiago', backend=backend))
+        return values
+
+    return stage_func
+
+
+def _process_rcv_csv_file(value: str) -> int:
+    return cl_sii.rcv.process_rcv_csv_file(
+        io.StringIO(value), rcv_owner_rut='76354771-K', row_data_handler=lambda *args: None)
+
+
+BENCHMARK_CASES: Dict[
+    str,
+    Tuple[Callable[[pathlib.Path, int], BenchmarkInputs], Sequence[Stage]],
+] = {
+    'dte-fixtures': (_load_dte_fixtures, [
+        ('parse_untrusted_xml', xml_utils.parse_untrusted_xml),
+        ('clean_dte_xml', _clean_dte_xml),
+        ('validate_dte_xml', _validate_dte_xml),
+        ('parse_dte_xml', cl_sii.dte.parse.parse_dte_xml),
+    ]),
+    'dte-small': (_load_dte_small, [
+        ('parse_untrusted_xml', xml_utils.parse_untrusted_xml),
+        ('clean_dte_xml', _clean_dte_xml),
+        ('validate_dte_xml', _validate_dte_xml),
+        ('parse_dte_xml', cl_sii.dte.parse.parse_dte_xml),
+    ]),
+    'dte-medium': (_load_dte_medium, [
+        ('parse_untrusted_xml', xml_utils.parse_untrusted_xml),
+        ('clean_dte_xml', _clean_dte_xml),
+        ('validate_dte_xml', _validate_dte_xml),
+        ('parse_dte_xml', cl_sii.dte.parse.parse_dte_xml),
+    ]),
+    'envio-dte-huge': (_load_envio_dte_huge, [
+        ('parse_untrusted_xml', xml_utils.parse_untrusted_xml),
+        ('validate_dte_xml', _validate_dte_xml),
+        ('parse_dte_xml', _parse_envio_dte_xml_dtes),
+    ]),
+    'dte-schema': (_load_dte_small_cleaned, [
+        ('validate EnvioDTE_v10', _validate_xml_doc_envio_dte_schema),
+        ('validate DTE_v10', _validate_xml_doc_dte_schema),
+    ]),
+    'dte-data-levels': (_load_dte_small_cleaned, [
+        ('parse_dte_xml_data_l0', _parse_dte_xml_data(cl_sii.dte.parse.parse_dte_xml_data_l0)),
+        ('parse_dte_xml_data_l1', _parse_dte_xml_data(cl_sii.dte.parse.parse_dte_xml_data_l1)),
+        ('parse_dte_xml', _parse_dte_xml_data(cl_sii.dte.parse.parse_dte_xml)),
+    ]),
+    'schema-compile': (_load_xml_schema_compile, [
+        ('compile EnvioDTE_v10', lambda _: xml_utils.read_xml_schema(
+            os.path.join(xml_utils.SII_XML_SCHEMAS_DIR_PATH, 'EnvioDTE_v10.xsd'))),
+        ('compile DTE_v10', lambda _: xml_utils.read_xml_schema(
+            os.path.join(xml_utils.SII_XML_SCHEMAS_DIR_PATH, 'DTE_v10.xsd'))),
+    ]),
+    'xml-small': (_load_xml_small, [
+        ('parse_untrusted_xml', xml_utils.parse_untrusted_xml),
+    ]),
+    'rut': (_load_rut, [
+        ('Rut', lambda values: [Rut(value) for value in values]),
+        ('Rut.canonical', lambda ruts: [rut.canonical for rut in ruts]),
+    ]),
+    'base64': (_load_base64, [
+        ('clean_base64', _clean_base64_values),
+        ('decode_base64_strict', _decode_base64_strict_values),
+        ('decode_b64_strict_many', encoding_utils.decode_base64_strict_many),
+    ]),
+    'rcv': (_load_rcv, [
+        ('process_rcv_csv_file', _process_rcv_csv_file),
+    ]),
+    # note: the 'zoneinfo' stages are skipped if module 'zoneinfo' is not available (it requires
+    #   Python 3.9+ or package 'backports.zoneinfo').
+    'tz': (_load_tz, [
+        ('pytz localize', _pytz_localize_dts),
+        ('convert pytz', _convert_naive_dts_to_tz_aware(tz_utils.TZ_BACKEND_PYTZ)),
+        ('convert_many pytz', _convert_naive_dts_to_tz_aware_many(tz_utils.TZ_BACKEND_PYTZ)),
+        *([
+            ('convert zoneinfo', _convert_naive_dts_to_tz_aware(tz_utils.TZ_BACKEND_ZONEINFO)),
+            ('convert_many zoneinfo', _convert_naive_dts_to_tz_aware_many(
+                tz_utils.TZ_BACKEND_ZONEINFO)),
+        ] if tz_utils.zoneinfo is not None else []),
+    ]),
+}
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+def _sorted_by_size(file_paths: Any) -> List[pathlib.Path]:
+    return sorted(file_paths, key=lambda p: (p.stat().st_size, p.name))
+
+
+def _load_files(file_paths: Sequence[pathlib.Path]) -> BenchmarkInputs:
+    if not file_paths:
+        raise ValueError("There are no input files for the benchmark case.")
+    samples = [p.read_bytes() for p in file_paths]
+    return BenchmarkInputs(
+        samples=samples,
+        sample_size_bytes=statistics.mean(len(sample) for sample in samples),
+    )
+
+
+def _percentile(sorted_values: Sequence[float], percent: float) -> float:
+    # Nearest-rank method.
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _calc_stage_result(
+    case: str,
+    stage: str,
+    durations: List[float],
+    inputs: BenchmarkInputs,
+    peak_rss_kib: int,
+) -> StageResult:
+    durations_sorted = sorted(durations)
+    total_duration = sum(durations)
+    return StageResult(
+        case=case,
+        stage=stage,
+        samples=len(durations),
+        items_per_sample=inputs.items_per_sample,
+        sample_size_bytes=inputs.sample_size_bytes,
+        items_per_s=len(durations) * inputs.items_per_sample / total_duration,
+        mean_ms=total_duration / len(durations) * 1000,
+        p50_ms=_percentile(durations_sorted, 50) * 1000,
+        p99_ms=_percentile(durations_sorted, 99) * 1000,
+        peak_rss_kib=peak_rss_kib,
+    )
+
+
+def _format_stage_result(result: StageResult) -> str:
+    return (
+        f"{result.case:<16} {result.stage:<24} {result.items_per_s:>12.1f} items/s  "
+        f"p50 {result.p50_ms:>10.4f} ms  p99 {result.p99_ms:>10.4f} ms  "
+        f"peak RSS {result.peak_rss_kib / 1024:>7.1f} MiB"
+    )
+
+
+def _gen_corpus(output_dir_path: pathlib.Path, count: int, seed: int) -> None:
+    print(f"Generating synthetic DTE XML corpus in '{output_dir_path}'.")
+    gen_dte_xml_corpus.gen_dte_xml_corpus(
+        output_dir_path=output_dir_path,
+        count=count,
+        seed=seed,
+        write_envio_dte_files=False,
+    )
+    # A few "EnvioDTE" with many DTEs.
+    gen_dte_xml_corpus.gen_dte_xml_corpus(
+        output_dir_path=output_dir_path,
+        count=gen_dte_xml_corpus.ENVIO_DTE_MAX_SIZE * 4,
+        seed=seed,
+        emisores_count=4,
+        envio_dte_size=gen_dte_xml_corpus.ENVIO_DTE_MAX_SIZE,
+        write_dte_files=False,
+    )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = arg_parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run')
+    run_parser.add_argument(
+        '--corpus-dir', type=pathlib.Path, default=None,
+        help="directory generated by 'gen_dte_xml_corpus.py' (default: generate one)")
+    run_parser.add_argument('--corpus-count', type=int, default=2000)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument(
+        '--cases', nargs='+', choices=sorted(BENCHMARK_CASES), default=list(BENCHMARK_CASES))
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--max-samples', type=int, default=500)
+    run_parser.add_argument(
+        '--warmup', type=int, default=3,
+        help="number of runs of the pipeline before sampling")
+    run_parser.add_argument('--output', type=pathlib.Path, default=None)
+
+    compare_parser = subparsers.add_parser('compare')
+    compare_parser.add_argument('old_results', type=pathlib.Path)
+    compare_parser.add_argument('new_results', type=pathlib.Path)
+
+    args = arg_parser.parse_args()
+
+    if args.command == 'run':
+        with tempfile.TemporaryDirectory() as temp_dir_path:
+            corpus_dir_path = args.corpus_dir
+            if corpus_dir_path is None:
+                corpus_dir_path = pathlib.Path(temp_dir_path)
+                _gen_corpus(corpus_dir_path, count=args.corpus_count, seed=args.seed)
+
+            results = run_benchmark(
+                cases=args.cases,
+                corpus_dir_path=corpus_dir_path,
+                repeat=args.repeat,
+                max_samples=args.max_samples,
+                warmup=args.warmup,
+            )
+
+        if args.output is not None:
+            with open(args.output, mode='w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Saved results to '{args.output}'.")
+    elif args.command == 'compare':
+        with open(args.old_results) as f:
+            old_results = json.load(f)
+        with open(args.new_results) as f:
+            new_results = json.load(f)
+        for line in compare_benchmark_results(old_results, new_results):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+"""
+Generate a synthetic corpus of DTE XML documents, for capacity planning and benchmarks.
+
+The corpus is reproducible: for the same arguments (including the seed) the
+generated files are byte-for-byte equal.
+
+The distributions of the kind of DTE ("tipo DTE"), the number of items
+("detalle") per DTE and the number of DTEs per "emisor" are skewed, similar
+to those observed in real data: most DTEs are "facturas electrónicas" with
+just one or a few items, and a few "emisores" issue most of the DTEs.
+
+The generated DTE XML documents are valid according to the DTE XML schema
+and are parsed by :func:`cl_sii.dte.parse.parse_dte_xml`, but their digital
+signatures are not valid: the signature value is random, and the
+certificates are taken from the test data of this project. The signature of
+each "EnvioDTE" is a placeholder.
+
+Output directory layout::
+
+    dte/<emisor RUT>/DTE--<emisor RUT>--<tipo DTE>--<folio>.xml
+    envio-dte/EnvioDTE--<emisor RUT>--<sequence number>.xml
+
+
+Example::
+
+    ./scripts/gen_dte_xml_corpus.py --count=10000 --seed=1 '/tmp/dte-xml-corpus/'
+
+
+Example for just a few big "EnvioDTE" (and no DTE files)::
+
+    ./scripts/gen_dte_xml_corpus.py --count=20000 --emisores=10 --envio-dte-size=2000 \
+        --no-dte-files '/tmp/dte-xml-corpus/'
+
+
+"""
+import argparse
+import base64
+import collections
+import dataclasses
+import os
+import pathlib
+import random
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, IO, List, Sequence, Set, Tuple
+
+try:
+    import cl_sii  # noqa: F401
+except ImportError:
+    # If package 'cl-sii' is not installed, try appending the project repo directory to the
+    #   Python path, assuming that this script is in the project repo. If not, it will fail
+    #   nonetheless.
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import cl_sii  # noqa: F401
+
+from cl_sii.dte import render
+from cl_sii.dte.constants import TipoDteEnum
+from cl_sii.dte.data_models import DteDataL2
+from cl_sii.dte.parse import DTE_XMLNS
+from cl_sii.libs import crypto_utils
+from cl_sii.libs import tz_utils
+from cl_sii.rut import Rut
+
+
+TEST_DATA_CERTS_DIR_PATH = pathlib.Path(__file__).resolve().parent.parent.joinpath(
+    'tests', 'test_data', 'sii-crypto')
+
+# note: only kinds of DTE whose data is in XML element 'Documento' (see 'cl_sii.dte.render').
+TIPO_DTE_WEIGHTS: Dict[TipoDteEnum, float] = {
+    TipoDteEnum.FACTURA_ELECTRONICA: 0.70,
+    TipoDteEnum.NOTA_CREDITO_ELECTRONICA: 0.12,
+    TipoDteEnum.FACTURA_NO_AFECTA_O_EXENTA_ELECTRONICA: 0.08,
+    TipoDteEnum.GUIA_DESPACHO_ELECTRONICA: 0.05,
+    TipoDteEnum.NOTA_DEBITO_ELECTRONICA: 0.03,
+    TipoDteEnum.FACTURA_COMPRA_ELECTRONICA: 0.02,
+}
+
+DETALLE_COUNT_PARETO_ALPHA = 1.5
+"""
+Shape of the (Pareto) distribution of the number of items per DTE.
+
+With a value of 1.5, about 65% of the DTEs have 1 item, 16% have 2 items
+and about 1% have 20 or more (up to the max, 60).
+"""
+DETALLE_COUNT_MAX = 60
+
+FECHA_EMISION_DATE_MIN = date(2019, 1, 1)
+FECHA_EMISION_DATE_MAX = date(2020, 12, 31)
+
+ENVIO_DTE_MAX_SIZE = 2000
+"""Max number of DTEs in an "EnvioDTE" (as per the XML schema)."""
+
+ENVIO_DTE_RUT_RECEPTOR = Rut('60803000-K')
+"""RUT of the SII, the "receptor" of every "EnvioDTE" sent to it."""
+
+_WORDS = (
+    'Aceros', 'Agrícola', 'Andes', 'Araucanía', 'Austral', 'Biobío', 'Cóndor', 'Comercial',
+    'Compañía', 'Construcción', 'Cordillera', 'Distribuidora', 'Energía', 'Exportadora',
+    'Ferretería', 'Forestal', 'Frutícola', 'Huemul', 'Importadora', 'Inversiones', 'Logística',
+    'Maderas', 'Minera', 'Ñandú', 'Pacífico', 'Pehuén', 'Servicios', 'Soluciones', 'Sur',
+    'Tecnología', 'Transportes', 'Valparaíso', 'Viñedos', 'Ñuble', 'Patagonia', 'Atacama',
+)
+_RAZON_SOCIAL_SUFFIXES = ('SpA', 'LIMITADA', 'S.A.', 'E.I.R.L.', 'Y CIA. LTDA.')
+_GIROS = (
+    'COMERCIALIZACION DE PRODUCTOS AGRICOLAS', 'SERVICIOS DE INGENIERIA Y CONSTRUCCION',
+    'VENTA AL POR MAYOR DE MATERIALES DE CONSTRUCCIÓN', 'TRANSPORTE DE CARGA POR CARRETERA',
+    'ASESORÍAS Y SERVICIOS INFORMÁTICOS', 'FABRICACIÓN DE PRODUCTOS DE MADERA',
+    'EXPORTACIÓN DE FRUTA FRESCA', 'ARRIENDO DE INMUEBLES AMOBLADOS',
+)
+_ITEM_NOUNS = (
+    'Servicio de transporte', 'Arriendo de equipo', 'Caja de tornillos', 'Plancha OSB',
+    'Asesoría mensual', 'Saco de cemento', 'Kg de cerezas', 'Licencia de software',
+    'Mantención preventiva', 'Pallet de madera', 'Honorarios', 'Flete Santiago-Concepción',
+)
+_ACTECO_CODES = (11101, 161000, 421000, 461001, 492300, 620200, 682000, 749009)
+
+
+@dataclasses.dataclass(frozen=True)
+class Emisor:
+    rut: Rut
+    razon_social: str
+    giro: str
+    email: str
+    acteco: Tuple[int, ...]
+    rut_envia: Rut
+    cert_der: bytes
+    signature_value_length: int
+    signature_key_info_xml: str
+
+
+###############################################################################
+# main functions
+###############################################################################
+
+def gen_dte_xml_corpus(
+    output_dir_path: pathlib.Path,
+    count: int,
+    seed: int,
+    emisores_count: int = 100,
+    envio_dte_size: int = 100,
+    write_dte_files: bool = True,
+    write_envio_dte_files: bool = True,
+    encoding: str = render.DEFAULT_ENCODING,
+) -> Tuple[int, int]:
+    """
+    Generate ``count`` synthetic DTE XML documents into ``output_dir_path``.
+
+    :param output_dir_path: path of the output directory (created if necessary)
+    :param count: number of DTEs
+    :param seed: seed of the pseudo-random number generator
+    :param emisores_count: number of distinct "emisores"
+    :param envio_dte_size: max number of DTEs per "EnvioDTE"
+    :param write_dte_files: whether to write one file per DTE
+    :param write_envio_dte_files: whether to write "EnvioDTE" files
+    :param encoding: encoding of the XML documents
+    :return: number of files written, and their size in bytes
+
+    """
+    if not 1 <= envio_dte_size <= ENVIO_DTE_MAX_SIZE:
+        raise ValueError(f"Value of 'envio_dte_size' must be between 1 and {ENVIO_DTE_MAX_SIZE}.")
+
+    rng = random.Random(seed)
+    certs_der = _read_certs_der(TEST_DATA_CERTS_DIR_PATH)
+    emisores = _gen_emisores(rng, certs_der, emisores_count)
+
+    # A few "emisores" issue most of the DTEs (Zipf's law).
+    emisor_dte_counts = collections.Counter(rng.choices(
+        range(emisores_count),
+        weights=[1 / rank for rank in range(1, emisores_count + 1)],
+        k=count))
+
+    files_count = 0
+    files_size = 0
+    # note: DTE file paths are derived from the natural key of the DTE; a repeated key would
+    #   silently overwrite a file.
+    dte_natural_keys: Set[Tuple[Rut, TipoDteEnum, int]] = set()
+    for emisor_index, emisor in enumerate(emisores):
+        emisor_dte_count = emisor_dte_counts[emisor_index]
+        folios: Dict[TipoDteEnum, int] = collections.defaultdict(int)
+
+        dte_dir_path = output_dir_path / 'dte' / emisor.rut.canonical
+        envio_dte_dir_path = output_dir_path / 'envio-dte'
+        if write_dte_files and emisor_dte_count:
+            dte_dir_path.mkdir(parents=True, exist_ok=True)
+        if write_envio_dte_files and emisor_dte_count:
+            envio_dte_dir_path.mkdir(parents=True, exist_ok=True)
+
+        for envio_dte_index, envio_dte_start in enumerate(
+                range(0, emisor_dte_count, envio_dte_size), start=1):
+            envio_dte_dte_count = min(envio_dte_size, emisor_dte_count - envio_dte_start)
+            tipos_dte = rng.choices(
+                list(TIPO_DTE_WEIGHTS), weights=list(TIPO_DTE_WEIGHTS.values()),
+                k=envio_dte_dte_count)
+
+            envio_dte_file = None
+            if write_envio_dte_files:
+                envio_dte_file_path = envio_dte_dir_path.joinpath(
+                    f'EnvioDTE--{emisor.rut.canonical}--{envio_dte_index}.xml')
+                envio_dte_file = open(envio_dte_file_path, mode='wb')
+                _write_envio_dte_head(rng, envio_dte_file, emisor, tipos_dte, encoding)
+
+            try:
+                for tipo_dte in tipos_dte:
+                    folios[tipo_dte] += 1
+                    dte, detalle_items = _gen_dte(rng, emisor, tipo_dte, folios[tipo_dte])
+                    dte_natural_key = (dte.emisor_rut, dte.tipo_dte, dte.folio)
+                    if dte_natural_key in dte_natural_keys:
+                        raise Exception("Natural key of DTE is repeated.", dte_natural_key)
+                    dte_natural_keys.add(dte_natural_key)
+
+                    if write_dte_files:
+                        dte_file_path = dte_dir_path.joinpath(
+                            f'DTE--{emisor.rut.canonical}--{tipo_dte.value}--{dte.folio}.xml')
+                        dte_xml_bytes = render.render_dte_xml(
+                            dte, encoding=encoding,
+                            emisor_acteco=emisor.acteco, detalle_items=detalle_items)
+                        dte_file_path.write_bytes(dte_xml_bytes)
+                        files_count += 1
+                        files_size += len(dte_xml_bytes)
+
+                    if envio_dte_file is not None:
+                        envio_dte_file.write(render.render_dte_xml(
+                            dte, encoding=encoding, xml_declaration=False,
+                            emisor_acteco=emisor.acteco, detalle_items=detalle_items))
+
+                if envio_dte_file is not None:
+                    _write_envio_dte_tail(envio_dte_file, emisor, encoding)
+                    files_count += 1
+                    files_size += envio_dte_file.tell()
+            finally:
+                if envio_dte_file is not None:
+                    envio_dte_file.close()
+
+    return files_count, files_size
+
+
+###############################################################################
+# helpers
+###############################################################################
+
+def _read_certs_der(dir_path: pathlib.Path) -> List[bytes]:
+    certs_der = [p.read_bytes() for p in sorted(dir_path.glob('*-cert.der'))]
+    if not certs_der:
+        raise FileNotFoundError(f"No certificate files in directory '{dir_path}'.")
+    return certs_der
+
+
+def _gen_rut(rng: random.Random, min_digits: int, max_digits: int) -> Rut:
+    digits = rng.randint(min_digits, max_digits)
+    return Rut(f'{digits}-{Rut.calc_dv(str(digits))}')
+
+
+def _gen_razon_social(rng: random.Random) -> str:
+    words = rng.sample(_WORDS, k=rng.randint(1, 3))
+    return ' '.join(words + [rng.choice(_RAZON_SOCIAL_SUFFIXES)])
+
+
+def _gen_emisores(rng: random.Random, certs_der: Sequence[bytes], count: int) -> List[Emisor]:
+    emisores: List[Emisor] = []
+    ruts: Set[Rut] = set()
+    while len(emisores) < count:
+        emisor = _gen_emisor(rng, certs_der)
+        # The RUT of an "emisor" must be unique, otherwise their files would collide.
+        if emisor.rut not in ruts:
+            ruts.add(emisor.rut)
+            emisores.append(emisor)
+    return emisores
+
+
+def _gen_emisor(rng: random.Random, certs_der: Sequence[bytes]) -> Emisor:
+    rut = _gen_rut(rng, 76000000, 77999999)
+    razon_social = _gen_razon_social(rng)
+    cert_der = rng.choice(certs_der)
+    cert_public_numbers = crypto_utils.load_der_x509_cert(cert_der) \
+        .public_key().public_numbers()  # type: ignore
+    modulus, exponent = (
+        base64.standard_b64encode(
+            value.to_bytes((value.bit_length() + 7) // 8, 'big')).decode('ascii')
+        for value in (cert_public_numbers.n, cert_public_numbers.e)
+    )
+
+    return Emisor(
+        rut=rut,
+        razon_social=razon_social,
+        giro=rng.choice(_GIROS),
+        email=f'dte@{razon_social.split()[0].lower()}.example.cl',
+        acteco=tuple(rng.sample(_ACTECO_CODES, k=rng.randint(1, 4))),
+        rut_envia=_gen_rut(rng, 5000000, 25999999),
+        cert_der=cert_der,
+        signature_value_length=(cert_public_numbers.n.bit_length() + 7) // 8,
+        signature_key_info_xml=(
+            '<KeyInfo>'
+            f'<KeyValue><RSAKeyValue><Modulus>{modulus}</Modulus>'
+            f'<Exponent>{exponent}</Exponent></RSAKeyValue></KeyValue>'
+            '<X509Data><X509Certificate>'
+            f'{base64.standard_b64encode(cert_der).decode("ascii")}'
+            '</X509Certificate></X509Data>'
+            '</KeyInfo>'
+        ),
+    )
+
+
+def _gen_dte(
+    rng: random.Random,
+    emisor: Emisor,
+    tipo_dte: TipoDteEnum,
+    folio: int,
+) -> Tuple[DteDataL2, List[Tuple[str, int]]]:
+    detalle_count = min(DETALLE_COUNT_MAX, int(rng.paretovariate(DETALLE_COUNT_PARETO_ALPHA)))
+    detalle_items = [
+        (
+            f'{rng.choice(_ITEM_NOUNS)} {rng.choice(_WORDS)} #{rng.randint(1, 99999)}',
+            int(rng.lognormvariate(11, 1.5)) + 1,
+        )
+        for _ in range(detalle_count)
+    ]
+
+    fecha_emision_date = FECHA_EMISION_DATE_MIN + timedelta(
+        days=rng.randint(0, (FECHA_EMISION_DATE_MAX - FECHA_EMISION_DATE_MIN).days))
+    fecha_vencimiento_date = None
+    if tipo_dte.is_factura and rng.random() < 0.6:
+        fecha_vencimiento_date = fecha_emision_date + timedelta(days=rng.choice((30, 60, 90)))
+    firma_documento_dt_naive = datetime.combine(fecha_emision_date, datetime.min.time()) \
+        + timedelta(seconds=rng.randint(8 * 3600, 2 * 86400))
+
+    dte = DteDataL2(
+        emisor_rut=emisor.rut,
+        tipo_dte=tipo_dte,
+        folio=folio,
+        fecha_emision_date=fecha_emision_date,
+        receptor_rut=_gen_rut(rng, 1000000, 99999999),
+        monto_total=sum(item_monto for _, item_monto in detalle_items),
+        emisor_razon_social=emisor.razon_social,
+        receptor_razon_social=_gen_razon_social(rng),
+        fecha_vencimiento_date=fecha_vencimiento_date,
+        firma_documento_dt=tz_utils.convert_naive_dt_to_tz_aware(
+            dt=firma_documento_dt_naive, tz=DteDataL2.DATETIME_FIELDS_TZ),
+        signature_value=rng.getrandbits(emisor.signature_value_length * 8).to_bytes(
+            emisor.signature_value_length, 'big'),
+        signature_x509_cert_der=emisor.cert_der,
+        emisor_giro=emisor.giro,
+        emisor_email=emisor.email if rng.random() < 0.5 else None,
+        receptor_email=None,
+    )
+    return dte, detalle_items
+
+
+def _write_envio_dte_head(
+    rng: random.Random,
+    output: IO[bytes],
+    emisor: Emisor,
+    tipos_dte: Sequence[TipoDteEnum],
+    encoding: str,
+) -> None:
+    tipos_dte_counts = collections.Counter(tipos_dte)
+    firma_envio_dt_naive = datetime.combine(FECHA_EMISION_DATE_MAX, datetime.min.time()) \
+        + timedelta(seconds=rng.randint(0, 86399))
+
+    output.write((
+        f'<?xml version="1.0" encoding="{encoding}"?>\n'
+        f'<EnvioDTE xmlns="{DTE_XMLNS}" version="1.0">'
+        '<SetDTE ID="SetDoc">'
+        '<Caratula version="1.0">'
+        f'<RutEmisor>{emisor.rut.canonical}</RutEmisor>'
+        f'<RutEnvia>{emisor.rut_envia.canonical}</RutEnvia>'
+        f'<RutReceptor>{ENVIO_DTE_RUT_RECEPTOR.canonical}</RutReceptor>'
+        '<FchResol>2014-08-22</FchResol>'
+        '<NroResol>80</NroResol>'
+        f'<TmstFirmaEnv>{firma_envio_dt_naive.isoformat(timespec="seconds")}</TmstFirmaEnv>'
+        + ''.join(
+            f'<SubTotDTE><TpoDTE>{tipo_dte.value}</TpoDTE><NroDTE>{tipo_dte_count}</NroDTE>'
+            '</SubTotDTE>'
+            for tipo_dte, tipo_dte_count in sorted(tipos_dte_counts.items())
+        )
+        + '</Caratula>'
+    ).encode(encoding))
+
+
+def _write_envio_dte_tail(output: IO[bytes], emisor: Emisor, encoding: str) -> None:
+    placeholder_digest = base64.standard_b64encode(bytes(20)).decode('ascii')
+    placeholder_signature = base64.standard_b64encode(bytes(64)).decode('ascii')
+
+    output.write((
+        '</SetDTE>'
+        '<Signature xmlns="http://www.w3.org/2000/09/xmldsig#">'
+        '<SignedInfo>'
+        '<CanonicalizationMethod Algorithm="http://www.w3.org/TR/2001/REC-xml-c14n-20010315"/>'
+        '<SignatureMethod Algorithm="http://www.w3.org/2000/09/xmldsig#rsa-sha1"/>'
+        '<Reference URI="#SetDoc">'
+        '<Transforms>'
+        '<Transform Algorithm="http://www.w3.org/TR/2001/REC-xml-c14n-20010315"/>'
+        '</Transforms>'
+        '<DigestMethod Algorithm="http://www.w3.org/2000/09/xmldsig#sha1"/>'
+        f'<DigestValue>{placeholder_digest}</DigestValue>'
+        '</Reference>'
+        '</SignedInfo>'
+        f'<SignatureValue>{placeholder_signature}</SignatureValue>'
+        f'{emisor.signature_key_info_xml}'
+        '</Signature>'
+        '</EnvioDTE>\n'
+    ).encode(encoding))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('output_dir', type=pathlib.Path)
+    arg_parser.add_argument('--count', type=int, default=1000, help="number of DTEs")
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--emisores', type=int, default=100, help="number of emisores")
+    arg_parser.add_argument(
+        '--envio-dte-size', type=int, default=100, help="max number of DTEs per EnvioDTE")
+    arg_parser.add_argument('--encoding', default=render.DEFAULT_ENCODING)
+    arg_parser.add_argument('--no-dte-files', action='store_true')
+    arg_parser.add_argument('--no-envio-dte-files', action='store_true')
+    args = arg_parser.parse_args()
+
+    files_count, files_size = gen_dte_xml_corpus(
+        output_dir_path=args.output_dir,
+        count=args.count,
+        seed=args.seed,
+        emisores_count=args.emisores,
+        envio_dte_size=args.envio_dte_size,
+        write_dte_files=not args.no_dte_files,
+        write_envio_dte_files=not args.no_envio_dte_files,
+        encoding=args.encoding,
+    )
+    print(f"Wrote {files_count} files ({files_size / 2 ** 20:.1f} MiB) to '{args.output_dir}'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import unittest
+from typing import AsyncIterator, List
+from unittest import mock
+
+from cl_sii.dte.parse import parse_dte_xml
+from cl_sii.libs import xml_utils
+from cl_sii.libs.instrumentation_utils import StageTracer
+
+from cl_sii.dte import parse
+from cl_sii.dte.aio import iter_parse_dte_bytes, parse_dte_bytes
+
+from .utils import read_test_file_bytes
+
+
+class FunctionParseDteBytesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        cls.dte_xml_bytes_1 = read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170.xml')
+        cls.dte_1 = parse_dte_xml(xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')))
+
+    def test_ok(self) -> None:
+        result = asyncio.run(parse_dte_bytes(self.dte_xml_bytes_1))
+        self.assertEqual(result, self.dte_1)
+
+    def test_ok_process_pool_executor(self) -> None:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            result = asyncio.run(parse_dte_bytes(self.dte_xml_bytes_1, executor=executor))
+        self.assertEqual(result, self.dte_1)
+
+    def test_ok_stage_tracer(self) -> None:
+        async def run() -> StageTracer:
+            with StageTracer() as tracer:
+                await parse_dte_bytes(self.dte_xml_bytes_1)
+            return tracer
+
+        tracer = asyncio.run(run())
+        self.assertEqual(tracer.events[-1].stage, 'dte.parse.parse_dte_xml')
+
+    def test_fail_not_cleaned(self) -> None:
+        # The original XML doc does not have the DTE namespace.
+        with self.assertRaises(xml_utils.XmlSchemaDocValidationError):
+            asyncio.run(parse_dte_bytes(self.dte_xml_bytes_1, clean=False))
+
+    def test_fail_xml_syntax_error(self) -> None:
+        with self.assertRaises(xml_utils.XmlSyntaxError):
+            asyncio.run(parse_dte_bytes(b'not xml'))
+
+
+class FunctionIterParseDteBytesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        cls.dte_xml_bytes_1 = read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170.xml')
+        cls.dte_xml_bytes_2 = read_test_file_bytes(
+            'test_data/sii-dte/DTE--76399752-9--33--25568.xml')
+        cls.dte_1 = asyncio.run(parse_dte_bytes(cls.dte_xml_bytes_1))
+        cls.dte_2 = asyncio.run(parse_dte_bytes(cls.dte_xml_bytes_2))
+
+    def _collect(self, *args: object, **kwargs: object) -> list:
+        async def run() -> list:
+            return [item async for item in iter_parse_dte_bytes(*args, **kwargs)]  # type: ignore
+
+        return asyncio.run(run())
+
+    def test_ok_ordered(self) -> None:
+        values = [self.dte_xml_bytes_1, self.dte_xml_bytes_2] * 5
+        results = self._collect(values, max_concurrency=3)
+
+        self.assertEqual(results, [
+            (index, self.dte_1 if index % 2 == 0 else self.dte_2) for index in range(10)])
+
+    def test_ok_unordered(self) -> None:
+        values = [self.dte_xml_bytes_1, self.dte_xml_bytes_2] * 5
+        results = self._collect(values, ordered=False)
+
+        self.assertEqual(sorted(results, key=lambda item: item[0]), [
+            (index, self.dte_1 if index % 2 == 0 else self.dte_2) for index in range(10)])
+
+    def test_ok_async_iterable_backpressure(self) -> None:
+        # note: if ordered, up to 'max_concurrency' results are buffered (besides the ones in
+        #   process).
+        for ordered, expected_max_not_yielded_count in ((True, 4), (False, 2)):
+            with self.subTest(ordered=ordered):
+                pulled_count = 0
+                max_not_yielded_count = 0
+
+                async def values() -> AsyncIterator[bytes]:
+                    nonlocal pulled_count
+                    for _ in range(10):
+                        pulled_count += 1
+                        yield self.dte_xml_bytes_1
+
+                async def run() -> None:
+                    nonlocal max_not_yielded_count
+                    yielded_count = 0
+                    async for _ in iter_parse_dte_bytes(
+                            values(), max_concurrency=2, ordered=ordered):
+                        yielded_count += 1
+                        max_not_yielded_count = max(
+                            max_not_yielded_count, pulled_count - yielded_count)
+
+                asyncio.run(run())
+                self.assertEqual(pulled_count, 10)
+                self.assertLessEqual(max_not_yielded_count, expected_max_not_yielded_count)
+
+    def test_ok_ordered_slow_value_does_not_hold_slots(self) -> None:
+        finished: List[bytes] = []
+        lock = threading.Lock()
+
+        def parse_dte_xml_bytes(value: bytes, clean: bool, validate: bool) -> bytes:
+            time.sleep(0.2 if value == b'slow' else 0.001)
+            with lock:
+                finished.append(value)
+            return value
+
+        async def run() -> list:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                return [
+                    item async for item in iter_parse_dte_bytes(
+                        [b'slow', b'1', b'2', b'3'], max_concurrency=2, executor=executor)
+                ]
+
+        with mock.patch.object(parse, 'parse_dte_xml_bytes', parse_dte_xml_bytes):
+            results = asyncio.run(run())
+
+        self.assertEqual(results, [(0, b'slow'), (1, b'1'), (2, b'2'), (3, b'3')])
+        # The other values are processed while the first one is in process.
+        self.assertEqual(finished, [b'1', b'2', b'3', b'slow'])
+
+    def test_ok_empty(self) -> None:
+        self.assertEqual(self._collect([]), [])
+
+    def test_return_exceptions(self) -> None:
+        values = [self.dte_xml_bytes_1, b'not xml', self.dte_xml_bytes_2]
+        results = self._collect(values, return_exceptions=True)
+
+        self.assertEqual(results[0], (0, self.dte_1))
+        self.assertEqual(results[1][0], 1)
+        self.assertIsInstance(results[1][1], xml_utils.XmlSyntaxError)
+        self.assertEqual(results[2], (2, self.dte_2))
+
+    def test_return_exceptions_validation_errors_concurrent(self) -> None:
+        # Invalid documents validated at the same time (in threads, against the same XML schema
+        #   object) must each get the errors of their own defect.
+        values_and_expected_elements = [
+            (
+                self.dte_xml_bytes_1.replace(b'<Folio>170</Folio>', b'<Folio>abc</Folio>'),
+                ['{http://www.sii.cl/SiiDte}Folio'],
+            ),
+            (
+                self.dte_xml_bytes_2.replace(
+                    b'<MntTotal>230992</MntTotal>', b'<MntTotalX>230992</MntTotalX>'),
+                ['{http://www.sii.cl/SiiDte}MntTotalX'],
+            ),
+            (self.dte_xml_bytes_1, None),
+        ] * 40
+
+        async def run() -> list:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                return [
+                    item async for item in iter_parse_dte_bytes(
+                        [value for value, _ in values_and_expected_elements],
+                        max_concurrency=8, return_exceptions=True, executor=executor)
+                ]
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), len(values_and_expected_elements))
+        for (index, result), (_, expected_elements) in zip(
+                results, values_and_expected_elements):
+            with self.subTest(index=index):
+                if expected_elements is None:
+                    self.assertEqual(result, self.dte_1)
+                else:
+                    self.assertIsInstance(result, xml_utils.XmlSchemaDocValidationError)
+                    self.assertEqual(
+                        [error.element for error in result.errors], expected_elements)
+
+    def test_fail_exception(self) -> None:
+        values = [self.dte_xml_bytes_1, b'not xml', self.dte_xml_bytes_2]
+        with self.assertRaises(xml_utils.XmlSyntaxError):
+            self._collect(values)
+
+    def test_fail_max_concurrency(self) -> None:
+        with self.assertRaises(ValueError):
+            self._collect([self.dte_xml_bytes_1], max_concurrency=0)
+
+    def test_break_cancels_pending(self) -> None:
+        started: List[bytes] = []
+        lock = threading.Lock()
+
+        def slow_parse_dte_bytes(value: bytes, clean: bool, validate: bool) -> bytes:
+            with lock:
+                started.append(value)
+            time.sleep(0.01)
+            return value
+
+        async def run() -> None:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+                results = iter_parse_dte_bytes(
+                    [b'1', b'2', b'3', b'4', b'5'], max_concurrency=3, executor=executor)
+                try:
+                    async for _ in results:
+                        break
+                finally:
+                    await results.aclose()  # type: ignore
+
+        with mock.patch.object(parse, 'parse_dte_xml_bytes', slow_parse_dte_bytes):
+            asyncio.run(run())
+
+        # The first one is done, the second one might have started, and the rest are cancelled.
+        self.assertLessEqual(len(started), 2)
@@ -0,0 +1,170 @@
+import dataclasses
+import multiprocessing
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+from cl_sii.dte.parse import parse_dte_xml_bytes
+from cl_sii.libs import tz_utils, xml_utils
+
+from cl_sii.dte.cache import DteXmlDataCache, DteXmlDataCacheStats
+
+from .utils import read_test_file_bytes
+
+
+def _fill_cache(path: str, value: bytes) -> None:
+    with DteXmlDataCache(path) as cache:
+        cache.get_or_parse(value)
+
+
+class DteXmlDataCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        cls.dte_xml_bytes_1 = read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170.xml')
+        cls.dte_xml_bytes_2 = read_test_file_bytes(
+            'test_data/sii-dte/DTE--76399752-9--33--25568.xml')
+        cls.dte_1 = parse_dte_xml_bytes(cls.dte_xml_bytes_1)
+        cls.dte_2 = parse_dte_xml_bytes(cls.dte_xml_bytes_2)
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'cache.sqlite3')
+        self.cache = DteXmlDataCache(self.path)
+        self.addCleanup(self.cache.close)
+
+    def test_get_or_parse(self) -> None:
+        self.assertEqual(self.cache.get_or_parse(self.dte_xml_bytes_1), self.dte_1)
+        self.assertEqual(self.cache.get_or_parse(self.dte_xml_bytes_1), self.dte_1)
+        self.assertEqual(self.cache.get_or_parse(self.dte_xml_bytes_2), self.dte_2)
+
+        self.assertEqual(self.cache.stats, DteXmlDataCacheStats(hits=1, misses=2))
+
+    def test_get_or_parse_fail_not_cached(self) -> None:
+        for _ in range(2):
+            with self.assertRaises(xml_utils.XmlSyntaxError):
+                self.cache.get_or_parse(b'not xml')
+        self.assertEqual(self.cache.stats, DteXmlDataCacheStats(hits=0, misses=2))
+
+    def test_set_and_get(self) -> None:
+        dte = dataclasses.replace(
+            self.dte_1,
+            emisor_razon_social='Ñandú "Cía." & <Co>',
+            fecha_vencimiento_date=date(2019, 5, 1),
+            firma_documento_dt=None,
+            signature_value=None,
+            signature_x509_cert_der=None,
+            emisor_giro=None,
+            emisor_email=None,
+            receptor_email='contacto@example.com',
+        )
+        self.assertIsNone(self.cache.get(self.dte_xml_bytes_1))
+        self.cache.set(self.dte_xml_bytes_1, dte)
+
+        result = self.cache.get(self.dte_xml_bytes_1)
+        self.assertEqual(result, dte)
+
+    def test_get_firma_documento_dt_tz(self) -> None:
+        self.cache.set(self.dte_xml_bytes_1, self.dte_1)
+
+        result = self.cache.get(self.dte_xml_bytes_1)
+        self.assertEqual(result.firma_documento_dt, self.dte_1.firma_documento_dt)
+        self.assertEqual(tz_utils.get_tz_name(result.firma_documento_dt.tzinfo), 'America/Santiago')
+        self.assertEqual(
+            result.firma_documento_dt.utcoffset(), self.dte_1.firma_documento_dt.utcoffset())
+
+    def test_key_includes_options_and_version(self) -> None:
+        self.cache.set(self.dte_xml_bytes_1, self.dte_1)
+
+        self.assertIsNone(self.cache.get(self.dte_xml_bytes_1, validate=False))
+        self.assertIsNone(self.cache.get(self.dte_xml_bytes_1, clean=False))
+        with mock.patch('cl_sii.__version__', '999.0.0'):
+            self.assertIsNone(self.cache.get(self.dte_xml_bytes_1))
+        self.assertEqual(self.cache.get(self.dte_xml_bytes_1), self.dte_1)
+
+    def test_shared_by_processes(self) -> None:
+        process = multiprocessing.get_context('spawn').Process(
+            target=_fill_cache, args=(self.path, self.dte_xml_bytes_2))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+
+        self.assertEqual(self.cache.get(self.dte_xml_bytes_2), self.dte_2)
+
+    def test_evict(self) -> None:
+        cache = DteXmlDataCache(os.path.join(os.path.dirname(self.path), 'small.sqlite3'),
+                                max_size=64 * 1024)
+        self.addCleanup(cache.close)
+
+        values = [self.dte_xml_bytes_1 + b' ' * index for index in range(250)]
+        for value in values:
+            cache.set(value, self.dte_1)
+        cache.evict()
+
+        self.assertGreater(cache.stats.evictions, 0)
+        # The oldest entries were removed.
+        self.assertIsNone(cache.get(values[0]))
+        self.assertEqual(cache.get(values[-1]), self.dte_1)
+
+    def test_evict_on_close_and_open(self) -> None:
+        path = os.path.join(os.path.dirname(self.path), 'small.sqlite3')
+        values = [self.dte_xml_bytes_1 + b' ' * index for index in range(50)]
+
+        # Fewer new entries than the interval between checks of the size.
+        with DteXmlDataCache(path, max_size=64 * 1024) as cache:
+            for value in values:
+                cache.set(value, self.dte_1)
+        self.assertGreater(cache.stats.evictions, 0)
+
+        with DteXmlDataCache(path) as cache:
+            for value in values:
+                cache.set(value, self.dte_1)
+        self.assertEqual(cache.stats.evictions, 0)
+
+        with DteXmlDataCache(path, max_size=64 * 1024) as cache:
+            self.assertGreater(cache.stats.evictions, 0)
+            self.assertIsNone(cache.get(values[0]))
+            self.assertEqual(cache.get(values[-1]), self.dte_1)
+
+    def test_evict_first_in_first_out(self) -> None:
+        cache = DteXmlDataCache(os.path.join(os.path.dirname(self.path), 'small.sqlite3'),
+                                max_size=64 * 1024)
+        self.addCleanup(cache.close)
+
+        values = [self.dte_xml_bytes_1 + b' ' * index for index in range(50)]
+        for value in values:
+            cache.set(value, self.dte_1)
+        # Reading an entry does not make it newer, but saving it again does.
+        cache.get(values[0])
+        cache.set(values[1], self.dte_1)
+        cache.evict()
+
+        self.assertIsNone(cache.get(values[0]))
+        self.assertEqual(cache.get(values[1]), self.dte_1)
+
+    def test_close_twice(self) -> None:
+        self.cache.close()
+        self.cache.close()
+
+    def test_clear(self) -> None:
+        self.cache.set(self.dte_xml_bytes_1, self.dte_1)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(self.dte_xml_bytes_1))
+
+    def test_fail_type_error(self) -> None:
+        with self.assertRaises(TypeError):
+            self.cache.get('<DTE/>')  # type: ignore
+        with self.assertRaises(TypeError):
+            self.cache.set(self.dte_xml_bytes_1, self.dte_1.natural_key)  # type: ignore
+
+    def test_fail_max_size(self) -> None:
+        with self.assertRaises(ValueError):
+            DteXmlDataCache(self.path, max_size=0)
@@ -16,6 +16,10 @@ class TipoDteEnumTest(unittest.TestCase):
                 TipoDteEnum.GUIA_DESPACHO_ELECTRONICA,
                 TipoDteEnum.NOTA_DEBITO_ELECTRONICA,
                 TipoDteEnum.NOTA_CREDITO_ELECTRONICA,
+                TipoDteEnum.LIQUIDACION_FACTURA_ELECTRONICA,
+                TipoDteEnum.FACTURA_EXPORTACION_ELECTRONICA,
+                TipoDteEnum.NOTA_DEBITO_EXPORTACION_ELECTRONICA,
+                TipoDteEnum.NOTA_CREDITO_EXPORTACION_ELECTRONICA,
             }
         )
 
@@ -126,3 +130,75 @@ class TipoDteEnumTest(unittest.TestCase):
 
         for (result, expected) in assertions:
             self.assertTrue(result is expected)
+
+    def test_LIQUIDACION_FACTURA_ELECTRONICA(self):
+        value = TipoDteEnum.LIQUIDACION_FACTURA_ELECTRONICA
+
+        self.assertEqual(value.name, 'LIQUIDACION_FACTURA_ELECTRONICA')
+        self.assertEqual(value.value, 43)
+
+        assertions = [
+            (value.is_factura, False),
+            (value.is_factura_venta, False),
+            (value.is_factura_compra, False),
+            (value.is_nota, False),
+            (value.emisor_is_vendedor, False),
+            (value.receptor_is_vendedor, False),
+        ]
+
+        for (result, expected) in assertions:
+            self.assertTrue(result is expected)
+
+    def test_FACTURA_EXPORTACION_ELECTRONICA(self):
+        value = TipoDteEnum.FACTURA_EXPORTACION_ELECTRONICA
+
+        self.assertEqual(value.name, 'FACTURA_EXPORTACION_ELECTRONICA')
+        self.assertEqual(value.value, 110)
+
+        assertions = [
+            (value.is_factura, False),
+            (value.is_factura_venta, False),
+            (value.is_factura_compra, False),
+            (value.is_nota, False),
+            (value.emisor_is_vendedor, False),
+            (value.receptor_is_vendedor, False),
+        ]
+
+        for (result, expected) in assertions:
+            self.assertTrue(result is expected)
+
+    def test_NOTA_DEBITO_EXPORTACION_ELECTRONICA(self):
+        value = TipoDteEnum.NOTA_DEBITO_EXPORTACION_ELECTRONICA
+
+        self.assertEqual(value.name, 'NOTA_DEBITO_EXPORTACION_ELECTRONICA')
+        self.assertEqual(value.value, 111)
+
+        assertions = [
+            (value.is_factura, False),
+            (value.is_factura_venta, False),
+            (value.is_factura_compra, False),
+            (value.is_nota, False),
+            (value.emisor_is_vendedor, False),
+            (value.receptor_is_vendedor, False),
+        ]
+
+        for (result, expected) in assertions:
+            self.assertTrue(result is expected)
+
+    def test_NOTA_CREDITO_EXPORTACION_ELECTRONICA(self):
+        value = TipoDteEnum.NOTA_CREDITO_EXPORTACION_ELECTRONICA
+
+        self.assertEqual(value.name, 'NOTA_CREDITO_EXPORTACION_ELECTRONICA')
+        self.assertEqual(value.value, 112)
+
+        assertions = [
+            (value.is_factura, False),
+            (value.is_factura_venta, False),
+            (value.is_factura_compra, False),
+            (value.is_nota, False),
+            (value.emisor_is_vendedor, False),
+            (value.receptor_is_vendedor, False),
+        ]
+
+        for (result, expected) in assertions:
+            self.assertTrue(result is expected)
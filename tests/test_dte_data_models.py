@@ -1,7 +1,7 @@
 import base64
 import dataclasses
 import unittest
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 
 from cl_sii.libs import encoding_utils
 from cl_sii.libs import tz_utils
@@ -10,7 +10,8 @@ from cl_sii.rut import Rut  # noqa: F401
 from cl_sii.dte.constants import TipoDteEnum  # noqa: F401
 from cl_sii.dte.data_models import (  # noqa: F401
     DteDataL0, DteDataL1, DteDataL2, DteNaturalKey,
-    validate_contribuyente_razon_social, validate_dte_folio, validate_dte_monto_total,
+    validate_contribuyente_razon_social, validate_correct_tz, validate_dte_folio,
+    validate_dte_monto_total,
 )
 
 from .utils import read_test_file_bytes
@@ -273,5 +274,33 @@ class FunctionsTest(unittest.TestCase):
         pass
 
     def test_validate_correct_tz(self) -> None:
-        # TODO: implement for 'validate_correct_tz'
-        pass
+        dt_naive = datetime(2019, 4, 1, 1, 36, 40)
+        tz = tz_utils.get_tz('America/Santiago', backend=tz_utils.TZ_BACKEND_PYTZ)
+
+        validate_correct_tz(tz_utils.convert_naive_dt_to_tz_aware(dt_naive, tz), tz)
+        with self.assertRaises(ValueError) as cm:
+            validate_correct_tz(dt_naive, tz)
+        self.assertEqual(cm.exception.args[0], "Value must be a timezone-aware datetime.")
+        with self.assertRaises(ValueError) as cm:
+            validate_correct_tz(
+                tz_utils.convert_naive_dt_to_tz_aware(dt_naive, tz_utils.TZ_UTC), tz)
+        self.assertEqual(
+            cm.exception.args[0], "Timezone of datetime value must be 'America/Santiago'.")
+        with self.assertRaises(ValueError):
+            validate_correct_tz(dt_naive.replace(tzinfo=timezone.utc), tz)
+
+    @unittest.skipIf(tz_utils.zoneinfo is None, "Module 'zoneinfo' is not available.")
+    def test_validate_correct_tz_zoneinfo(self) -> None:
+        dt_naive = datetime(2019, 4, 1, 1, 36, 40)
+        pytz_tz = tz_utils.get_tz('America/Santiago', backend=tz_utils.TZ_BACKEND_PYTZ)
+        zoneinfo_tz = tz_utils.get_tz('America/Santiago', backend=tz_utils.TZ_BACKEND_ZONEINFO)
+
+        # The timezones are compared by name, thus the backends are interchangeable.
+        for tz in (pytz_tz, zoneinfo_tz):
+            for dt_tz in (pytz_tz, zoneinfo_tz):
+                validate_correct_tz(tz_utils.convert_naive_dt_to_tz_aware(dt_naive, dt_tz), tz)
+        with self.assertRaises(ValueError):
+            validate_correct_tz(
+                tz_utils.convert_naive_dt_to_tz_aware(
+                    dt_naive, tz_utils.get_tz('UTC', backend=tz_utils.TZ_BACKEND_ZONEINFO)),
+                zoneinfo_tz)
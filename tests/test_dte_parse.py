@@ -2,9 +2,10 @@ import difflib
 import io
 import unittest
 from datetime import date, datetime
+from unittest import mock
 
 import cl_sii.dte.constants
-from cl_sii.dte.data_models import DteDataL2
+from cl_sii.dte.data_models import DteDataL0, DteDataL1, DteDataL2
 from cl_sii.libs import crypto_utils
 from cl_sii.libs import encoding_utils
 from cl_sii.libs import tz_utils
@@ -12,9 +13,10 @@ from cl_sii.libs import xml_utils
 from cl_sii.rut import Rut
 
 from cl_sii.dte.parse import (  # noqa: F401
-    clean_dte_xml, parse_dte_xml, validate_dte_xml,
+    clean_dte_xml, parse_dte_xml, parse_dte_xml_bytes, parse_dte_xml_data_l0,
+    parse_dte_xml_data_l1, validate_dte_xml,
     _remove_dte_xml_doc_personalizado, _set_dte_xml_missing_xmlns,
-    DTE_XML_SCHEMA_OBJ, DTE_XMLNS, DTE_XMLNS_MAP
+    DTE_XML_DTE_SCHEMA_OBJ, DTE_XML_SCHEMA_OBJ, DTE_XMLNS, DTE_XMLNS_MAP
 )
 
 from .utils import read_test_file_bytes
@@ -26,6 +28,18 @@ class OthersTest(unittest.TestCase):
         # TODO: implement
         pass
 
+    def test_DTE_XML_DTE_SCHEMA_OBJ(self) -> None:
+        xml_doc = xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml'))
+        self.assertTrue(DTE_XML_DTE_SCHEMA_OBJ.validate(xml_doc))
+
+        # The "DTE" XML schema does not declare the element 'EnvioDTE'.
+        xml_doc = xml_utils.parse_untrusted_xml(
+            b'<EnvioDTE xmlns="http://www.sii.cl/SiiDte" version="1.0"/>')
+        with self.assertRaises(xml_utils.XmlSchemaDocValidationError) as cm:
+            xml_utils.validate_xml_doc(DTE_XML_DTE_SCHEMA_OBJ, xml_doc)
+        self.assertIn("No matching global declaration", cm.exception.args[0])
+
 
 class FunctionValidateDteXmlTest(unittest.TestCase):
 
@@ -59,6 +73,52 @@ class FunctionValidateDteXmlTest(unittest.TestCase):
             xml_doc.getroottree().getroot().tag,
             '{%s}DTE' % DTE_XMLNS)
 
+    def test_validate_dte_xml_schema_selection(self) -> None:
+        xml_doc_dte = xml_utils.parse_untrusted_xml(self.dte_clean_xml_1_xml_bytes)
+        xml_doc_envio_dte = xml_utils.parse_untrusted_xml(
+            b'<EnvioDTE xmlns="http://www.sii.cl/SiiDte" version="1.0"/>')
+        xml_doc_dte_no_xmlns = xml_utils.parse_untrusted_xml(self.dte_bad_xml_1_xml_bytes)
+
+        with mock.patch.object(xml_utils, 'validate_xml_doc') as mock_validate_xml_doc:
+            validate_dte_xml(xml_doc_dte)
+            validate_dte_xml(xml_doc_envio_dte)
+            validate_dte_xml(xml_doc_dte_no_xmlns)
+
+        self.assertEqual(
+            mock_validate_xml_doc.call_args_list,
+            [
+                mock.call(DTE_XML_DTE_SCHEMA_OBJ, xml_doc_dte),
+                mock.call(DTE_XML_SCHEMA_OBJ, xml_doc_envio_dte),
+                mock.call(DTE_XML_SCHEMA_OBJ, xml_doc_dte_no_xmlns),
+            ])
+
+    def test_validate_dte_xml_element_tree(self) -> None:
+        xml_doc = xml_utils.parse_untrusted_xml(self.dte_clean_xml_1_xml_bytes)
+        validate_dte_xml(xml_doc.getroottree())
+
+        with mock.patch.object(xml_utils, 'validate_xml_doc') as mock_validate_xml_doc:
+            validate_dte_xml(xml_doc.getroottree())
+        mock_validate_xml_doc.assert_called_once_with(DTE_XML_DTE_SCHEMA_OBJ, xml_doc)
+
+        xml_doc_envio_dte = xml_utils.parse_untrusted_xml(
+            b'<EnvioDTE xmlns="http://www.sii.cl/SiiDte" version="1.0"/>')
+        with self.assertRaises(xml_utils.XmlSchemaDocValidationError) as cm:
+            validate_dte_xml(xml_doc_envio_dte.getroottree())
+        self.assertEqual(
+            cm.exception.errors[0].element, '{http://www.sii.cl/SiiDte}EnvioDTE')
+
+    def test_validate_dte_xml_fail_envio_dte(self) -> None:
+        xml_doc = xml_utils.parse_untrusted_xml(
+            b'<EnvioDTE xmlns="http://www.sii.cl/SiiDte" version="1.0"/>')
+
+        with self.assertRaises(xml_utils.XmlSchemaDocValidationError) as cm:
+            validate_dte_xml(xml_doc)
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("Element '{http://www.sii.cl/SiiDte}EnvioDTE': Missing child element(s). "
+             "Expected is ( {http://www.sii.cl/SiiDte}SetDTE )., line 1", )
+        )
+
     def test_validate_dte_xml_fail_x(self) -> None:
         # TODO: implement more cases
         pass
@@ -366,6 +426,16 @@ class FunctionParseDteXmlTest(unittest.TestCase):
                 receptor_email=None,
             ))
 
+    def test_parse_dte_xml_without_tz_localizer(self) -> None:
+        # The table of a 'TzLocalizer' (expensive to build) is not needed to parse a single DTE.
+        xml_doc = xml_utils.parse_untrusted_xml(self.dte_clean_xml_1_xml_bytes)
+
+        with mock.patch.object(tz_utils, 'get_tz_localizer') as mock_get_tz_localizer:
+            parsed_dte = parse_dte_xml(xml_doc)
+        mock_get_tz_localizer.assert_not_called()
+        self.assertEqual(
+            parsed_dte.firma_documento_dt.isoformat(), '2019-04-01T01:36:40-03:00')
+
     def test_parse_dte_xml_ok_1b(self) -> None:
         xml_doc = xml_utils.parse_untrusted_xml(self.dte_clean_xml_1b_xml_bytes)
 
@@ -418,6 +488,138 @@ class FunctionParseDteXmlTest(unittest.TestCase):
                 receptor_email=None,
             ))
 
+    def test_parse_dte_xml_data_l0_ok_1(self) -> None:
+        xml_doc = xml_utils.parse_untrusted_xml(self.dte_clean_xml_1_xml_bytes)
+
+        parsed_dte = parse_dte_xml_data_l0(xml_doc)
+        self.assertIs(type(parsed_dte), DteDataL0)
+        self.assertDictEqual(
+            dict(parsed_dte.as_dict()),
+            dict(
+                emisor_rut=Rut('76354771-K'),
+                tipo_dte=cl_sii.dte.constants.TipoDteEnum.FACTURA_ELECTRONICA,
+                folio=170,
+            ))
+
+    def test_parse_dte_xml_data_l1_ok_1(self) -> None:
+        xml_doc = xml_utils.parse_untrusted_xml(self.dte_clean_xml_1_xml_bytes)
+
+        parsed_dte = parse_dte_xml_data_l1(xml_doc)
+        self.assertIs(type(parsed_dte), DteDataL1)
+        self.assertDictEqual(
+            dict(parsed_dte.as_dict()),
+            dict(
+                emisor_rut=Rut('76354771-K'),
+                tipo_dte=cl_sii.dte.constants.TipoDteEnum.FACTURA_ELECTRONICA,
+                folio=170,
+                fecha_emision_date=date(2019, 4, 1),
+                receptor_rut=Rut('96790240-3'),
+                monto_total=2996301,
+            ))
+
+    def test_parse_dte_xml_data_l1_ok_removed_signature(self) -> None:
+        # The signature is not required for data level 1.
+        xml_doc = xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned-mod-removed-signature.xml'))
+
+        parsed_dte = parse_dte_xml_data_l1(xml_doc)
+        self.assertEqual(parsed_dte.monto_total, 2996301)
+
+    def test_parse_dte_xml_ok_liquidacion(self) -> None:
+        # note: the signature of the modified XML doc is no longer valid, but that is not checked.
+        file_bytes = self.dte_clean_xml_1_xml_bytes \
+            .replace(b'<Documento ', b'<Liquidacion ') \
+            .replace(b'</Documento>', b'</Liquidacion>') \
+            .replace(b'<TipoDTE>33</TipoDTE>', b'<TipoDTE>43</TipoDTE>')
+        xml_doc = xml_utils.parse_untrusted_xml(file_bytes)
+
+        parsed_dte = parse_dte_xml(xml_doc)
+        self.assertEqual(
+            parsed_dte.tipo_dte,
+            cl_sii.dte.constants.TipoDteEnum.LIQUIDACION_FACTURA_ELECTRONICA)
+        self.assertEqual(parsed_dte.emisor_rut, Rut('76354771-K'))
+        self.assertEqual(parsed_dte.folio, 170)
+        self.assertEqual(parsed_dte.monto_total, 2996301)
+        self.assertEqual(parsed_dte.signature_x509_cert_der, self.dte_clean_xml_1_cert_der)
+
+    def _get_exportaciones_xml_bytes(self, totales: bytes, otra_moneda: bytes = b'') -> bytes:
+        # note: the signature of the modified XML doc is no longer valid, but that is not checked.
+        return self.dte_clean_xml_1_xml_bytes \
+            .replace(b'<Documento ', b'<Exportaciones ') \
+            .replace(b'</Documento>', b'</Exportaciones>') \
+            .replace(b'<TipoDTE>33</TipoDTE>', b'<TipoDTE>110</TipoDTE>') \
+            .replace(
+                b'<MntNeto>2517900</MntNeto>\n'
+                b'        <TasaIVA>19.00</TasaIVA>\n'
+                b'        <IVA>478401</IVA>\n'
+                b'        <MntTotal>2996301</MntTotal>',
+                totales) \
+            .replace(b'</Totales>', b'</Totales>' + otra_moneda)
+
+    def test_parse_dte_xml_ok_exportaciones(self) -> None:
+        file_bytes = self._get_exportaciones_xml_bytes(
+            b'<TpoMoneda>PESO CL</TpoMoneda><MntExe>2996301.0000</MntExe>'
+            b'<MntTotal>2996301.0000</MntTotal>')
+        xml_doc = xml_utils.parse_untrusted_xml(file_bytes)
+
+        parsed_dte = parse_dte_xml(xml_doc)
+        self.assertEqual(
+            parsed_dte.tipo_dte,
+            cl_sii.dte.constants.TipoDteEnum.FACTURA_EXPORTACION_ELECTRONICA)
+        self.assertEqual(parsed_dte.emisor_rut, Rut('76354771-K'))
+        self.assertEqual(parsed_dte.folio, 170)
+        self.assertEqual(parsed_dte.monto_total, 2996301)
+        self.assertEqual(parsed_dte.signature_x509_cert_der, self.dte_clean_xml_1_cert_der)
+
+    def test_parse_dte_xml_ok_exportaciones_foreign_currency(self) -> None:
+        # The total amount in CLP is that of 'OtraMoneda', not 'MntTotal' (in USD).
+        file_bytes = self._get_exportaciones_xml_bytes(
+            b'<TpoMoneda>DOLAR USA</TpoMoneda><MntExe>1234.56</MntExe>'
+            b'<MntTotal>1234.56</MntTotal>',
+            b'<OtraMoneda><TpoMoneda>PESO CL</TpoMoneda><TpoCambio>810.25</TpoCambio>'
+            b'<MntExeOtrMnda>1000302</MntExeOtrMnda><MntTotOtrMnda>1000302</MntTotOtrMnda>'
+            b'</OtraMoneda>')
+        xml_doc = xml_utils.parse_untrusted_xml(file_bytes)
+
+        parsed_dte = parse_dte_xml(xml_doc)
+        self.assertEqual(
+            parsed_dte.tipo_dte,
+            cl_sii.dte.constants.TipoDteEnum.FACTURA_EXPORTACION_ELECTRONICA)
+        self.assertEqual(parsed_dte.monto_total, 1000302)
+
+    def test_parse_dte_xml_fail_exportaciones_no_monto_total_clp(self) -> None:
+        totales = b'<TpoMoneda>DOLAR USA</TpoMoneda><MntExe>1234.56</MntExe>' \
+            b'<MntTotal>1234.56</MntTotal>'
+        for otra_moneda in (
+            b'',
+            b'<OtraMoneda><TpoMoneda>EURO</TpoMoneda><MntTotOtrMnda>1100.5</MntTotOtrMnda>'
+            b'</OtraMoneda>',
+        ):
+            with self.subTest(otra_moneda=otra_moneda):
+                xml_doc = xml_utils.parse_untrusted_xml(
+                    self._get_exportaciones_xml_bytes(totales, otra_moneda))
+
+                with self.assertRaises(ValueError) as cm:
+                    parse_dte_xml(xml_doc)
+                self.assertSequenceEqual(
+                    cm.exception.args,
+                    ("DTE 'Exportaciones' without a total amount in CLP ('PESO CL') is not "
+                     "supported.", )
+                )
+
+    def test_parse_dte_xml_fail_exportaciones_monto_total_clp_fractional(self) -> None:
+        file_bytes = self._get_exportaciones_xml_bytes(
+            b'<TpoMoneda>PESO CL</TpoMoneda><MntExe>2996301.5</MntExe>'
+            b'<MntTotal>2996301.5</MntTotal>')
+        xml_doc = xml_utils.parse_untrusted_xml(file_bytes)
+
+        with self.assertRaises(ValueError) as cm:
+            parse_dte_xml(xml_doc)
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("Decimal values with a fractional part are not supported.", '2996301.5')
+        )
+
     def test_parse_dte_xml_fail_x(self) -> None:
         # TODO: implement more cases
         pass
@@ -441,3 +643,27 @@ class FunctionParseDteXmlTest(unittest.TestCase):
             cm.exception.args,
             ("Top level XML element 'Document' is required.", )
         )
+
+
+class FunctionParseDteXmlBytesTest(unittest.TestCase):
+
+    def test_parse_dte_xml_bytes_ok(self) -> None:
+        xml_doc_bytes = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170.xml')
+        xml_doc_cleaned = xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml'))
+
+        self.assertEqual(parse_dte_xml_bytes(xml_doc_bytes), parse_dte_xml(xml_doc_cleaned))
+
+    def test_parse_dte_xml_bytes_ok_not_cleaned_not_validated(self) -> None:
+        xml_doc_bytes = read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+
+        self.assertEqual(
+            parse_dte_xml_bytes(xml_doc_bytes, clean=False, validate=False),
+            parse_dte_xml_bytes(xml_doc_bytes))
+
+    def test_parse_dte_xml_bytes_fail_not_cleaned(self) -> None:
+        xml_doc_bytes = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170.xml')
+
+        with self.assertRaises(xml_utils.XmlSchemaDocValidationError):
+            parse_dte_xml_bytes(xml_doc_bytes, clean=False)
@@ -0,0 +1,243 @@
+import base64
+import dataclasses
+import io
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+import lxml.etree
+
+import cl_sii.dte.constants
+from cl_sii.dte.parse import DTE_XMLNS_MAP, parse_dte_xml, validate_dte_xml
+from cl_sii.libs import tz_utils
+from cl_sii.libs import xml_utils
+from cl_sii.rut import Rut
+
+from cl_sii.dte.render import (
+    render_dte_xml, render_dte_xml_many, write_dte_xml, write_dte_xml_many, write_envio_dte_xml,
+)
+
+from .utils import read_test_file_bytes
+
+
+class FunctionRenderDteXmlTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        cls.dte_1 = parse_dte_xml(xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')))
+        cls.dte_2 = parse_dte_xml(xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76399752-9--33--25568--cleaned.xml')))
+
+    def _assert_round_trip(self, dte: object, xml_doc_bytes: bytes) -> None:
+        xml_doc = xml_utils.parse_untrusted_xml(xml_doc_bytes)
+        validate_dte_xml(xml_doc)
+        self.assertEqual(parse_dte_xml(xml_doc), dte)
+
+    def test_render_dte_xml_ok_1(self) -> None:
+        xml_doc_bytes = render_dte_xml(self.dte_1)
+
+        self.assertTrue(xml_doc_bytes.startswith(
+            b'<?xml version="1.0" encoding="ISO-8859-1"?>\n'
+            b'<DTE xmlns="http://www.sii.cl/SiiDte" version="1.0">'
+            b'<Documento ID="DTE-76354771-K--33--170">'))
+        self._assert_round_trip(self.dte_1, xml_doc_bytes)
+
+    def test_render_dte_xml_ok_2(self) -> None:
+        xml_doc_bytes = render_dte_xml(self.dte_2, encoding='UTF-8')
+
+        self.assertTrue(xml_doc_bytes.startswith(
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'))
+        self._assert_round_trip(self.dte_2, xml_doc_bytes)
+
+    def test_render_dte_xml_ok_without_xml_declaration(self) -> None:
+        xml_doc_bytes = render_dte_xml(self.dte_1, xml_declaration=False)
+
+        self.assertTrue(xml_doc_bytes.startswith(b'<DTE xmlns="http://www.sii.cl/SiiDte"'))
+        self.assertTrue(render_dte_xml(self.dte_1).endswith(xml_doc_bytes))
+
+    def test_render_dte_xml_ok_optional_fields_and_special_chars(self) -> None:
+        dte = dataclasses.replace(
+            self.dte_1,
+            emisor_razon_social='ÑANDÚ & <Compañía> "€"',
+            receptor_email='contacto@example.com',
+            fecha_vencimiento_date=date(2019, 5, 1),
+        )
+        xml_doc_bytes = render_dte_xml(
+            dte,
+            documento_id='F170T33',
+            emisor_acteco=[421000, 749009],
+            detalle_items=[('Item 1', 2000000), ('Item 2', 996301)],
+        )
+
+        self.assertIn(b'<RznSoc>\xd1AND\xda &amp; &lt;Compa\xf1\xeda&gt; "&#8364;"</RznSoc>',
+                      xml_doc_bytes)
+        self.assertIn(b'<Acteco>421000</Acteco><Acteco>749009</Acteco>', xml_doc_bytes)
+        self.assertIn(b'<Reference URI="#F170T33">', xml_doc_bytes)
+        self._assert_round_trip(dte, xml_doc_bytes)
+
+    def test_render_dte_xml_documento_digest(self) -> None:
+        xml_doc = lxml.etree.fromstring(render_dte_xml(self.dte_1))
+        documento_em = xml_doc.find('sii-dte:Documento', namespaces=DTE_XMLNS_MAP)
+        digest_value_em = xml_doc.find('.//ds:DigestValue', namespaces=xml_utils.XML_DSIG_NS_MAP)
+
+        _, documento_em_digest = xml_utils.c14n_digest(documento_em, algorithm='sha1')
+        self.assertEqual(
+            digest_value_em.text, base64.standard_b64encode(documento_em_digest).decode('ascii'))
+
+    def test_render_dte_xml_fail_missing_required_field(self) -> None:
+        dte = dataclasses.replace(self.dte_1, emisor_giro=None)
+        with self.assertRaises(ValueError) as cm:
+            render_dte_xml(dte)
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("Value of 'emisor_giro' is required by the DTE XML schema.", )
+        )
+
+    def test_render_dte_xml_fail_tipo_dte_exportacion(self) -> None:
+        dte = dataclasses.replace(
+            self.dte_1,
+            tipo_dte=cl_sii.dte.constants.TipoDteEnum.FACTURA_EXPORTACION_ELECTRONICA)
+        with self.assertRaises(NotImplementedError):
+            render_dte_xml(dte)
+
+    def test_render_dte_xml_fail_type_error(self) -> None:
+        with self.assertRaises(TypeError):
+            render_dte_xml(self.dte_1.natural_key)  # type: ignore
+
+
+class FunctionWriteDteXmlManyTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        cls.dte_1 = parse_dte_xml(xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')))
+        cls.dte_2 = parse_dte_xml(xml_utils.parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76399752-9--33--25568--cleaned.xml')))
+
+    def test_write_dte_xml_many_ok(self) -> None:
+        dte_1_multiline = dataclasses.replace(
+            self.dte_1, folio=171, emisor_razon_social='LINE 1\nLINE 2')
+        dtes = [self.dte_1, self.dte_2, dte_1_multiline]
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            count = write_dte_xml_many(iter(dtes), output_dir_path)
+            self.assertEqual(count, 3)
+
+            self.assertEqual(
+                sorted(os.listdir(output_dir_path)),
+                [
+                    'DTE--76354771-K--33--170.xml',
+                    'DTE--76354771-K--33--171.xml',
+                    'DTE--76399752-9--33--25568.xml',
+                ])
+            for dte in dtes:
+                file_path = os.path.join(output_dir_path, f'DTE--{dte.natural_key.slug}.xml')
+                with open(file_path, mode='rb') as f:
+                    xml_doc_bytes = f.read()
+                self.assertEqual(xml_doc_bytes, render_dte_xml(dte))
+                self.assertEqual(parse_dte_xml(xml_utils.parse_untrusted_xml(xml_doc_bytes)), dte)
+
+    def test_write_dte_xml_many_fail_repeated_natural_key(self) -> None:
+        dtes = [self.dte_1, self.dte_2, self.dte_1]
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with self.assertRaises(ValueError) as cm:
+                write_dte_xml_many(dtes, output_dir_path)
+            self.assertSequenceEqual(
+                cm.exception.args, ("Natural key of DTE is repeated.", '76354771-K--33--170'))
+            # Nothing is written.
+            self.assertEqual(os.listdir(output_dir_path), [])
+
+    def test_write_dte_xml_many_fail_file_exists(self) -> None:
+        dtes = [self.dte_1, self.dte_2]
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            file_path = os.path.join(output_dir_path, 'DTE--76399752-9--33--25568.xml')
+            with open(file_path, mode='wb') as f:
+                f.write(b'existing')
+
+            with self.assertRaises(FileExistsError):
+                write_dte_xml_many(dtes, output_dir_path)
+            # Nothing is written, and the existing file is not overwritten.
+            self.assertEqual(os.listdir(output_dir_path), ['DTE--76399752-9--33--25568.xml'])
+            with open(file_path, mode='rb') as f:
+                self.assertEqual(f.read(), b'existing')
+
+    def test_write_envio_dte_xml_ok(self) -> None:
+        dtes = [
+            self.dte_1,
+            dataclasses.replace(self.dte_1, folio=171, emisor_razon_social='LINE 1\nLINE 2'),
+            dataclasses.replace(
+                self.dte_1, folio=5,
+                tipo_dte=cl_sii.dte.constants.TipoDteEnum.NOTA_CREDITO_ELECTRONICA),
+        ]
+
+        output = io.BytesIO()
+        count = write_envio_dte_xml(dtes, output, **self._envio_dte_kwargs())
+        self.assertEqual(count, 3)
+
+        xml_doc = xml_utils.parse_untrusted_xml(output.getvalue())
+        validate_dte_xml(xml_doc)
+        self.assertEqual(
+            xml_doc.findtext('sii-dte:SetDTE/sii-dte:Caratula/sii-dte:TmstFirmaEnv',
+                             namespaces=DTE_XMLNS_MAP),
+            '2019-04-01T01:02:03')
+        self.assertEqual(
+            [
+                (em.findtext('sii-dte:TpoDTE', namespaces=DTE_XMLNS_MAP),
+                 em.findtext('sii-dte:NroDTE', namespaces=DTE_XMLNS_MAP))
+                for em in xml_doc.iterfind(
+                    'sii-dte:SetDTE/sii-dte:Caratula/sii-dte:SubTotDTE', namespaces=DTE_XMLNS_MAP)
+            ],
+            [('33', '2'), ('61', '1')])
+
+        dte_ems = xml_doc.findall('sii-dte:SetDTE/sii-dte:DTE', namespaces=DTE_XMLNS_MAP)
+        self.assertEqual(len(dte_ems), 3)
+        for dte, dte_em in zip(dtes, dte_ems):
+            self.assertEqual(
+                parse_dte_xml(xml_utils.parse_untrusted_xml(lxml.etree.tostring(dte_em))), dte)
+
+    def test_write_envio_dte_xml_fail_emisor(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            write_envio_dte_xml(
+                [self.dte_1, self.dte_2], io.BytesIO(), **self._envio_dte_kwargs())
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("All the DTEs must be of the same emisor.", Rut('76399752-9')))
+
+    def test_write_envio_dte_xml_fail_count(self) -> None:
+        with self.assertRaises(ValueError):
+            write_envio_dte_xml([], io.BytesIO(), **self._envio_dte_kwargs())
+
+    def test_write_envio_dte_xml_fail_naive_dt(self) -> None:
+        kwargs = self._envio_dte_kwargs()
+        kwargs['firma_envio_dt'] = datetime(2019, 4, 1, 1, 2, 3)
+        with self.assertRaises(ValueError):
+            write_envio_dte_xml([self.dte_1], io.BytesIO(), **kwargs)
+
+    def _envio_dte_kwargs(self) -> dict:
+        return dict(
+            rut_envia=Rut('60803000-K'),
+            rut_receptor=Rut('60803000-K'),
+            fecha_resolucion=date(2014, 8, 22),
+            numero_resolucion=80,
+            firma_envio_dt=tz_utils.convert_naive_dt_to_tz_aware(
+                datetime(2019, 4, 1, 1, 2, 3), tz_utils.TZ_CL_SANTIAGO),
+        )
+
+    def test_render_dte_xml_many_ok(self) -> None:
+        dtes = [self.dte_1, self.dte_2]
+        self.assertEqual(
+            list(render_dte_xml_many(dtes)),
+            [render_dte_xml(dte) for dte in dtes])
+
+    def test_write_dte_xml_ok(self) -> None:
+        output = io.BytesIO()
+        write_dte_xml(self.dte_1, output)
+        self.assertEqual(output.getvalue(), render_dte_xml(self.dte_1))
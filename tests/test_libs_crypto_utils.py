@@ -1,16 +1,32 @@
+import os
+import tempfile
+import threading
 import unittest
-from datetime import datetime
+import unittest.mock
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
 
+import cryptography.hazmat.backends
+import cryptography.hazmat.primitives.asymmetric.ec
 import cryptography.hazmat.primitives.hashes
+import cryptography.hazmat.primitives.serialization
 import cryptography.x509
 from cryptography.x509 import oid
+import signxml.util
 
 from cl_sii.libs.crypto_utils import (  # noqa: F401
-    X509Cert, add_pem_cert_header_footer, load_der_x509_cert, load_pem_x509_cert,
+    DEFAULT_X509_CERT_CACHE, X509Cert, X509CertCache, X509CertCacheStats,
+    X509CertChainValidationError, X509CertChainValidator, X509CertIndex, X509CertMetadata,
+    add_pem_cert_header_footer, get_x509_cert_metadata, iter_pem_certs,
+    load_der_x509_cert, load_der_x509_cert_cached, load_pem_x509_cert,
     remove_pem_cert_header_footer,
-    x509_cert_der_to_pem, x509_cert_pem_to_der,
+    x509_cert_der_to_pem, x509_cert_der_to_pem_many, x509_cert_pem_to_der,
+    x509_cert_pem_to_der_many,
 )
 
+from cl_sii.libs import crypto_utils, tz_utils
+from cl_sii.rut import Rut
+
 from . import utils
 
 # TODO: get fake certificates, keys, and all the variations from
@@ -32,12 +48,105 @@ _SII_CERT_TITULAR_RUT_OID = oid.ObjectIdentifier("1.3.6.1.4.1.8321.1")
 class FunctionsTest(unittest.TestCase):
 
     def test_add_pem_cert_header_footer(self) -> None:
-        # TODO: implement for function 'add_pem_cert_header_footer'.
-        pass
+        value = b'MIIB' * 20
+
+        expected_output = (
+            b'-----BEGIN CERTIFICATE-----\n'
+            + b'MIIB' * 16 + b'\n'
+            + b'MIIB' * 4 + b'\n'
+            b'-----END CERTIFICATE-----')
+        self.assertEqual(add_pem_cert_header_footer(value), expected_output)
+        self.assertEqual(add_pem_cert_header_footer(memoryview(value)), expected_output)
+        self.assertEqual(add_pem_cert_header_footer(bytearray(value)), expected_output)
+        # Already present.
+        self.assertEqual(add_pem_cert_header_footer(expected_output), expected_output)
+        # Already wrapped.
+        self.assertEqual(
+            add_pem_cert_header_footer(b'MIIB' * 16 + b'\n' + b'MIIB' * 4),
+            expected_output)
+
+        self.assertEqual(
+            add_pem_cert_header_footer(b''),
+            b'-----BEGIN CERTIFICATE-----\n\n-----END CERTIFICATE-----')
 
     def test_remove_pem_cert_header_footer(self) -> None:
-        # TODO: implement for function 'remove_pem_cert_header_footer'.
-        pass
+        value = (
+            b'-----BEGIN CERTIFICATE-----\r\n'
+            + b'MIIB' * 16 + b'\r\n'
+            + b'MIIB' * 4 + b'\r\n'
+            b'-----END CERTIFICATE-----\r\n')
+
+        expected_output = b'MIIB' * 16 + b'\n' + b'MIIB' * 4
+        self.assertEqual(remove_pem_cert_header_footer(value), expected_output)
+        self.assertEqual(remove_pem_cert_header_footer(memoryview(value)), expected_output)
+        self.assertEqual(remove_pem_cert_header_footer(bytearray(value)), expected_output)
+        # Not present.
+        self.assertEqual(remove_pem_cert_header_footer(expected_output), expected_output)
+        self.assertEqual(remove_pem_cert_header_footer(b' MIIB\r\n'), b'MIIB')
+
+    def test_remove_pem_cert_header_footer_same_as_signxml(self) -> None:
+        header = b'-----BEGIN CERTIFICATE-----'
+        footer = b'-----END CERTIFICATE-----'
+        values = [
+            # Footer not preceded by a line break.
+            (header + b'\nABCD' + footer, b'ABCD'),
+            (header + b'\r\nA' + footer, b'A'),
+            # No data.
+            (header + b'\n\n' + footer, b''),
+            (header + b'\r\n\r\n' + footer, b''),
+            # There must be something between the header's line break and the footer.
+            (header + b'\n' + footer, header + b'\n' + footer),
+            (header + b'\n' + footer + b'\n' + footer, footer),
+            # The header must be followed by a line break.
+            (header + b'ABCD\n' + footer, header + b'ABCD\n' + footer),
+            (header + header + b'\nABCD\n' + footer, b'ABCD'),
+        ]
+        for value, expected_output in values:
+            with self.subTest(value=value):
+                self.assertEqual(remove_pem_cert_header_footer(value), expected_output)
+                self.assertEqual(
+                    remove_pem_cert_header_footer(value),
+                    signxml.util.strip_pem_header(value.decode('ascii')).encode('ascii').strip())
+
+    def test_x509_cert_der_to_pem_many_pem_to_der_many(self) -> None:
+        cert_der_bytes_list = [
+            utils.read_test_file_bytes('test_data/crypto/wildcard-google-com-cert.der'),
+            utils.read_test_file_bytes('test_data/sii-crypto/prueba-sii-cert.der'),
+        ]
+
+        cert_pem_bytes_list = x509_cert_der_to_pem_many(cert_der_bytes_list)
+        self.assertEqual(
+            cert_pem_bytes_list,
+            [x509_cert_der_to_pem(cert_der_bytes) for cert_der_bytes in cert_der_bytes_list])
+        self.assertEqual(
+            x509_cert_pem_to_der_many(map(memoryview, cert_pem_bytes_list)),
+            cert_der_bytes_list)
+
+        self.assertEqual(x509_cert_der_to_pem_many([]), [])
+        self.assertEqual(x509_cert_pem_to_der_many([]), [])
+
+    def test_iter_pem_certs(self) -> None:
+        cert_pem_bytes_1 = utils.read_test_file_bytes(
+            'test_data/crypto/wildcard-google-com-cert.pem')
+        cert_pem_bytes_2 = utils.read_test_file_bytes(
+            'test_data/sii-crypto/prueba-sii-cert.pem')
+        value = b'# Google\n' + cert_pem_bytes_1 + b'\n# SII\n' + cert_pem_bytes_2
+
+        certs = list(iter_pem_certs(value))
+        self.assertEqual(len(certs), 2)
+        for cert in certs:
+            self.assertIsInstance(cert, memoryview)
+        self.assertEqual(certs[0], cert_pem_bytes_1.strip())
+        self.assertEqual(certs[1], cert_pem_bytes_2.strip())
+        self.assertEqual(
+            x509_cert_pem_to_der_many(certs),
+            [x509_cert_pem_to_der(cert_pem_bytes_1), x509_cert_pem_to_der(cert_pem_bytes_2)])
+
+        self.assertEqual(list(iter_pem_certs(b'')), [])
+        self.assertEqual(list(iter_pem_certs(b'-----BEGIN CERTIFICATE-----\nMIIB')), [])
+        with self.assertRaises(TypeError) as cm:
+            list(iter_pem_certs('-----BEGIN CERTIFICATE-----'))
+        self.assertEqual(cm.exception.args, ("Value must be bytes.", ))
 
 
 class LoadPemX509CertTest(unittest.TestCase):
@@ -758,3 +867,495 @@ class LoadPemX509CertTest(unittest.TestCase):
     def test_remove_pem_cert_header_footer(self) -> None:
         # TODO: implement for 'remove_pem_cert_header_footer'
         pass
+
+
+class X509CertCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cert_der_bytes_1 = utils.read_test_file_bytes(
+            'test_data/sii-crypto/DTE--76354771-K--33--170-cert.der')
+        self.cert_der_bytes_2 = utils.read_test_file_bytes(
+            'test_data/sii-crypto/DTE--76399752-9--33--25568-cert.der')
+        self.cert_der_bytes_3 = utils.read_test_file_bytes(
+            'test_data/sii-crypto/prueba-sii-cert.der')
+
+    def test_load_der_x509_cert_hit_and_miss(self) -> None:
+        cache = X509CertCache()
+
+        x509_cert = cache.load_der_x509_cert(self.cert_der_bytes_1)
+        self.assertIsInstance(x509_cert, X509Cert)
+        self.assertEqual(x509_cert, load_der_x509_cert(self.cert_der_bytes_1))
+        # note: an equal value that is a different object is a hit too.
+        self.assertIs(cache.load_der_x509_cert(bytes(bytearray(self.cert_der_bytes_1))), x509_cert)
+        self.assertIsNot(cache.load_der_x509_cert(self.cert_der_bytes_2), x509_cert)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats, X509CertCacheStats(hits=1, misses=2, evictions=0))
+
+    def test_eviction(self) -> None:
+        cache = X509CertCache(max_size=2)
+
+        x509_cert_1 = cache.load_der_x509_cert(self.cert_der_bytes_1)
+        cache.load_der_x509_cert(self.cert_der_bytes_2)
+        # The least recently used certificate is the second one.
+        self.assertIs(cache.load_der_x509_cert(self.cert_der_bytes_1), x509_cert_1)
+        cache.load_der_x509_cert(self.cert_der_bytes_3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats, X509CertCacheStats(hits=1, misses=3, evictions=1))
+
+        self.assertIs(cache.load_der_x509_cert(self.cert_der_bytes_1), x509_cert_1)
+        cache.load_der_x509_cert(self.cert_der_bytes_2)
+        self.assertEqual(cache.stats, X509CertCacheStats(hits=2, misses=4, evictions=2))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats, X509CertCacheStats(hits=2, misses=4, evictions=4))
+
+    def test_threads(self) -> None:
+        cache = X509CertCache(max_size=2)
+        values = [self.cert_der_bytes_1, self.cert_der_bytes_2, self.cert_der_bytes_3] * 100
+        errors = []
+
+        def load_all() -> None:
+            try:
+                for value in values:
+                    cache.load_der_x509_cert(value)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=load_all) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats.hits + cache.stats.misses, len(values) * 4)
+        self.assertEqual(cache.stats.misses - cache.stats.evictions, 2)
+
+    def test_fail_type_error(self) -> None:
+        cache = X509CertCache()
+        with self.assertRaises(TypeError) as cm:
+            cache.load_der_x509_cert(bytearray(self.cert_der_bytes_1))
+        self.assertEqual(cm.exception.args, ("Value must be bytes.", ))
+
+    def test_fail_value_error_not_cached(self) -> None:
+        cache = X509CertCache()
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                cache.load_der_x509_cert(b'hello')
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats, X509CertCacheStats(hits=0, misses=2, evictions=0))
+
+    def test_fail_max_size(self) -> None:
+        with self.assertRaises(ValueError):
+            X509CertCache(max_size=0)
+
+    def test_load_der_x509_cert_cached(self) -> None:
+        x509_cert = load_der_x509_cert_cached(self.cert_der_bytes_1)
+        hits = DEFAULT_X509_CERT_CACHE.stats.hits
+        self.assertIs(load_der_x509_cert_cached(self.cert_der_bytes_1), x509_cert)
+        self.assertEqual(DEFAULT_X509_CERT_CACHE.stats.hits, hits + 1)
+
+
+class X509CertMetadataTest(unittest.TestCase):
+
+    def test_get_x509_cert_metadata_ok_cert_real_dte(self) -> None:
+        cert_der_bytes = utils.read_test_file_bytes(
+            'test_data/sii-crypto/DTE--76354771-K--33--170-cert.der')
+
+        cert = get_x509_cert_metadata(load_der_x509_cert(cert_der_bytes))
+
+        self.assertEqual(
+            cert,
+            X509CertMetadata(
+                fingerprint=(
+                    b'-\x14\x90\x0b;\xb8\xe2\xe9\x9f\xe8x!\xcc\x16\xbe\x8e'
+                    b'\x8c\xc1k\x10Z\xfd\xdd\xb6\x9b"\xfb\xbe\r\xbb\xb7\x08'),
+                serial_number=232680798042554446173213,
+                issuer=(
+                    '1.2.840.113549.1.9.1=sclientes@e-certchile.cl,'
+                    'CN=E-CERTCHILE CA FIRMA ELECTRONICA SIMPLE,'
+                    'OU=Autoridad Certificadora,'
+                    'O=E-CERTCHILE,'
+                    'L=Santiago,'
+                    'ST=Region Metropolitana,'
+                    'C=CL'),
+                subject_rut=Rut('13185095-6'),
+                not_valid_before=tz_utils.convert_naive_dt_to_tz_aware(
+                    datetime(2017, 9, 4, 21, 11, 12), tz_utils.TZ_UTC),
+                not_valid_after=tz_utils.convert_naive_dt_to_tz_aware(
+                    datetime(2020, 9, 3, 21, 11, 12), tz_utils.TZ_UTC),
+            ))
+
+        self.assertTrue(cert.is_valid_at(cert.not_valid_before))
+        self.assertTrue(cert.is_valid_at(cert.not_valid_after))
+        self.assertFalse(cert.is_valid_at(cert.not_valid_after + timedelta(seconds=1)))
+
+    def test_get_x509_cert_metadata_ok_without_subject_rut(self) -> None:
+        cert_der_bytes = utils.read_test_file_bytes(
+            'test_data/crypto/wildcard-google-com-cert.der')
+
+        cert = get_x509_cert_metadata(load_der_x509_cert(cert_der_bytes))
+
+        self.assertIsNone(cert.subject_rut)
+        self.assertEqual(cert.serial_number, 122617997729991213273569581938043448870)
+
+
+class X509CertIndexTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cert_der_bytes_1 = utils.read_test_file_bytes(
+            'test_data/sii-crypto/DTE--76354771-K--33--170-cert.der')
+        self.cert_der_bytes_2 = utils.read_test_file_bytes(
+            'test_data/sii-crypto/DTE--76399752-9--33--25568-cert.der')
+
+        self.index = X509CertIndex()
+        self.key_1 = (Rut('76354771-K'), 170)
+        self.key_2 = (Rut('76354771-K'), 171)
+        self.key_3 = (Rut('16477752-9'), 25568)
+        self.cert_1 = self.index.add(self.cert_der_bytes_1, key=self.key_1)
+        self.index.add(self.cert_der_bytes_1, key=self.key_2)
+        self.cert_2 = self.index.add(self.cert_der_bytes_2, key=self.key_3)
+
+    def test_add(self) -> None:
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.certs, [self.cert_1, self.cert_2])
+        self.assertEqual(self.cert_1.subject_rut, Rut('13185095-6'))
+        self.assertEqual(self.cert_2.subject_rut, Rut('16477752-9'))
+
+        # Deduplicated.
+        self.assertIs(self.index.add(self.cert_der_bytes_1), self.cert_1)
+        self.assertEqual(len(self.index), 2)
+
+        self.assertIs(self.index.get(self.cert_1.fingerprint), self.cert_1)
+        self.assertIsNone(self.index.get(b'x' * 32))
+        self.assertIs(self.index.get_for_key(self.key_2), self.cert_1)
+        self.assertIsNone(self.index.get_for_key('x'))
+
+        # The key refers to another certificate.
+        self.index.add(self.cert_der_bytes_2, key=self.key_2)
+        self.assertIs(self.index.get_for_key(self.key_2), self.cert_2)
+
+    def test_add_fail(self) -> None:
+        with self.assertRaises(TypeError) as cm:
+            self.index.add(bytearray(self.cert_der_bytes_1))
+        self.assertEqual(cm.exception.args, ("Value must be bytes.", ))
+
+        with self.assertRaises(ValueError):
+            self.index.add(b'hello', key='x')
+        self.assertEqual(len(self.index), 2)
+        self.assertIsNone(self.index.get_for_key('x'))
+
+    def test_find_certs_and_keys(self) -> None:
+        dt = tz_utils.convert_naive_dt_to_tz_aware(datetime(2020, 3, 1), tz_utils.TZ_UTC)
+        calls = []
+
+        def is_expired(cert: X509CertMetadata) -> bool:
+            calls.append(cert)
+            return cert.not_valid_after < dt
+
+        self.assertEqual(self.index.find_certs(is_expired), [self.cert_2])
+        calls.clear()
+        self.assertEqual(self.index.find_keys(is_expired), [self.key_3])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(
+            self.index.find_keys(lambda cert: cert.is_valid_at(dt)),
+            [self.key_1, self.key_2])
+        self.assertEqual(self.index.find_keys(lambda cert: False), [])
+
+    def test_iter_items(self) -> None:
+        self.assertEqual(
+            list(self.index.iter_items()),
+            [(self.key_1, self.cert_1), (self.key_2, self.cert_1), (self.key_3, self.cert_2)])
+        self.assertEqual(
+            [key for key, cert in self.index.iter_items() if cert.subject_rut != key[0]],
+            [self.key_1, self.key_2])
+
+    def test_threads(self) -> None:
+        index = X509CertIndex()
+
+        def add_all(thread_index: int) -> None:
+            for i in range(50):
+                index.add(self.cert_der_bytes_1, key=(thread_index, i))
+                index.add(self.cert_der_bytes_2)
+
+        threads = [threading.Thread(target=add_all, args=(i, )) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(len(list(index.iter_items())), 200)
+
+
+def _create_x509_cert(
+    common_name: str,
+    issuer: Optional[Tuple[X509Cert, object]] = None,
+    is_ca: bool = True,
+    not_valid_before: datetime = datetime(2018, 1, 1),
+    not_valid_after: datetime = datetime(2028, 1, 1),
+    basic_constraints: bool = True,
+    path_length: Optional[int] = None,
+    key_usage: Optional[cryptography.x509.KeyUsage] = None,
+) -> Tuple[X509Cert, object]:
+    """
+    Create a certificate and its private key (self-signed if ``issuer`` is ``None``).
+    """
+    backend = cryptography.hazmat.backends.default_backend()
+    private_key = cryptography.hazmat.primitives.asymmetric.ec.generate_private_key(
+        cryptography.hazmat.primitives.asymmetric.ec.SECP256R1(), backend)
+    name = cryptography.x509.Name([
+        cryptography.x509.NameAttribute(oid.NameOID.COMMON_NAME, common_name)])
+    issuer_x509_cert, issuer_private_key = issuer if issuer is not None else (None, private_key)
+
+    builder = cryptography.x509.CertificateBuilder() \
+        .subject_name(name) \
+        .issuer_name(issuer_x509_cert.subject if issuer_x509_cert is not None else name) \
+        .public_key(private_key.public_key()) \
+        .serial_number(cryptography.x509.random_serial_number()) \
+        .not_valid_before(not_valid_before) \
+        .not_valid_after(not_valid_after)
+    if basic_constraints:
+        builder = builder.add_extension(
+            cryptography.x509.BasicConstraints(ca=is_ca, path_length=path_length), True)
+    if key_usage is not None:
+        builder = builder.add_extension(key_usage, True)
+    x509_cert = builder.sign(
+        issuer_private_key, cryptography.hazmat.primitives.hashes.SHA256(), backend)
+    return x509_cert, private_key
+
+
+def _create_key_usage(key_cert_sign: bool) -> cryptography.x509.KeyUsage:
+    return cryptography.x509.KeyUsage(
+        digital_signature=True, content_commitment=False, key_encipherment=False,
+        data_encipherment=False, key_agreement=False, key_cert_sign=key_cert_sign,
+        crl_sign=key_cert_sign, encipher_only=False, decipher_only=False)
+
+
+def _create_x509_crl(
+    issuer: Tuple[X509Cert, object],
+    revoked: Tuple[Tuple[X509Cert, datetime], ...],
+) -> cryptography.x509.CertificateRevocationList:
+    backend = cryptography.hazmat.backends.default_backend()
+    issuer_x509_cert, issuer_private_key = issuer
+
+    builder = cryptography.x509.CertificateRevocationListBuilder() \
+        .issuer_name(issuer_x509_cert.subject) \
+        .last_update(datetime(2019, 1, 1)) \
+        .next_update(datetime(2029, 1, 1))
+    for revoked_x509_cert, revocation_date in revoked:
+        builder = builder.add_revoked_certificate(
+            cryptography.x509.RevokedCertificateBuilder()
+            .serial_number(revoked_x509_cert.serial_number)
+            .revocation_date(revocation_date)
+            .build(backend))
+    return builder.sign(issuer_private_key, cryptography.hazmat.primitives.hashes.SHA256(), backend)
+
+
+def _get_der(value: object) -> bytes:
+    return value.public_bytes(cryptography.hazmat.primitives.serialization.Encoding.DER)
+
+
+class X509CertChainValidatorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.root = _create_x509_cert('Root CA')
+        cls.intermediate = _create_x509_cert('Intermediate CA', issuer=cls.root)
+        cls.leaf_1 = _create_x509_cert(
+            'Leaf 1', issuer=cls.intermediate, is_ca=False, not_valid_after=datetime(2020, 1, 1))
+        cls.leaf_2 = _create_x509_cert('Leaf 2', issuer=cls.intermediate, is_ca=False)
+        cls.leaf_revoked = _create_x509_cert('Leaf 3', issuer=cls.intermediate, is_ca=False)
+        cls.crl = _create_x509_crl(
+            cls.intermediate, ((cls.leaf_revoked[0], datetime(2019, 6, 1)), ))
+
+    def setUp(self) -> None:
+        self.validator = X509CertChainValidator(
+            ca_certs=[self.root[0], self.intermediate[0]], crls=[self.crl])
+        self.dt = tz_utils.convert_naive_dt_to_tz_aware(datetime(2019, 3, 1), tz_utils.TZ_UTC)
+
+    def test_validate_ok(self) -> None:
+        self.validator.validate(_get_der(self.leaf_1[0]), at=self.dt)
+        self.validator.validate(_get_der(self.leaf_2[0]), at=self.dt)
+        self.validator.validate(_get_der(self.leaf_2[0]))
+        self.validator.validate(_get_der(self.intermediate[0]), at=self.dt)
+        self.validator.validate(_get_der(self.root[0]), at=self.dt)
+
+    def test_validate_memoized(self) -> None:
+        with unittest.mock.patch.object(
+            crypto_utils, '_verify_x509_cert_signature',
+            wraps=crypto_utils._verify_x509_cert_signature,
+        ) as mock_verify:
+            for _ in range(3):
+                self.validator.validate(_get_der(self.leaf_1[0]), at=self.dt)
+                self.validator.validate(_get_der(self.leaf_2[0]), at=self.dt)
+
+        # The signatures of each leaf and of the intermediate CA, once.
+        self.assertEqual(mock_verify.call_count, 3)
+
+        self.validator.clear_cache()
+        self.validator.validate(_get_der(self.leaf_1[0]), at=self.dt)
+
+    def test_validate_fail_not_valid_at(self) -> None:
+        with self.assertRaises(X509CertChainValidationError) as cm:
+            self.validator.validate(
+                _get_der(self.leaf_1[0]),
+                at=tz_utils.convert_naive_dt_to_tz_aware(datetime(2020, 3, 1), tz_utils.TZ_UTC))
+        self.assertEqual(
+            cm.exception.args,
+            ("A certificate of the chain is not valid at 2020-03-01T00:00:00+00:00.", ))
+
+    def test_validate_fail_revoked(self) -> None:
+        self.validator.validate(_get_der(self.leaf_revoked[0]), at=self.dt)
+        with self.assertRaises(X509CertChainValidationError) as cm:
+            self.validator.validate(_get_der(self.leaf_revoked[0]))
+        self.assertEqual(
+            cm.exception.args,
+            ("A certificate of the chain was revoked at 2019-06-01T00:00:00+00:00.", ))
+
+    def test_validate_fail_revoked_intermediate(self) -> None:
+        crl = _create_x509_crl(self.root, ((self.intermediate[0], datetime(2019, 6, 1)), ))
+        validator = X509CertChainValidator(
+            ca_certs=[self.root[0], self.intermediate[0]], crls=[self.crl, crl])
+
+        validator.validate(_get_der(self.leaf_2[0]), at=self.dt)
+        with self.assertRaises(X509CertChainValidationError):
+            validator.validate(_get_der(self.leaf_2[0]))
+
+    def test_validate_fail_crl_signature_not_valid(self) -> None:
+        # The CRL is signed by another key with the same name as the intermediate CA.
+        other_intermediate = _create_x509_cert('Intermediate CA', issuer=self.root)
+        crl = _create_x509_crl(other_intermediate, ((self.leaf_2[0], datetime(2019, 6, 1)), ))
+        validator = X509CertChainValidator(
+            ca_certs=[self.root[0], self.intermediate[0]], crls=[crl])
+
+        validator.validate(_get_der(self.leaf_2[0]))
+
+    def test_validate_fail_issuer_not_in_trust_store(self) -> None:
+        validator = X509CertChainValidator(ca_certs=[self.root[0]])
+        with self.assertRaises(X509CertChainValidationError) as cm:
+            validator.validate(_get_der(self.leaf_2[0]))
+        self.assertEqual(
+            cm.exception.args,
+            ("Issuer of certificate is not in the trust store: 'CN=Intermediate CA'.", ))
+
+        with self.assertRaises(X509CertChainValidationError):
+            validator.validate(utils.read_test_file_bytes(
+                'test_data/sii-crypto/DTE--76354771-K--33--170-cert.der'))
+
+    def test_validate_fail_signature_not_valid(self) -> None:
+        other_intermediate = _create_x509_cert('Intermediate CA', issuer=self.root)
+        leaf = _create_x509_cert('Leaf 4', issuer=other_intermediate, is_ca=False)
+        with self.assertRaises(X509CertChainValidationError) as cm:
+            self.validator.validate(_get_der(leaf[0]))
+        self.assertEqual(
+            cm.exception.args,
+            ("Signature of certificate is not valid for any CA certificate of its issuer.", ))
+
+        # The issuer is not a CA.
+        leaf = _create_x509_cert('Leaf 5', issuer=self.leaf_2, is_ca=False)
+        validator = X509CertChainValidator(
+            ca_certs=[self.root[0], self.intermediate[0], self.leaf_2[0]])
+        with self.assertRaises(X509CertChainValidationError):
+            validator.validate(_get_der(leaf[0]))
+
+    def test_validate_fail_issuer_not_ca(self) -> None:
+        issuers = {
+            'without basic constraints': _create_x509_cert(
+                'Intermediate CA 2', issuer=self.root, basic_constraints=False),
+            'without key usage key_cert_sign': _create_x509_cert(
+                'Intermediate CA 2', issuer=self.root,
+                key_usage=_create_key_usage(key_cert_sign=False)),
+        }
+        for description, issuer in issuers.items():
+            with self.subTest(issuer=description):
+                leaf = _create_x509_cert('Leaf 6', issuer=issuer, is_ca=False)
+                validator = X509CertChainValidator(ca_certs=[self.root[0], issuer[0]])
+
+                validator.validate(_get_der(issuer[0]))
+                with self.assertRaises(X509CertChainValidationError) as cm:
+                    validator.validate(_get_der(leaf[0]))
+                self.assertEqual(
+                    cm.exception.args,
+                    ("Signature of certificate is not valid for any CA certificate of its "
+                     "issuer.", ))
+
+        issuer = _create_x509_cert(
+            'Intermediate CA 2', issuer=self.root, key_usage=_create_key_usage(key_cert_sign=True))
+        leaf = _create_x509_cert('Leaf 6', issuer=issuer, is_ca=False)
+        X509CertChainValidator(ca_certs=[self.root[0], issuer[0]]).validate(_get_der(leaf[0]))
+
+    def test_validate_path_length(self) -> None:
+        root = _create_x509_cert('Root CA 2', path_length=1)
+        intermediate_1 = _create_x509_cert('Intermediate CA 2', issuer=root)
+        intermediate_2 = _create_x509_cert('Intermediate CA 3', issuer=intermediate_1)
+        leaf_1 = _create_x509_cert('Leaf 7', issuer=intermediate_1, is_ca=False)
+        leaf_2 = _create_x509_cert('Leaf 8', issuer=intermediate_2, is_ca=False)
+        validator = X509CertChainValidator(
+            ca_certs=[root[0], intermediate_1[0], intermediate_2[0]])
+
+        validator.validate(_get_der(leaf_1[0]))
+        # The constraint applies to the certificates that 'intermediate_2' issues, not to itself.
+        validator.validate(_get_der(intermediate_2[0]))
+        with self.assertRaises(X509CertChainValidationError) as cm:
+            validator.validate(_get_der(leaf_2[0]))
+        self.assertEqual(
+            cm.exception.args,
+            ("Path length constraint of a CA certificate of the chain is exceeded.", ))
+
+        # The constraint of an intermediate CA.
+        intermediate_1 = _create_x509_cert('Intermediate CA 2', issuer=self.root, path_length=0)
+        intermediate_2 = _create_x509_cert('Intermediate CA 3', issuer=intermediate_1)
+        leaf_1 = _create_x509_cert('Leaf 7', issuer=intermediate_1, is_ca=False)
+        leaf_2 = _create_x509_cert('Leaf 8', issuer=intermediate_2, is_ca=False)
+        validator = X509CertChainValidator(
+            ca_certs=[self.root[0], intermediate_1[0], intermediate_2[0]])
+
+        validator.validate(_get_der(leaf_1[0]))
+        with self.assertRaises(X509CertChainValidationError):
+            validator.validate(_get_der(leaf_2[0]))
+
+    def test_validate_fail_type_error(self) -> None:
+        with self.assertRaises(TypeError):
+            self.validator.validate(bytearray(_get_der(self.leaf_2[0])))
+
+    def test_validate_fail_value_error(self) -> None:
+        with self.assertRaises(ValueError):
+            self.validator.validate(b'hello')
+        with self.assertRaises(ValueError) as cm:
+            self.validator.validate(_get_der(self.leaf_2[0]), at=datetime(2019, 3, 1))
+        self.assertEqual(cm.exception.args, ("Value of 'at' must be timezone-aware.", ))
+
+    def test_from_dir(self) -> None:
+        pem_encoding = cryptography.hazmat.primitives.serialization.Encoding.PEM
+        with tempfile.TemporaryDirectory() as dir_path:
+            files = {
+                'root.der': _get_der(self.root[0]),
+                # A bundle.
+                'intermediates.pem': (
+                    self.intermediate[0].public_bytes(pem_encoding)
+                    + _create_x509_cert('Other CA')[0].public_bytes(pem_encoding)),
+                'intermediate.crl': self.crl.public_bytes(pem_encoding),
+                'README.txt': b'Trust store.',
+            }
+            for file_name, value in files.items():
+                with open(os.path.join(dir_path, file_name), mode='wb') as f:
+                    f.write(value)
+
+            validator = X509CertChainValidator.from_dir(dir_path)
+
+            with open(os.path.join(dir_path, 'invalid.crt'), mode='wb') as f:
+                f.write(b'hello')
+            with self.assertRaises(ValueError) as cm:
+                X509CertChainValidator.from_dir(dir_path)
+            self.assertEqual(
+                cm.exception.args,
+                (f"Invalid file in trust store: {os.path.join(dir_path, 'invalid.crt')!r}.", ))
+
+        validator.validate(_get_der(self.leaf_2[0]))
+        validator.validate(_get_der(self.leaf_revoked[0]), at=self.dt)
+        with self.assertRaises(X509CertChainValidationError):
+            validator.validate(_get_der(self.leaf_revoked[0]))
@@ -1,17 +1,139 @@
+import base64
+import io
 import unittest
 
-from cl_sii.libs.encoding_utils import clean_base64, decode_base64_strict, validate_base64  # noqa: F401,E501
+from cl_sii.libs.encoding_utils import (  # noqa: F401
+    clean_base64, decode_base64_strict, decode_base64_strict_many, decode_base64_strict_stream,
+    validate_base64,
+)
 
 
 class FunctionsTest(unittest.TestCase):
 
     def test_clean_base64(self):
-        # TODO: implement for function 'clean_base64'.
-        pass
+        value = b' aGVs\r\nbG8g\td29y\nbGQ= '
+        expected_output = b'aGVsbG8gd29ybGQ='
+
+        self.assertEqual(clean_base64(value), expected_output)
+        self.assertEqual(clean_base64(bytearray(value)), expected_output)
+        self.assertEqual(clean_base64(memoryview(value)), expected_output)
+        self.assertEqual(clean_base64(value.decode('ascii')), expected_output)
+        self.assertIs(clean_base64(expected_output), expected_output)
+
+        with self.assertRaises(ValueError):
+            clean_base64('aGVsbG8gd29ybGQ=ñ')
+        with self.assertRaises(TypeError) as cm:
+            clean_base64(1)
+        self.assertEqual(cm.exception.args, ("Value must be str or bytes.", ))
 
     def test_decode_base64_strict(self):
-        # TODO: implement for function 'decode_base64_strict'.
-        pass
+        value = b'aGVs\r\nbG8g\nd29y\nbGQ=\n'
+
+        self.assertEqual(decode_base64_strict(value), b'hello world')
+        self.assertEqual(decode_base64_strict(memoryview(value)), b'hello world')
+        self.assertEqual(decode_base64_strict(value.decode('ascii')), b'hello world')
+
+        with self.assertRaises(ValueError) as cm:
+            decode_base64_strict(b'aGVsbG8gd29ybGQ=-')
+        self.assertEqual(cm.exception.args[0], "Input is not a valid base64 value.")
+
+    def test_decode_base64_strict_many(self):
+        self.assertEqual(
+            decode_base64_strict_many([b'aGVs\nbG8=', 'd29y\nbGQ=', memoryview(b'')]),
+            [b'hello', b'world', b''])
+        self.assertEqual(decode_base64_strict_many([]), [])
+
+        with self.assertRaises(ValueError):
+            decode_base64_strict_many([b'aGVsbG8=', b'aGVsbG8'])
+
+    def test_decode_base64_strict_stream(self):
+        value_bytes = bytes(range(256)) * 10
+        value = base64.encodebytes(value_bytes)
+
+        for chunk_size in (1, 3, 4, 5, 77, len(value)):
+            output = io.BytesIO()
+            decoded_size = decode_base64_strict_stream(
+                io.BytesIO(value), output, chunk_size=chunk_size)
+            self.assertEqual(output.getvalue(), value_bytes)
+            self.assertEqual(decoded_size, len(value_bytes))
+
+        output = io.BytesIO()
+        decode_base64_strict_stream(io.StringIO(value.decode('ascii')), output, chunk_size=10)
+        self.assertEqual(output.getvalue(), value_bytes)
+
+        output = io.BytesIO()
+        decode_base64_strict_stream(['aGVs\r\n', b'bG8g', memoryview(b'd29y\nbG'), 'Q=\n'], output)
+        self.assertEqual(output.getvalue(), b'hello world')
+
+        output = io.BytesIO()
+        self.assertEqual(decode_base64_strict_stream([], output), 0)
+        self.assertEqual(output.getvalue(), b'')
+
+    def test_decode_base64_strict_stream_same_as_decode_base64_strict(self):
+        values = [
+            b'', b'\n', b'aGVsbG8=', b'aGVsbG8', b'aGVsbA==', b'aGVsbA=', b'aGVsbA===',
+            b'aGVsbG8h', b'aGVsbG8h=', b'aGVsbG8h==', b'aGVsbG8h===', b'aGVsbG8h=aA==',
+            b'=', b'====', b'aGVs-bG8=', b'aGVs\x0bbG8=', b'a',
+        ]
+        for value in values:
+            try:
+                expected_output = decode_base64_strict(value)
+            except ValueError:
+                expected_output = None
+
+            for chunk_size in (1, 2, 3, 5):
+                with self.subTest(value=value, chunk_size=chunk_size):
+                    output = io.BytesIO()
+                    if expected_output is None:
+                        with self.assertRaises(ValueError):
+                            decode_base64_strict_stream(
+                                io.BytesIO(value), output, chunk_size=chunk_size)
+                    else:
+                        decode_base64_strict_stream(
+                            io.BytesIO(value), output, chunk_size=chunk_size)
+                        self.assertEqual(output.getvalue(), expected_output)
+
+    def test_decode_base64_strict_stream_same_as_decode_base64_strict_str(self):
+        # note: 'str' values (unlike 'bytes' ones) are stripped of any whitespace.
+        values = [
+            '', '\x0b', 'aGVsbG8=', '\x0baGVsbG8=\x0c', ' \x0c\naGVsbG8=\r\n\x0b\x0c ',
+            '\u2003aGVsbG8=\xa0', 'aGVs\x0bbG8=', 'aGVs \x0c bG8=', 'aGVs\xa0bG8=',
+            '\x0baGVsbA==\x0c\x0b\x0c\x0b\x0c\x0b\x0c', 'aGVsbA==\x0c\x0b=',
+        ]
+        for value in values:
+            try:
+                expected_output = decode_base64_strict(value)
+            except ValueError:
+                expected_output = None
+
+            for chunk_size in (1, 2, 3, 5, 100):
+                with self.subTest(value=value, chunk_size=chunk_size):
+                    output = io.BytesIO()
+                    if expected_output is None:
+                        with self.assertRaises(ValueError):
+                            decode_base64_strict_stream(
+                                io.StringIO(value), output, chunk_size=chunk_size)
+                    else:
+                        decode_base64_strict_stream(
+                            io.StringIO(value), output, chunk_size=chunk_size)
+                        self.assertEqual(output.getvalue(), expected_output)
+
+    def test_decode_base64_strict_stream_fail(self):
+        with self.assertRaises(ValueError) as cm:
+            decode_base64_strict_stream([b'aGVsbA==', b'aGVsbA=='], io.BytesIO())
+        self.assertEqual(
+            cm.exception.args, ("Input is not a valid base64 value.", "Excess data after padding"))
+
+        with self.assertRaises(ValueError) as cm:
+            decode_base64_strict_stream(['aGVs', 'bG8ñ'], io.BytesIO())
+        self.assertEqual(cm.exception.args[0], "Only ASCII characters are accepted.")
+
+        with self.assertRaises(ValueError) as cm:
+            decode_base64_strict_stream(io.BytesIO(b'aGVsbG8='), io.BytesIO(), chunk_size=0)
+        self.assertEqual(cm.exception.args, ("Value of 'chunk_size' must be positive.", ))
+
+        with self.assertRaises(TypeError):
+            decode_base64_strict_stream([1], io.BytesIO())
 
     def test_validate_base64(self):
         # TODO: implement for function 'validate_base64'.
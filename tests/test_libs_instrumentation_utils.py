@@ -0,0 +1,146 @@
+import io
+import threading
+import unittest
+from typing import List
+
+from cl_sii.dte.parse import DTE_XMLNS, clean_dte_xml, parse_dte_xml, validate_dte_xml
+from cl_sii.libs import xml_utils
+
+from cl_sii.libs.instrumentation_utils import (
+    StageEvent, StageTracer, add_stage_callback, bytes_input_size, instrument_stage,
+    remove_stage_callback,
+)
+
+from .utils import read_test_file_bytes
+
+
+class StageTracerTest(unittest.TestCase):
+
+    def test_dte_xml_pipeline(self) -> None:
+        xml_doc_bytes = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170.xml')
+
+        with StageTracer() as tracer:
+            xml_doc = xml_utils.parse_untrusted_xml(xml_doc_bytes)
+            xml_doc, _ = clean_dte_xml(xml_doc, set_missing_xmlns=True)
+            validate_dte_xml(xml_doc)
+            parse_dte_xml(xml_doc)
+
+        # The XML doc is re-parsed when the missing namespace is set: compute the size of the
+        #   XML doc with the namespace set, the same way.
+        xml_doc_with_xmlns = xml_utils.parse_untrusted_xml(xml_doc_bytes)
+        xml_doc_with_xmlns.set('xmlns', DTE_XMLNS)
+        f = io.BytesIO()
+        xml_utils.write_xml_doc(xml_doc_with_xmlns, f)
+        xml_doc_with_xmlns_size = len(f.getvalue())
+
+        self.assertEqual(
+            [(event.stage, event.input_size, event.outcome) for event in tracer.events],
+            [
+                ('xml_utils.parse_untrusted_xml', len(xml_doc_bytes), 'ok'),
+                ('xml_utils.parse_untrusted_xml', xml_doc_with_xmlns_size, 'ok'),
+                ('dte.parse.clean_dte_xml', None, 'ok'),
+                ('dte.parse.validate_dte_xml', None, 'ok'),
+                ('dte.parse.parse_dte_xml', None, 'ok'),
+            ])
+        for event in tracer.events:
+            self.assertGreater(event.duration, 0)
+
+    def test_error_outcome(self) -> None:
+        with StageTracer() as tracer:
+            with self.assertRaises(xml_utils.XmlSyntaxError) as cm:
+                xml_utils.parse_untrusted_xml(b'not xml')
+
+        self.assertEqual(len(tracer.events), 1)
+        self.assertEqual(tracer.events[0].outcome, 'error')
+        self.assertIs(tracer.events[0].exception, cm.exception)
+
+    def test_not_active_outside_block(self) -> None:
+        tracer = StageTracer()
+        xml_utils.parse_untrusted_xml(b'<root/>')
+        with tracer:
+            xml_utils.parse_untrusted_xml(b'<root/>')
+        xml_utils.parse_untrusted_xml(b'<root/>')
+
+        self.assertEqual(len(tracer.events), 1)
+
+    def test_nested(self) -> None:
+        callback_events: List[StageEvent] = []
+
+        with StageTracer(callback=callback_events.append) as outer_tracer:
+            xml_utils.parse_untrusted_xml(b'<root/>')
+            with StageTracer() as inner_tracer:
+                xml_utils.parse_untrusted_xml(b'<root/>')
+
+        self.assertEqual(len(outer_tracer.events), 2)
+        self.assertEqual(len(inner_tracer.events), 1)
+        self.assertEqual(callback_events, outer_tracer.events)
+
+    def test_other_threads_not_traced(self) -> None:
+        thread = threading.Thread(target=xml_utils.parse_untrusted_xml, args=(b'<root/>', ))
+
+        with StageTracer() as tracer:
+            thread.start()
+            thread.join()
+
+        self.assertEqual(tracer.events, [])
+
+    def test_fail_already_active(self) -> None:
+        tracer = StageTracer()
+        with tracer:
+            with self.assertRaises(RuntimeError):
+                with tracer:
+                    pass
+
+
+class FunctionAddStageCallbackTest(unittest.TestCase):
+
+    def test_add_and_remove(self) -> None:
+        events: List[StageEvent] = []
+
+        add_stage_callback(events.append)
+        try:
+            thread = threading.Thread(target=xml_utils.parse_untrusted_xml, args=(b'<root/>', ))
+            thread.start()
+            thread.join()
+        finally:
+            remove_stage_callback(events.append)
+        xml_utils.parse_untrusted_xml(b'<root/>')
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].stage, 'xml_utils.parse_untrusted_xml')
+        self.assertEqual(events[0].input_size, 7)
+
+        with self.assertRaises(ValueError):
+            remove_stage_callback(events.append)
+
+    def test_callback_exception_is_ignored(self) -> None:
+        def callback(event: StageEvent) -> None:
+            raise Exception("Error in callback.")
+
+        with self.assertLogs('cl_sii.libs.instrumentation_utils', level='ERROR'):
+            with StageTracer(callback=callback):
+                xml_doc = xml_utils.parse_untrusted_xml(b'<root/>')
+
+        self.assertEqual(xml_doc.tag, 'root')
+
+
+class FunctionInstrumentStageTest(unittest.TestCase):
+
+    def test_wrapped_function(self) -> None:
+        @instrument_stage('test.stage', input_size=bytes_input_size)
+        def stage_func(value: bytes, multiplier: int = 1) -> int:
+            """Docstring."""
+            return len(value) * multiplier
+
+        self.assertEqual(stage_func.__name__, 'stage_func')
+        self.assertEqual(stage_func.__doc__, 'Docstring.')
+
+        with StageTracer() as tracer:
+            self.assertEqual(stage_func(b'abc', multiplier=2), 6)
+            self.assertEqual(stage_func(memoryview(b'abcd')), 4)
+            with self.assertRaises(TypeError):
+                stage_func(None)  # type: ignore
+
+        self.assertEqual(
+            [(event.stage, event.input_size, event.outcome) for event in tracer.events],
+            [('test.stage', 3, 'ok'), ('test.stage', 4, 'ok'), ('test.stage', None, 'error')])
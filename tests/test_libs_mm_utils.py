@@ -1,10 +1,98 @@
 import unittest
+from datetime import date, datetime
 
-from cl_sii.libs.mm_utils import CustomMarshmallowDateField  # noqa: F401
+import marshmallow
+
+from cl_sii.libs.mm_utils import (  # noqa: F401
+    CustomMarshmallowDateField, CustomMarshmallowDateTimeField,
+)
 
 
 class CustomMarshmallowDateFieldTest(unittest.TestCase):
 
-    def test_x(self) -> None:
-        # TODO: implement!
-        pass
+    def test_deserialize(self) -> None:
+        field = CustomMarshmallowDateField(format='%d/%m/%Y')
+
+        self.assertEqual(field.deserialize('22/10/2018'), date(2018, 10, 22))
+        self.assertEqual(field.deserialize('22/10/2018'), date(2018, 10, 22))
+        # Not zero-padded, which 'datetime.strptime' accepts.
+        self.assertEqual(field.deserialize('1/2/2019'), date(2019, 2, 1))
+
+    def test_deserialize_iso(self) -> None:
+        field = CustomMarshmallowDateField()
+        self.assertEqual(field.deserialize('2018-10-22'), date(2018, 10, 22))
+
+    def test_deserialize_same_as_strptime(self) -> None:
+        values = [
+            '22/10/2018', '29/02/2020', '29/02/2019', '31/04/2019', '00/01/2019', '01/13/2019',
+            '01/01/0000', '1/1/2019', ' 1/01/2019', '01-01-2019', '01/01/2019 ', '01/01/20190',
+            '٠١/٠١/٢٠١٩', '+1/01/2019',
+        ]
+        field = CustomMarshmallowDateField(format='%d/%m/%Y')
+
+        for value in values:
+            with self.subTest(value=value):
+                try:
+                    expected_output = datetime.strptime(value, '%d/%m/%Y').date()
+                except ValueError:
+                    with self.assertRaises(marshmallow.ValidationError):
+                        field.deserialize(value)
+                else:
+                    self.assertEqual(field.deserialize(value), expected_output)
+
+    def test_deserialize_fail(self) -> None:
+        field = CustomMarshmallowDateField(format='%d/%m/%Y')
+
+        for value in ('', '2018-10-22', 20181022, ['22/10/2018']):
+            with self.subTest(value=value):
+                with self.assertRaises(marshmallow.ValidationError) as cm:
+                    field.deserialize(value)
+                self.assertEqual(cm.exception.messages, ['Not a valid date.'])
+
+
+class CustomMarshmallowDateTimeFieldTest(unittest.TestCase):
+
+    def test_deserialize(self) -> None:
+        field = CustomMarshmallowDateTimeField(format='%d/%m/%Y %H:%M:%S')
+
+        self.assertEqual(
+            field.deserialize('23/10/2018 01:54:13'), datetime(2018, 10, 23, 1, 54, 13))
+        self.assertEqual(
+            field.deserialize('23/10/2018 01:54:13'), datetime(2018, 10, 23, 1, 54, 13))
+        self.assertEqual(
+            field.deserialize('23/10/2018\t1:54:13'), datetime(2018, 10, 23, 1, 54, 13))
+
+    def test_deserialize_iso(self) -> None:
+        field = CustomMarshmallowDateTimeField()
+        self.assertEqual(
+            field.deserialize('2018-10-23T01:54:13'), datetime(2018, 10, 23, 1, 54, 13))
+
+    def test_deserialize_same_as_strptime(self) -> None:
+        formats_values = [
+            ('%d/%m/%Y %H:%M:%S', [
+                '23/10/2018 01:54:13', '23/10/2018 24:00:00', '23/10/2018 23:60:00',
+                '23/10/2018 23:59:60', '23/10/2018  01:54:13', '23/10/2018 1:54:13',
+            ]),
+            ('%Y-%m-%dT%H:%M', ['2018-10-23T01:54', '2018-10-23t01:54', '2018-10-23 01:54']),
+            ('%Y%m%d%H%M%S', ['20181023015413', '2018102301541', '201810230154130']),
+        ]
+        for format, values in formats_values:
+            field = CustomMarshmallowDateTimeField(format=format)
+            for value in values:
+                with self.subTest(format=format, value=value):
+                    try:
+                        expected_output = datetime.strptime(value, format)
+                    except ValueError:
+                        with self.assertRaises(marshmallow.ValidationError):
+                            field.deserialize(value)
+                    else:
+                        self.assertEqual(field.deserialize(value), expected_output)
+
+    def test_deserialize_fail(self) -> None:
+        field = CustomMarshmallowDateTimeField(format='%d/%m/%Y %H:%M:%S')
+
+        for value in ('', '2018-10-23T01:54:13', 1540270453):
+            with self.subTest(value=value):
+                with self.assertRaises(marshmallow.ValidationError) as cm:
+                    field.deserialize(value)
+                self.assertEqual(cm.exception.messages, ['Not a valid datetime.'])
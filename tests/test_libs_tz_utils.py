@@ -1,10 +1,44 @@
+import random
 import unittest
+from datetime import datetime, timedelta, timezone
+from typing import List
+from unittest import mock
 
+from cl_sii.libs import tz_utils
 from cl_sii.libs.tz_utils import (  # noqa: F401
-    convert_naive_dt_to_tz_aware, dt_is_aware, dt_is_naive, get_now_tz_aware,
-    PytzTimezone, TZ_CL_SANTIAGO, TZ_UTC,
+    convert_naive_dt_to_tz_aware, convert_naive_dts_to_tz_aware, dt_is_aware, dt_is_naive,
+    get_now_tz_aware, get_tz, get_tz_localizer, get_tz_name, PytzTimezone, Timezone,
+    TzLocalizer, TZ_BACKEND_PYTZ, TZ_BACKEND_ZONEINFO, TZ_CL_SANTIAGO, TZ_UTC, zoneinfo,
 )
 
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+# note: these tests do not depend on the configured backend.
+PYTZ_TZ_UTC = get_tz('UTC', backend=TZ_BACKEND_PYTZ)
+PYTZ_TZ_CL_SANTIAGO = get_tz('America/Santiago', backend=TZ_BACKEND_PYTZ)
+
+
+def _gen_dts_naive_cl_santiago(min_year: int) -> List[datetime]:
+    # Naive datetimes every few minutes around each DST transition of Santiago since 2000
+    #   (including ambiguous and non-existent times), and some random ones since 'min_year'.
+    rng = random.Random(0)
+    dts_naive = []
+    for utc_transition_time in PYTZ_TZ_CL_SANTIAGO._utc_transition_times:
+        if not 2000 <= utc_transition_time.year <= 2037:
+            continue
+        for minutes in range(-12 * 60, 12 * 60, 13):
+            delta = timedelta(minutes=minutes, microseconds=rng.randint(0, 1))
+            dts_naive.append(utc_transition_time + delta)
+    min_dt = datetime(min_year, 1, 1)
+    for _ in range(2000):
+        dts_naive.append(
+            min_dt + timedelta(seconds=rng.randint(0, (2037 - min_year) * 365 * 24 * 3600)))
+    return dts_naive
+
 
 class FunctionsTest(unittest.TestCase):
 
@@ -27,3 +61,167 @@ class FunctionsTest(unittest.TestCase):
         # TODO: implement for 'dt_is_naive'
         # Reuse doctests/examples in function docstring.
         pass
+
+    def test_get_tz(self) -> None:
+        self.assertIs(get_tz('America/Santiago', backend=TZ_BACKEND_PYTZ), PYTZ_TZ_CL_SANTIAGO)
+        self.assertEqual(get_tz_name(TZ_CL_SANTIAGO), 'America/Santiago')
+        self.assertEqual(get_tz_name(TZ_UTC), 'UTC')
+
+        with self.assertRaises(ValueError):
+            get_tz('America/Santiago', backend='dateutil')
+
+    def test_get_tz_name(self) -> None:
+        self.assertEqual(get_tz_name(PYTZ_TZ_CL_SANTIAGO), 'America/Santiago')
+        self.assertEqual(get_tz_name(PYTZ_TZ_UTC), 'UTC')
+        self.assertIsNone(get_tz_name(timezone.utc))
+        self.assertIsNone(get_tz_name(None))
+
+
+class TzLocalizerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.dts_naive = _gen_dts_naive_cl_santiago(min_year=1900)
+
+    def test_localize_same_as_pytz(self) -> None:
+        for tz in (PYTZ_TZ_CL_SANTIAGO, PYTZ_TZ_UTC):
+            localizer = TzLocalizer(tz)
+            for dt in self.dts_naive:
+                expected_output = tz.localize(dt)
+                output = localizer.localize(dt)
+                self.assertEqual(output, expected_output)
+                self.assertIs(output.tzinfo, expected_output.tzinfo)
+
+    def test_localize_ambiguous_and_non_existent(self) -> None:
+        localizer = get_tz_localizer(PYTZ_TZ_CL_SANTIAGO)
+
+        # Ambiguous: end of DST.
+        dt = localizer.localize(datetime(2019, 4, 6, 23, 30))
+        self.assertEqual(dt.isoformat(), '2019-04-06T23:30:00-04:00')
+        # Non-existent: start of DST.
+        dt = localizer.localize(datetime(2019, 9, 8, 0, 30))
+        self.assertEqual(dt.isoformat(), '2019-09-08T00:30:00-04:00')
+        dt = localizer.localize(datetime(2019, 9, 8, 1, 0))
+        self.assertEqual(dt.isoformat(), '2019-09-08T01:00:00-03:00')
+
+    def test_localize_many(self) -> None:
+        localizer = get_tz_localizer(PYTZ_TZ_CL_SANTIAGO)
+        expected_output = [localizer.localize(dt) for dt in self.dts_naive]
+
+        self.assertEqual(localizer.localize_many(self.dts_naive), expected_output)
+        self.assertEqual(
+            convert_naive_dts_to_tz_aware(iter(self.dts_naive), PYTZ_TZ_CL_SANTIAGO),
+            expected_output)
+        self.assertEqual(localizer.localize_many([]), [])
+
+    def test_to_utc_timestamp_many(self) -> None:
+        localizer = get_tz_localizer(PYTZ_TZ_CL_SANTIAGO)
+
+        self.assertEqual(
+            localizer.to_utc_timestamp_many(self.dts_naive),
+            [localizer.localize(dt).timestamp() for dt in self.dts_naive])
+        self.assertEqual(
+            localizer.to_utc_timestamp_many([datetime(2018, 10, 23, 1, 54, 13)]),
+            [1540270453.0])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed.")
+    def test_localize_datetime64_to_utc(self) -> None:
+        localizer = get_tz_localizer(PYTZ_TZ_CL_SANTIAGO)
+        expected_output = [
+            localizer.localize(dt).astimezone(PYTZ_TZ_UTC).replace(tzinfo=None)
+            for dt in self.dts_naive
+        ]
+
+        output = localizer.localize_datetime64_to_utc(
+            numpy.array(self.dts_naive, dtype='datetime64[us]'))
+        self.assertEqual(output.dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(output.tolist(), expected_output)
+
+        output = localizer.localize_datetime64_to_utc(
+            numpy.array(['2018-10-23T01:54:13'], dtype='datetime64[s]'))
+        self.assertEqual(output.astype('datetime64[s]').astype('int64').tolist(), [1540270453])
+
+        with self.assertRaises(TypeError):
+            localizer.localize_datetime64_to_utc(numpy.array([1, 2]))
+
+    def test_fail_tz_aware(self) -> None:
+        localizer = get_tz_localizer(PYTZ_TZ_CL_SANTIAGO)
+        dt = convert_naive_dt_to_tz_aware(datetime(2018, 10, 23, 1, 54, 13), PYTZ_TZ_UTC)
+
+        with self.assertRaises(ValueError):
+            localizer.localize(dt)
+        with self.assertRaises(ValueError):
+            localizer.localize_many([dt])
+        with self.assertRaises(ValueError):
+            localizer.to_utc_timestamp_many([dt])
+
+    def test_convert_naive_dt_to_tz_aware_without_localizer(self) -> None:
+        # The table of the localizer is not built to localize a single datetime.
+        with mock.patch.object(tz_utils, 'get_tz_localizer') as mock_get_tz_localizer:
+            for dt in self.dts_naive[:1000]:
+                output = convert_naive_dt_to_tz_aware(dt, PYTZ_TZ_CL_SANTIAGO)
+                expected_output = PYTZ_TZ_CL_SANTIAGO.localize(dt)
+                self.assertEqual(output, expected_output)
+                self.assertIs(output.tzinfo, expected_output.tzinfo)
+        mock_get_tz_localizer.assert_not_called()
+
+    def test_get_tz_localizer(self) -> None:
+        localizer = get_tz_localizer(PYTZ_TZ_CL_SANTIAGO)
+        self.assertIs(localizer.tz, PYTZ_TZ_CL_SANTIAGO)
+        self.assertIs(get_tz_localizer(PYTZ_TZ_CL_SANTIAGO), localizer)
+
+    @unittest.skipIf(zoneinfo is None, "Module 'zoneinfo' is not available.")
+    def test_fail_zoneinfo_tz(self) -> None:
+        with self.assertRaises(TypeError):
+            TzLocalizer(get_tz('America/Santiago', backend=TZ_BACKEND_ZONEINFO))
+
+
+@unittest.skipIf(zoneinfo is None, "Module 'zoneinfo' is not available.")
+class ZoneinfoBackendTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # note: before 1970 the data of the timezone databases of pytz and of the system (used
+        #   by 'zoneinfo') may differ e.g. pytz rounds the UTC offsets of local mean time.
+        cls.dts_naive = _gen_dts_naive_cl_santiago(min_year=1970)
+        cls.tz = get_tz('America/Santiago', backend=TZ_BACKEND_ZONEINFO)
+
+    def assertSameLocalizedDt(self, dt_1: datetime, dt_2: datetime) -> None:
+        self.assertEqual(
+            (dt_1.replace(tzinfo=None), dt_1.utcoffset(), dt_1.dst(), get_tz_name(dt_1.tzinfo)),
+            (dt_2.replace(tzinfo=None), dt_2.utcoffset(), dt_2.dst(), get_tz_name(dt_2.tzinfo)))
+
+    def test_get_tz(self) -> None:
+        self.assertIsInstance(self.tz, zoneinfo.ZoneInfo)
+        self.assertEqual(get_tz_name(self.tz), 'America/Santiago')
+
+    def test_convert_naive_dt_to_tz_aware_same_as_pytz(self) -> None:
+        for dt in self.dts_naive:
+            output = convert_naive_dt_to_tz_aware(dt, self.tz)
+            self.assertIs(output.tzinfo, self.tz)
+            self.assertSameLocalizedDt(output, PYTZ_TZ_CL_SANTIAGO.localize(dt))
+            self.assertEqual(output.timestamp(), PYTZ_TZ_CL_SANTIAGO.localize(dt).timestamp())
+
+    def test_convert_naive_dt_to_tz_aware_ambiguous_and_non_existent(self) -> None:
+        # Ambiguous: end of DST.
+        dt = convert_naive_dt_to_tz_aware(datetime(2019, 4, 6, 23, 30), self.tz)
+        self.assertEqual(dt.isoformat(), '2019-04-06T23:30:00-04:00')
+        # Non-existent: start of DST.
+        dt = convert_naive_dt_to_tz_aware(datetime(2019, 9, 8, 0, 30), self.tz)
+        self.assertEqual(dt.isoformat(), '2019-09-08T00:30:00-04:00')
+        dt = convert_naive_dt_to_tz_aware(datetime(2019, 9, 8, 1, 0), self.tz)
+        self.assertEqual(dt.isoformat(), '2019-09-08T01:00:00-03:00')
+
+    def test_convert_naive_dts_to_tz_aware(self) -> None:
+        output = convert_naive_dts_to_tz_aware(self.dts_naive, self.tz)
+        self.assertEqual(len(output), len(self.dts_naive))
+        for dt, expected_dt in zip(output, self.dts_naive):
+            self.assertSameLocalizedDt(dt, PYTZ_TZ_CL_SANTIAGO.localize(expected_dt))
+
+    def test_convert_naive_dt_to_tz_aware_fail_tz_aware(self) -> None:
+        dt = convert_naive_dt_to_tz_aware(datetime(2018, 10, 23, 1, 54, 13), self.tz)
+
+        with self.assertRaises(ValueError):
+            convert_naive_dt_to_tz_aware(dt, self.tz)
+        with self.assertRaises(ValueError):
+            convert_naive_dts_to_tz_aware([dt], self.tz)
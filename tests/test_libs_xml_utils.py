@@ -1,11 +1,24 @@
+import base64
+import hashlib
+import io
+import os
+import tempfile
+import threading
 import unittest
 
+import defusedxml.lxml
 import lxml.etree
 
+from cl_sii.dte.parse import DTE_XML_SCHEMA_OBJ
 from cl_sii.libs.xml_utils import XmlElement
 from cl_sii.libs.xml_utils import (  # noqa: F401
-    XmlSyntaxError, XmlFeatureForbidden,
-    parse_untrusted_xml, read_xml_schema, validate_xml_doc, write_xml_doc,
+    SII_XML_SCHEMA_REGISTRY, SII_XML_SCHEMAS_DIR_PATH,
+    XmlDocIncrementalWriter, XmlSchemaDocValidationError, XmlSchemaDocValidationErrorEntry,
+    XmlSchemaCompileStats, XmlSchemaRegistry,
+    XmlSyntaxError, XmlFeatureForbidden, XmlSizeLimitExceeded, c14n_digest, c14n_digest_many,
+    parse_untrusted_xml, parse_untrusted_xml_file, parse_untrusted_xml_stream, read_xml_schema,
+    validate_xml_doc, write_xml_doc,
+    _get_xml_parser,
 )
 
 from .utils import read_test_file_bytes
@@ -77,6 +90,25 @@ class FunctionParseUntrustedXmlTests(unittest.TestCase):
             ("XML uses or contains a forbidden feature.", )
         )
 
+    def test_bytearray_and_memoryview(self) -> None:
+        value = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+        expected_output = lxml.etree.tostring(parse_untrusted_xml(value))
+
+        for value_buffer in (bytearray(value), memoryview(value), memoryview(bytearray(value))):
+            with self.subTest(value_type=type(value_buffer)):
+                xml = parse_untrusted_xml(value_buffer)
+                self.assertIsInstance(xml, defusedxml.lxml.RestrictedElement)
+                self.assertEqual(lxml.etree.tostring(xml), expected_output)
+
+    def test_memoryview_attacks(self) -> None:
+        value = read_test_file_bytes('test_data/xml/attacks/billion-laughs-1.xml')
+        with self.assertRaises(XmlSyntaxError):
+            parse_untrusted_xml(memoryview(value))
+
+        value = read_test_file_bytes('test_data/xml/attacks/quadratic-blowup-entity-expansion.xml')
+        with self.assertRaises(XmlFeatureForbidden):
+            parse_untrusted_xml(bytearray(value))
+
     def test_type_error(self) -> None:
         value = 1  # type: ignore
         with self.assertRaises(TypeError) as cm:
@@ -88,6 +120,239 @@ class FunctionParseUntrustedXmlTests(unittest.TestCase):
         )
 
 
+class FunctionParseUntrustedXmlParserReuseTests(unittest.TestCase):
+
+    """
+    Tests for the reuse of the (thread-local) XML parser of 'parse_untrusted_xml'.
+    """
+
+    attack_file_paths = (
+        'test_data/xml/attacks/billion-laughs-1.xml',
+        'test_data/xml/attacks/billion-laughs-2.xml',
+        'test_data/xml/attacks/quadratic-blowup-entity-expansion.xml',
+        'test_data/xml/attacks/external-entity-expansion-remote.xml',
+    )
+
+    def test_parser_is_reused_in_thread(self) -> None:
+        self.assertIs(_get_xml_parser(), _get_xml_parser())
+
+        parsers = []
+        thread = threading.Thread(target=lambda: parsers.append(_get_xml_parser()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(parsers[0], _get_xml_parser())
+
+    def test_parser_settings(self) -> None:
+        xml = parse_untrusted_xml(b'<root><element/></root>')
+        self.assertIsInstance(xml, defusedxml.lxml.RestrictedElement)
+        self.assertIsInstance(xml[0], defusedxml.lxml.RestrictedElement)
+
+    def test_attacks_after_reuse(self) -> None:
+        # The attacks must be detected after the parser has been used, and the parser must
+        #   still work after an attack.
+        for _ in range(3):
+            for file_path in self.attack_file_paths:
+                with self.subTest(file_path=file_path):
+                    parse_untrusted_xml(b'<root/>')
+                    with self.assertRaises((XmlSyntaxError, XmlFeatureForbidden)):
+                        parse_untrusted_xml(read_test_file_bytes(file_path))
+
+        xml = parse_untrusted_xml(b'<root>text</root>')
+        self.assertEqual(xml.text, 'text')
+
+    def test_attacks_in_threads(self) -> None:
+        value_valid = read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+        values_attacks = [read_test_file_bytes(p) for p in self.attack_file_paths]
+        errors = []
+
+        def parse_values() -> None:
+            for _ in range(20):
+                if parse_untrusted_xml(value_valid).tag != '{http://www.sii.cl/SiiDte}DTE':
+                    errors.append('Unexpected result.')
+                for value in values_attacks:
+                    try:
+                        parse_untrusted_xml(value)
+                    except (XmlSyntaxError, XmlFeatureForbidden):
+                        pass
+                    else:
+                        errors.append('Attack was not detected.')
+
+        threads = [threading.Thread(target=parse_values) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+
+class FunctionParseUntrustedXmlStreamTests(unittest.TestCase):
+
+    def test_valid(self) -> None:
+        value = (
+            b'<root>\n'
+            b'   <element key="value">text</element>\n'
+            b'   <element>text</element>tail\n'
+            b'   <empty-element/>\n'
+            b'</root>')
+        xml = parse_untrusted_xml_stream(io.BytesIO(value), chunk_size=5)
+        self.assertIsInstance(xml, defusedxml.lxml.RestrictedElement)
+        self.assertEqual(
+            lxml.etree.tostring(xml, pretty_print=False),
+            value)
+
+    def test_valid_dte(self) -> None:
+        value = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+        xml = parse_untrusted_xml_stream(io.BytesIO(value))
+        self.assertEqual(
+            lxml.etree.tostring(xml),
+            lxml.etree.tostring(parse_untrusted_xml(value)))
+
+    def test_size_limit_exceeded(self) -> None:
+        value = b'<root>' + b'<element/>' * 1000 + b'</root>'
+        stream = io.BytesIO(value)
+        with self.assertRaises(XmlSizeLimitExceeded) as cm:
+            parse_untrusted_xml_stream(stream, max_bytes=1024, chunk_size=100)
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML content exceeds the max allowed size (1024 bytes).", )
+        )
+        # The reading stopped as soon as the limit was exceeded.
+        self.assertEqual(stream.tell(), 1100)
+
+        xml = parse_untrusted_xml_stream(io.BytesIO(value), max_bytes=len(value))
+        self.assertEqual(len(xml), 1000)
+
+    def test_bytes_text(self) -> None:
+        with self.assertRaises(XmlSyntaxError) as cm:
+            parse_untrusted_xml_stream(io.BytesIO(b'not xml'))
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML syntax error. Document is empty, line 1, column 1.", )
+        )
+
+    def test_empty(self) -> None:
+        with self.assertRaises(XmlSyntaxError) as cm:
+            parse_untrusted_xml_stream(io.BytesIO(b''))
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML syntax error. no element found.", )
+        )
+
+    def test_attack_billion_laughs_1(self) -> None:
+        value = read_test_file_bytes('test_data/xml/attacks/billion-laughs-1.xml')
+        with self.assertRaises(XmlSyntaxError) as cm:
+            parse_untrusted_xml_stream(io.BytesIO(value), chunk_size=16)
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML syntax error. Detected an entity reference loop, line 1, column 7.", )
+        )
+
+    def test_attack_billion_laughs_2(self) -> None:
+        value = read_test_file_bytes('test_data/xml/attacks/billion-laughs-2.xml')
+        with self.assertRaises(XmlSyntaxError) as cm:
+            parse_untrusted_xml_stream(io.BytesIO(value), chunk_size=16)
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML syntax error. Detected an entity reference loop, line 1, column 4.", )
+        )
+
+    def test_attack_quadratic_blowup(self) -> None:
+        value = read_test_file_bytes('test_data/xml/attacks/quadratic-blowup-entity-expansion.xml')
+        with self.assertRaises(XmlFeatureForbidden) as cm:
+            parse_untrusted_xml_stream(io.BytesIO(value), chunk_size=16)
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML uses or contains a forbidden feature.", )
+        )
+
+    def test_attack_external_entity_expansion_remote(self) -> None:
+        value = read_test_file_bytes('test_data/xml/attacks/external-entity-expansion-remote.xml')
+        with self.assertRaises(XmlFeatureForbidden) as cm:
+            parse_untrusted_xml_stream(io.BytesIO(value), chunk_size=16)
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML uses or contains a forbidden feature.", )
+        )
+
+    def test_type_error(self) -> None:
+        with self.assertRaises(TypeError) as cm:
+            parse_untrusted_xml_stream(io.StringIO('<root/>'))  # type: ignore
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("Stream to be parsed as XML must return bytes.", )
+        )
+
+    def test_value_error(self) -> None:
+        with self.assertRaises(ValueError):
+            parse_untrusted_xml_stream(io.BytesIO(b'<root/>'), max_bytes=0)
+        with self.assertRaises(ValueError):
+            parse_untrusted_xml_stream(io.BytesIO(b'<root/>'), chunk_size=0)
+
+
+class FunctionParseUntrustedXmlFileTests(unittest.TestCase):
+
+    def _write_temp_file(self, value: bytes) -> str:
+        with tempfile.NamedTemporaryFile(suffix='.xml', delete=False) as f:
+            f.write(value)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_valid_dte(self) -> None:
+        file_path = os.path.join(
+            os.path.dirname(__file__),
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+        value = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+
+        xml = parse_untrusted_xml_file(file_path)
+        self.assertIsInstance(xml, defusedxml.lxml.RestrictedElement)
+        self.assertEqual(
+            lxml.etree.tostring(xml),
+            lxml.etree.tostring(parse_untrusted_xml(value)))
+
+    def test_size_limit_exceeded(self) -> None:
+        file_path = self._write_temp_file(b'<root>' + b'<element/>' * 1000 + b'</root>')
+        with self.assertRaises(XmlSizeLimitExceeded):
+            parse_untrusted_xml_file(file_path, max_bytes=1024)
+
+        xml = parse_untrusted_xml_file(file_path, max_bytes=10013)
+        self.assertEqual(len(xml), 1000)
+
+    def test_empty(self) -> None:
+        file_path = self._write_temp_file(b'')
+        with self.assertRaises(XmlSyntaxError) as cm:
+            parse_untrusted_xml_file(file_path)
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            ("XML syntax error. no element found.", )
+        )
+
+    def test_attacks(self) -> None:
+        file_path = self._write_temp_file(
+            read_test_file_bytes('test_data/xml/attacks/billion-laughs-2.xml'))
+        with self.assertRaises(XmlSyntaxError):
+            parse_untrusted_xml_file(file_path)
+
+        file_path = self._write_temp_file(
+            read_test_file_bytes('test_data/xml/attacks/external-entity-expansion-remote.xml'))
+        with self.assertRaises(XmlFeatureForbidden):
+            parse_untrusted_xml_file(file_path)
+
+    def test_file_not_found(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            parse_untrusted_xml_file('/nonexistent/file.xml')
+
+
 class FunctionReadXmlSchemaTest(unittest.TestCase):
 
     # TODO: implement
@@ -95,14 +360,319 @@ class FunctionReadXmlSchemaTest(unittest.TestCase):
     pass
 
 
+class XmlSchemaRegistryTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.schema_paths = [
+            os.path.join(SII_XML_SCHEMAS_DIR_PATH, 'DTE_v10.xsd'),
+            os.path.join(SII_XML_SCHEMAS_DIR_PATH, 'Recibos_v10.xsd'),
+            os.path.join(SII_XML_SCHEMAS_DIR_PATH, 'LceCal_v10.xsd'),
+        ]
+
+    def test_get(self) -> None:
+        registry = XmlSchemaRegistry(self.schema_paths)
+        self.assertEqual(registry.names, ['DTE_v10.xsd', 'Recibos_v10.xsd', 'LceCal_v10.xsd'])
+        self.assertEqual(registry.compile_stats, {})
+
+        schema = registry.get('Recibos_v10.xsd')
+        self.assertIsInstance(schema, lxml.etree.XMLSchema)
+        self.assertIs(registry.get('Recibos_v10.xsd'), schema)
+
+        compile_stats = registry.compile_stats
+        self.assertEqual(list(compile_stats), ['Recibos_v10.xsd'])
+        self.assertEqual(compile_stats['Recibos_v10.xsd'].count, 1)
+        self.assertGreater(compile_stats['Recibos_v10.xsd'].duration, 0)
+
+        with self.assertRaises(KeyError):
+            registry.get('EnvioDTE_v10.xsd')
+
+    def test_get_for_xml_doc(self) -> None:
+        registry = XmlSchemaRegistry(self.schema_paths)
+        xml_doc = parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml'))
+
+        self.assertEqual(registry.get_name_for_tag(xml_doc.tag), 'DTE_v10.xsd')
+        self.assertEqual(
+            registry.get_name_for_tag('{http://www.sii.cl/SiiLce}LceCal'), 'LceCal_v10.xsd')
+        self.assertEqual(
+            registry.get_name_for_tag('{http://www.sii.cl/SiiDte}Recibo'), 'Recibos_v10.xsd')
+        self.assertIsNone(registry.get_name_for_tag('{http://www.sii.cl/SiiDte}EnvioDTE'))
+        self.assertIsNone(registry.get_name_for_tag('DTE'))
+
+        schema = registry.get_for_xml_doc(xml_doc)
+        self.assertIs(schema, registry.get('DTE_v10.xsd'))
+        validate_xml_doc(schema, xml_doc)
+
+        with self.assertRaises(ValueError):
+            registry.get_for_xml_doc(parse_untrusted_xml(b'<root/>'))
+
+    def test_per_process_and_per_thread(self) -> None:
+        for per_thread in (False, True):
+            with self.subTest(per_thread=per_thread):
+                registry = XmlSchemaRegistry(self.schema_paths, per_thread=per_thread)
+                schemas = []
+
+                def get_schema() -> None:
+                    for _ in range(3):
+                        schemas.append(registry.get('LceCal_v10.xsd'))
+
+                threads = [threading.Thread(target=get_schema) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                self.assertEqual(len(schemas), 12)
+                self.assertEqual(len(set(map(id, schemas))), 4 if per_thread else 1)
+                self.assertEqual(
+                    registry.compile_stats['LceCal_v10.xsd'].count, 4 if per_thread else 1)
+
+    def test_sii_xml_schema_registry(self) -> None:
+        self.assertEqual(len(SII_XML_SCHEMA_REGISTRY.names), 12)
+        self.assertEqual(
+            SII_XML_SCHEMA_REGISTRY.get_name_for_tag('{http://www.sii.cl/SiiDte}AEC'),
+            'AEC_v10.xsd')
+        self.assertEqual(
+            SII_XML_SCHEMA_REGISTRY.get_name_for_tag('{http://www.sii.cl/SiiDte}EnvioDTE'),
+            'EnvioDTE_v10.xsd')
+        self.assertEqual(
+            SII_XML_SCHEMA_REGISTRY.get_name_for_tag('{http://www.sii.cl/SiiDte}DTE'),
+            'DTE_v10.xsd')
+        self.assertIsInstance(
+            SII_XML_SCHEMA_REGISTRY.compile_stats['EnvioDTE_v10.xsd'], XmlSchemaCompileStats)
+
+
 class FunctionValidateXmlDocTest(unittest.TestCase):
 
-    # TODO: implement
+    def setUp(self) -> None:
+        value = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+        self.xml_doc_valid = parse_untrusted_xml(value)
+        self.xml_doc_invalid = parse_untrusted_xml(
+            value
+            .replace(b'<Folio>170</Folio>', b'<Folio>abc</Folio><Foo/>')
+            .replace(b'<MntTotal>2996301</MntTotal>', b'<MntTotalX>2996301</MntTotalX>'))
 
-    pass
+    def test_ok(self) -> None:
+        validate_xml_doc(DTE_XML_SCHEMA_OBJ, self.xml_doc_valid)
+
+    def test_fail_errors(self) -> None:
+        with self.assertRaises(XmlSchemaDocValidationError) as cm:
+            validate_xml_doc(DTE_XML_SCHEMA_OBJ, self.xml_doc_invalid)
+
+        self.assertSequenceEqual(
+            cm.exception.args,
+            (
+                "Element '{http://www.sii.cl/SiiDte}Folio': "
+                "'abc' is not a valid value of the atomic type "
+                "'{http://www.sii.cl/SiiDte}FolioType'., line 8",
+            ))
+        self.assertEqual(len(cm.exception.errors), 3)
+        self.assertEqual(
+            cm.exception.errors[0],
+            XmlSchemaDocValidationErrorEntry(
+                message=(
+                    "Element '{http://www.sii.cl/SiiDte}Folio': "
+                    "'abc' is not a valid value of the atomic type "
+                    "'{http://www.sii.cl/SiiDte}FolioType'."),
+                line=8,
+                path='/*/*[1]/*[1]/*[1]/*[2]',
+                element='{http://www.sii.cl/SiiDte}Folio',
+                domain='SCHEMASV',
+            ))
+        self.assertEqual(
+            [(error.line, error.element) for error in cm.exception.errors[1:]],
+            [
+                (8, '{http://www.sii.cl/SiiDte}Foo'),
+                (38, '{http://www.sii.cl/SiiDte}MntTotalX'),
+            ])
+
+    def test_fail_max_errors(self) -> None:
+        with self.assertRaises(XmlSchemaDocValidationError) as cm:
+            validate_xml_doc(DTE_XML_SCHEMA_OBJ, self.xml_doc_invalid, max_errors=1)
+
+        self.assertEqual(len(cm.exception.errors), 1)
+        self.assertEqual(cm.exception.errors[0].element, '{http://www.sii.cl/SiiDte}Folio')
+
+    def test_error_log_does_not_accumulate(self) -> None:
+        for _ in range(2):
+            with self.assertRaises(XmlSchemaDocValidationError) as cm:
+                validate_xml_doc(DTE_XML_SCHEMA_OBJ, self.xml_doc_invalid)
+            self.assertEqual(len(cm.exception.errors), 3)
+            self.assertEqual(len(DTE_XML_SCHEMA_OBJ.error_log), 3)
+
+        validate_xml_doc(DTE_XML_SCHEMA_OBJ, self.xml_doc_valid)
+        self.assertEqual(len(DTE_XML_SCHEMA_OBJ.error_log), 0)
+
+    def test_threads_sharing_schema(self) -> None:
+        # Each document has a different defect (or none), and the errors of each validation must
+        #   be those of its own document, even if the threads validate against the same schema
+        #   object at the same time.
+        value = read_test_file_bytes('test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml')
+        xml_docs_and_expected_elements = [
+            (self.xml_doc_valid, []),
+            (
+                parse_untrusted_xml(value.replace(b'<Folio>170</Folio>', b'<Folio>abc</Folio>')),
+                ['{http://www.sii.cl/SiiDte}Folio'],
+            ),
+            (
+                parse_untrusted_xml(value.replace(
+                    b'<MntTotal>2996301</MntTotal>', b'<MntTotalX>2996301</MntTotalX>')),
+                ['{http://www.sii.cl/SiiDte}MntTotalX'],
+            ),
+            (
+                self.xml_doc_invalid,
+                [
+                    '{http://www.sii.cl/SiiDte}Folio',
+                    '{http://www.sii.cl/SiiDte}Foo',
+                    '{http://www.sii.cl/SiiDte}MntTotalX',
+                ],
+            ),
+        ]
+        mismatches = []
+
+        def validate_xml_docs(offset: int) -> None:
+            for i in range(50):
+                xml_doc, expected_elements = xml_docs_and_expected_elements[
+                    (offset + i) % len(xml_docs_and_expected_elements)]
+                try:
+                    validate_xml_doc(DTE_XML_SCHEMA_OBJ, xml_doc)
+                    elements = []
+                except XmlSchemaDocValidationError as exc:
+                    elements = [error.element for error in exc.errors]
+                if elements != expected_elements:
+                    mismatches.append((elements, expected_elements))
+
+        threads = [threading.Thread(target=validate_xml_docs, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(mismatches, [])
 
 
 class FunctionWriteXmlDocTest(unittest.TestCase):
 
     # TODO: implement for function 'write_xml_doc'. Consider each of the "observations".
     pass
+
+
+class FunctionC14nDigestTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.xml_doc = parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml'))
+        self.documento_em = self.xml_doc.find('{http://www.sii.cl/SiiDte}Documento')
+        self.documento_digest_value = self.xml_doc.findtext(
+            './/{http://www.w3.org/2000/09/xmldsig#}DigestValue')
+
+    def test_dte_documento(self) -> None:
+        xml_em_c14n, digest = c14n_digest(self.documento_em)
+
+        self.assertTrue(xml_em_c14n.startswith(
+            b'<Documento xmlns="http://www.sii.cl/SiiDte" ID="MiPE76354771-13419">\n'
+            b'    <Encabezado>\n'
+            b'      <IdDoc>\n'))
+        self.assertEqual(digest, hashlib.sha1(xml_em_c14n).digest())
+        self.assertEqual(base64.b64encode(digest).decode(), self.documento_digest_value)
+
+    def test_inclusive_and_exclusive(self) -> None:
+        xml_doc = parse_untrusted_xml(
+            b'<a xmlns="urn:a" xmlns:x="urn:x"><!-- c --><b ID="1"><c>text</c></b></a>')
+        b_em = xml_doc[1]
+
+        self.assertEqual(
+            c14n_digest(b_em)[0],
+            b'<b xmlns="urn:a" xmlns:x="urn:x" ID="1"><c>text</c></b>')
+        self.assertEqual(
+            c14n_digest(b_em, exclusive=True)[0],
+            b'<b xmlns="urn:a" ID="1"><c>text</c></b>')
+        self.assertEqual(
+            c14n_digest(xml_doc, with_comments=True)[0],
+            b'<a xmlns="urn:a" xmlns:x="urn:x"><!-- c --><b ID="1"><c>text</c></b></a>')
+
+    def test_algorithm(self) -> None:
+        xml_em_c14n, digest = c14n_digest(self.documento_em, algorithm='sha256')
+        self.assertEqual(digest, hashlib.sha256(xml_em_c14n).digest())
+        self.assertEqual(
+            c14n_digest(self.documento_em, algorithm='http://www.w3.org/2001/04/xmlenc#sha256'),
+            (xml_em_c14n, digest))
+
+        with self.assertRaises(ValueError):
+            c14n_digest(self.documento_em, algorithm='invalid')
+
+    def test_memo(self) -> None:
+        memo = {}
+        result = c14n_digest(self.documento_em, memo=memo)
+        self.assertEqual(len(memo), 1)
+
+        # note: 'find' returns the same Python object for the same XML element.
+        self.assertIs(
+            c14n_digest(self.xml_doc.find('{http://www.sii.cl/SiiDte}Documento'), memo=memo),
+            result)
+        self.assertIsNot(c14n_digest(self.documento_em, algorithm='sha256', memo=memo), result)
+        self.assertEqual(len(memo), 2)
+
+    def test_many(self) -> None:
+        results = c14n_digest_many([self.documento_em, self.xml_doc, self.documento_em])
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], c14n_digest(self.documento_em))
+        self.assertEqual(results[1], c14n_digest(self.xml_doc))
+        self.assertIs(results[2], results[0])
+
+
+class XmlDocIncrementalWriterTest(unittest.TestCase):
+
+    def test_write_envelope(self) -> None:
+        dte_xml_doc = parse_untrusted_xml(read_test_file_bytes(
+            'test_data/sii-dte/DTE--76354771-K--33--170--cleaned.xml'))
+        output = io.BytesIO()
+
+        with XmlDocIncrementalWriter(output, encoding='ISO-8859-1') as writer:
+            with writer.element('{http://www.sii.cl/SiiDte}EnvioDTE', {'version': '1.0'}):
+                with writer.element('{http://www.sii.cl/SiiDte}SetDTE', {'ID': 'SetDoc'}):
+                    writer.write(dte_xml_doc)
+                    writer.flush()
+                    writer.write(dte_xml_doc)
+
+        value = output.getvalue()
+        self.assertTrue(value.startswith(
+            b"<?xml version='1.0' encoding='ISO-8859-1'?>\n"
+            b'<EnvioDTE xmlns="http://www.sii.cl/SiiDte" version="1.0">'
+            b'<SetDTE ID="SetDoc"><DTE xmlns="http://www.sii.cl/SiiDte" version="1.0">'))
+        self.assertTrue(value.endswith(b'</DTE></SetDTE></EnvioDTE>'))
+
+        xml = parse_untrusted_xml(value)
+        self.assertEqual(xml.getroottree().docinfo.encoding, 'ISO-8859-1')
+        set_dte_em = xml[0]
+        self.assertEqual(len(set_dte_em), 2)
+        for dte_em in set_dte_em:
+            self.assertEqual(
+                lxml.etree.tostring(dte_em, encoding='ISO-8859-1'),
+                lxml.etree.tostring(dte_xml_doc, encoding='ISO-8859-1'))
+
+    def test_write_without_xml_declaration(self) -> None:
+        output = io.BytesIO()
+
+        with XmlDocIncrementalWriter(output, xml_declaration=False) as writer:
+            with writer.element('root', nsmap={'ds': 'http://www.w3.org/2000/09/xmldsig#'}):
+                writer.write(parse_untrusted_xml(b'<a><element>text</element>tail</a>')[0])
+                with writer.element('{http://www.w3.org/2000/09/xmldsig#}Signature'):
+                    pass
+
+        self.assertEqual(
+            output.getvalue(),
+            b'<root xmlns:ds="http://www.w3.org/2000/09/xmldsig#"><element>text</element>'
+            b'<ds:Signature></ds:Signature></root>')
+
+    def test_fail_outside_with_block(self) -> None:
+        writer = XmlDocIncrementalWriter(io.BytesIO())
+        with self.assertRaises(RuntimeError):
+            writer.write(parse_untrusted_xml(b'<root/>'))
+
+        with writer:
+            with self.assertRaises(RuntimeError):
+                with writer:
+                    pass
+            writer.write(parse_untrusted_xml(b'<root/>'))
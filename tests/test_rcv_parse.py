@@ -1,12 +1,21 @@
 import unittest
+from datetime import datetime
+from unittest import mock
 
+from cl_sii.libs import tz_utils
 from cl_sii.rcv.parse import RcvCsvRowSchema, create_rcv_csv_reader  # noqa: F401
 
 
 class RcvCsvRowSchemaTest(unittest.TestCase):
 
-    # TODO: implement!
-    pass
+    def test_postprocess_without_tz_localizer(self) -> None:
+        # The table of a 'TzLocalizer' (expensive to build) is not needed to parse a row.
+        schema = RcvCsvRowSchema()
+        data = {'fecha_recepcion_datetime': datetime(2018, 10, 23, 1, 54, 13)}
+        with mock.patch.object(tz_utils, 'get_tz_localizer') as mock_get_tz_localizer:
+            data = schema.postprocess(data)
+        mock_get_tz_localizer.assert_not_called()
+        self.assertEqual(data['fecha_recepcion_datetime'].isoformat(), '2018-10-23T01:54:13-03:00')
 
 
 class FunctionsTest(unittest.TestCase):